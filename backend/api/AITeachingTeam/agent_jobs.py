@@ -0,0 +1,88 @@
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api import jobs
+from userauths.models import User
+
+AGENT_VIEWS = {
+    "professor": "api.AITeachingTeam.views_professor.ProfessorAgentAPIView",
+    "advisor": "api.AITeachingTeam.views_academic_advisor.AcademicAdvisorAgentAPIView",
+    "librarian": "api.AITeachingTeam.views_research_librarian.ResearchLibrarianAgentAPIView",
+    "assistant": "api.AITeachingTeam.views_teaching_assistant.TeachingAssistantAgentAPIView",
+    "all_agents": "api.AITeachingTeam.all_agents.RunAllAgentsAPIView",
+}
+
+
+def run_agent_job(job):
+    view = import_string(AGENT_VIEWS[job.kind])()
+    jobs.report_progress(job, job.kind, "running")
+
+    def progress(stage, stage_status, **info):
+        jobs.report_progress(job, stage, stage_status, **info)
+
+    if getattr(view, "reports_progress", False):
+        response = view.generate(job.payload, progress=progress)
+    else:
+        response = view.generate(job.payload)
+
+    data = dict(response.data)
+    if response.status_code >= 400:
+        jobs.report_progress(job, job.kind, "failed")
+        message = data.get("error") or data.get("message") or "Agent failed"
+        if data.get("details"):
+            message = f"{message}: {data['details']}"
+        # A 4xx fails the same way on every attempt, and retrying a partial all-agents run would duplicate its documents
+        raise jobs.JobError(message, retry=response.status_code >= 500 and not data.get("documents"))
+
+    jobs.report_progress(job, job.kind, "done")
+    return data
+
+
+for kind in AGENT_VIEWS:
+    jobs.register(kind)(run_agent_job)
+
+
+class AgentJobAPIView(APIView):
+    """
+    Queues the agent's `generate(data)` as a background job and answers 202 with the job id.
+    Poll `jobs/<job_id>/` for progress and the final result. Input is checked with validate()
+    first, so a bad request is a 400 rather than a failed job.
+    """
+
+    permission_classes = [AllowAny]
+    job_kind = None
+    required_fields = ("user_id",)
+    missing_fields_error = "Missing 'user_id'"
+
+    def validate(self, data):
+        """The error generate() would answer for this input before doing any work, or None."""
+        if any(not str(data.get(field) or "").strip() for field in self.required_fields):
+            return self.missing_fields_error
+        return None
+
+    def post(self, request):
+        payload = request.data.dict() if hasattr(request.data, "dict") else dict(request.data)
+        idempotency_key = request.headers.get("Idempotency-Key") or payload.pop("idempotency_key", None)
+
+        user_id = payload.get("user_id")
+        if not user_id:
+            return Response({"error": "Missing 'user_id'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        error = self.validate(payload)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = User.objects.filter(id=user_id).first()
+        if user is None:
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        job, created = jobs.enqueue(self.job_kind, payload, user=user, idempotency_key=idempotency_key)
+        return Response({
+            "message": "Job queued" if created else "Job already exists",
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/api/v1/jobs/{job.job_id}/",
+        }, status=status.HTTP_202_ACCEPTED)
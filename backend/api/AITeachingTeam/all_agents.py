@@ -1,94 +1,180 @@
-from rest_framework.views import APIView
+import json
+
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from userauths.models import User
 from google.oauth2 import service_account
 from django.conf import settings
-from api.AITeachingTeam.utils import search_serpapi_links, create_google_doc
-from api.AITeachingTeam.views_professor import generate_professor_content
-from api.AITeachingTeam.views_academic_advisor import generate_advisor_content
-from api.AITeachingTeam.views_research_librarian import generate_librarian_content
-from api.AITeachingTeam.views_teaching_assistant import generate_assistant_content
+from django.http import StreamingHttpResponse
+from api.AITeachingTeam.utils import create_google_doc
+from api.AITeachingTeam.agent_jobs import AgentJobAPIView
+from api.AITeachingTeam.orchestrator import AgentPipeline, Stage
+from api.AITeachingTeam.views_professor import generate_content_with_retries
+from api.AITeachingTeam.views_academic_advisor import generate_advisor_from_professor
+from api.AITeachingTeam.views_research_librarian import generate_librarian_content, _insert_internal_courses_after_video_tutorials
+from api.AITeachingTeam.views_teaching_assistant import generate_assistant_from_professor
 from api import models as api_models
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 
 SERVICE_ACCOUNT_FILE = settings.CREDENTIALS_FILE
 SCOPES = ["https://www.googleapis.com/auth/documents", "https://www.googleapis.com/auth/drive"]
 GEMINI_API_KEY = settings.GEMINI_API_KEY
 SERPAPI_KEY = settings.SERPAPI_KEY
 
-class RunAllAgentsAPIView(APIView):
+SUPPORTED_LANGUAGES = ["en", "vi"]
+AGENT_TYPES = ["professor", "advisor", "librarian", "assistant"]
+MAX_PARALLEL_STAGES = 6
+
+
+def find_related_courses(topic, limit=5):
+    certificates = api_models.Certificate.objects.filter(course=OuterRef("pk"))
+    return list(
+        api_models.Course.objects.filter(Q(title__icontains=topic) | Q(description__icontains=topic))
+        .annotate(certificate=Exists(certificates))
+        .values("title", "description", "slug", "price", "certificate")[:limit]
+    )
+
+
+def build_agent_stages(user, topic, language, study_duration, creds):
+    """
+    professor ─┬─ advisor ─── advisor_doc
+               ├─ assistant ─ assistant_doc
+               └─ professor_doc
+    librarian ─── librarian_doc
+    """
+
+    def publish(ai_type, title):
+        def create(inputs):
+            doc_url = create_google_doc(title, inputs[ai_type], creds, user.email)
+            api_models.UserDocument.objects.create(
+                user=user,
+                topic=topic,
+                doc_url=doc_url,
+                ai_type=ai_type,
+                language=language,
+                study_duration=study_duration if ai_type == "advisor" else None,
+            )
+            return doc_url
+        return create
+
+    def librarian(inputs):
+        related_courses = find_related_courses(topic)
+        content = generate_librarian_content(topic, language, has_internal_courses=bool(related_courses))
+        return _insert_internal_courses_after_video_tutorials(content, related_courses)
+
+    return [
+        Stage("professor", lambda inputs: generate_content_with_retries(topic, language)),
+        Stage("librarian", librarian),
+        Stage("advisor", lambda inputs: generate_advisor_from_professor(topic, inputs["professor"], study_duration, language), ("professor",)),
+        Stage("assistant", lambda inputs: generate_assistant_from_professor(topic, inputs["professor"], language), ("professor",)),
+        Stage("professor_doc", publish("professor", f"📘 Knowledge Base - {topic}"), ("professor",)),
+        Stage("advisor_doc", publish("advisor", f"🗺️ Learning Roadmap - {topic}"), ("advisor",)),
+        Stage("librarian_doc", publish("librarian", f"📚 Research Resources - {topic}"), ("librarian",)),
+        Stage("assistant_doc", publish("assistant", f"✍️ Practice Materials - {topic}"), ("assistant",)),
+    ]
+
+
+def stage_event(result):
+    event = result.as_dict()
+    if result.name.endswith("_doc") and result.ok:
+        event["agent"] = result.name[:-len("_doc")]
+        event["doc_url"] = result.value
+    return event
+
+
+def collect_documents(pipeline):
+    return {
+        ai_type: pipeline.results[f"{ai_type}_doc"].value
+        for ai_type in AGENT_TYPES
+        if f"{ai_type}_doc" in pipeline.results and pipeline.results[f"{ai_type}_doc"].ok
+    }
+
+
+def is_stream_request(data):
+    return str(data.get("stream", "")).lower() in ("1", "true", "yes")
+
+
+class RunAllAgentsAPIView(AgentJobAPIView):
     permission_classes = [AllowAny]
+    job_kind = "all_agents"
+    reports_progress = True
+    required_fields = ("topic", "user_id", "study_duration")
+    missing_fields_error = "Missing topic, user_id, or study_duration"
+
+    def validate(self, data):
+        error = super().validate(data)
+        if error:
+            return error
+        language = data.get("language", "en")
+        if language not in SUPPORTED_LANGUAGES:
+            return f"Language {language} not supported"
+        return None
 
     def post(self, request):
+        # Streaming keeps the connection open and reports each document live instead of queueing a job
+        if is_stream_request(request.data):
+            return self.generate(request.data)
+        return super().post(request)
+
+    def generate(self, data, progress=None):
         try:
             if not all([hasattr(settings, attr) for attr in ['CREDENTIALS_FILE', 'GEMINI_API_KEY', 'SERPAPI_KEY']]):
                 return Response({"error": "Missing API configuration"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            topic = request.data.get("topic")
-            user_id = request.data.get("user_id")
-            study_duration = request.data.get("study_duration", "")
-            language = request.data.get("language", "en")
+            topic = data.get("topic")
+            user_id = data.get("user_id")
+            study_duration = (data.get("study_duration") or "").strip()
+            language = data.get("language", "en")
 
-            if not topic or not user_id:
-                return Response({"error": "Missing topic or user_id"}, status=status.HTTP_400_BAD_REQUEST)
-
-            SUPPORTED_LANGUAGES = ["en", "vi"]
-            if language not in SUPPORTED_LANGUAGES:
-                return Response({"error": f"Language {language} not supported"}, status=status.HTTP_400_BAD_REQUEST)
+            error = self.validate(data)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
             user = User.objects.get(id=user_id)
             creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-            references = search_serpapi_links(topic)
-
-            # 1. Professor
-            professor_content = generate_professor_content(topic, references, language)
-            professor_doc_url = create_google_doc(f"📘 Knowledge Base - {topic}", professor_content, creds, user.email)
-            api_models.UserDocument.objects.create(user=user, topic=topic, doc_url=professor_doc_url, ai_type="professor")
-
-            # 2. Academic Advisor
-            advisor_content = generate_advisor_content(topic, professor_content, study_duration, references, language)
-            advisor_doc_url = create_google_doc(f"🗺️ Learning Roadmap - {topic}", advisor_content, creds, user.email)
-            api_models.UserDocument.objects.create(user=user, topic=topic, doc_url=advisor_doc_url, ai_type="advisor")
-
-            # 3. Research Librarian
-            related_courses = list(api_models.Course.objects.filter(
-                Q(title__icontains=topic) | Q(description__icontains=topic)
-            ).values("title", "description", "slug", "price", "certificate")[:5])
-            skip_online_section = len(related_courses) > 0
-            librarian_content = generate_librarian_content(topic, references, language, skip_online_section)
-            if related_courses:
-                internal_courses_text = "### 5. Online Courses\n"
-                for course in related_courses:
-                    internal_courses_text += (
-                        f"- **{course['title']}**\n"
-                        f"  - Platform: Internal LMS\n"
-                        f"  - What’s covered: {course['description'][:100]}...\n"
-                        f"  - Cost: {'Free' if course['price'] == 0 else f'{course['price']} USD'}\n"
-                        f"  - Certification available: {'Yes' if course['certificate'] else 'No'}\n"
-                        f"  - [View Course](/courses/{course['slug']})\n\n"
-                    )
-                librarian_content += f"\n{internal_courses_text}"
-            librarian_doc_url = create_google_doc(f"📚 Research Resources - {topic}", librarian_content, creds, user.email)
-            api_models.UserDocument.objects.create(user=user, topic=topic, doc_url=librarian_doc_url, ai_type="librarian")
-
-            # 4. Teaching Assistant
-            assistant_content = generate_assistant_content(topic, references, professor_content, language)
-            assistant_doc_url = create_google_doc(f"✍️ Practice Materials - {topic}", assistant_content, creds, user.email)
-            api_models.UserDocument.objects.create(user=user, topic=topic, doc_url=assistant_doc_url, ai_type="assistant")
+            pipeline = AgentPipeline(build_agent_stages(user, topic, language, study_duration, creds), max_workers=MAX_PARALLEL_STAGES)
+
+            if is_stream_request(data):
+                # One JSON object per line: each stage as it finishes, then a summary line
+                def events():
+                    for result in pipeline.run():
+                        yield json.dumps(stage_event(result), ensure_ascii=False) + "\n"
+                    yield json.dumps({
+                        "stage": "complete",
+                        "documents": collect_documents(pipeline),
+                        "timings": pipeline.timings(),
+                        "elapsed": pipeline.elapsed,
+                    }, ensure_ascii=False) + "\n"
+
+                response = StreamingHttpResponse(events(), content_type="application/x-ndjson")
+                response["Cache-Control"] = "no-cache"
+                response["X-Accel-Buffering"] = "no"
+                return response
+
+            for result in pipeline.run():
+                if progress:
+                    event = stage_event(result)
+                    progress(event.pop("stage"), event.pop("status"), **event)
+
+            documents = collect_documents(pipeline)
+            failures = {name: result.error for name, result in pipeline.results.items() if not result.ok}
+            if failures:
+                return Response({
+                    "error": "Some agents failed to complete.",
+                    "details": failures,
+                    "documents": documents,
+                    "timings": pipeline.timings(),
+                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             return Response({
                 "message": "All documents created successfully.",
-                "documents": {
-                    "professor": professor_doc_url,
-                    "advisor": advisor_doc_url,
-                    "librarian": librarian_doc_url,
-                    "assistant": assistant_doc_url
-                }
+                "documents": documents,
+                "timings": pipeline.timings(),
+                "elapsed": pipeline.elapsed,
             })
 
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
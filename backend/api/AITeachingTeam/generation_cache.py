@@ -0,0 +1,276 @@
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import google.generativeai as genai
+from django.conf import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_last_access ON generations (last_access);
+CREATE TABLE IF NOT EXISTS agent_stats (
+    agent TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    saved_prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    saved_output_tokens INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# When the store grows past max_bytes, evict least recently used rows down to this fraction
+EVICT_TO = 0.9
+
+
+@dataclasses.dataclass
+class CachedResponse:
+    """The part of a Gemini response the agents use, rebuilt from the cache."""
+
+    text: str
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+
+
+def _config_dict(config):
+    if config is None:
+        return None
+    if dataclasses.is_dataclass(config):
+        return {k: v for k, v in dataclasses.asdict(config).items() if v is not None}
+    if isinstance(config, dict):
+        return config
+    return repr(config)
+
+
+def generation_key(model_name: str, prompt, generation_config=None, **kwargs) -> str:
+    material = json.dumps(
+        {"model": model_name, "prompt": prompt, "config": _config_dict(generation_config), "extra": kwargs},
+        sort_keys=True,
+        default=repr,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GenerationStore:
+    """SQLite file holding generated texts, bounded by total size (LRU) and age (TTL)."""
+
+    def __init__(self, path: str, max_bytes: int, ttl: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self):
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=30)
+                    try:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(SCHEMA)
+                    finally:
+                        conn.close()
+                    self._ready = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT text, prompt_tokens, output_tokens, created_at FROM generations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[3] > self.ttl:
+                    conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE generations SET last_access = ? WHERE key = ?", (now, key))
+            return CachedResponse(text=row[0], prompt_tokens=row[1], output_tokens=row[2], cached=True)
+        finally:
+            conn.close()
+
+    def put(self, key: str, agent: str, model_name: str, response: CachedResponse):
+        now = time.time()
+        size = len(response.text.encode("utf-8"))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO generations "
+                    "(key, agent, model, text, prompt_tokens, output_tokens, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, agent, model_name, response.text, response.prompt_tokens, response.output_tokens, size, now, now),
+                )
+                conn.execute("DELETE FROM generations WHERE created_at < ?", (now - self.ttl,))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total - int(self.max_bytes * EVICT_TO))
+        finally:
+            conn.close()
+
+    def _evict(self, conn, bytes_to_free: int):
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM generations ORDER BY last_access"):
+            if freed >= bytes_to_free:
+                break
+            doomed.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM generations WHERE key = ?", doomed)
+
+    def record(self, agent: str, hit: bool, response: Optional[CachedResponse] = None):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO agent_stats (agent) VALUES (?)", (agent,))
+                if hit:
+                    conn.execute(
+                        "UPDATE agent_stats SET hits = hits + 1, saved_prompt_tokens = saved_prompt_tokens + ?, "
+                        "saved_output_tokens = saved_output_tokens + ? WHERE agent = ?",
+                        (response.prompt_tokens, response.output_tokens, agent),
+                    )
+                else:
+                    conn.execute("UPDATE agent_stats SET misses = misses + 1 WHERE agent = ?", (agent,))
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT agent, hits, misses, saved_prompt_tokens, saved_output_tokens FROM agent_stats ORDER BY agent"
+            ).fetchall()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generations").fetchone()
+        finally:
+            conn.close()
+
+        result = []
+        for agent, hits, misses, saved_prompt, saved_output in rows:
+            lookups = hits + misses
+            result.append({
+                "agent": agent,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "saved_prompt_tokens": saved_prompt,
+                "saved_output_tokens": saved_output,
+            })
+        return {"agents": result, "entries": entries, "size_bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM generations")
+                conn.execute("DELETE FROM agent_stats")
+        finally:
+            conn.close()
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.error = None
+
+
+_store = None
+_store_lock = threading.Lock()
+_inflight: Dict[str, _InFlight] = {}
+_inflight_lock = threading.Lock()
+
+
+def get_store() -> GenerationStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = GenerationStore(
+                path=str(settings.GENERATION_CACHE_PATH),
+                max_bytes=settings.GENERATION_CACHE_MAX_BYTES,
+                ttl=settings.GENERATION_CACHE_TTL,
+            )
+        return _store
+
+
+def is_enabled(agent: str) -> bool:
+    return settings.GENERATION_CACHE_ENABLED and agent not in settings.GENERATION_CACHE_DISABLED_AGENTS
+
+
+class CachedGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel(...).generate_content(...) that reuses earlier
+    generations of the same model, prompt and config. Identical prompts running at the
+    same time in this process share one upstream call.
+    """
+
+    def __init__(self, model_name: str, agent: str):
+        self.model_name = model_name
+        self.agent = agent
+        self._model = genai.GenerativeModel(model_name)
+
+    def _generate(self, prompt, **kwargs) -> CachedResponse:
+        response = self._model.generate_content(prompt, **kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        return CachedResponse(
+            text=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            output_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
+    def generate_content(self, prompt, **kwargs):
+        if not is_enabled(self.agent):
+            return self._model.generate_content(prompt, **kwargs)
+
+        store = get_store()
+        key = generation_key(self.model_name, prompt, **kwargs)
+        cached = store.get(key)
+        if cached is not None:
+            store.record(self.agent, hit=True, response=cached)
+            return cached
+
+        with _inflight_lock:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _inflight[key] = _InFlight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            store.record(self.agent, hit=True, response=flight.response)
+            return dataclasses.replace(flight.response, cached=True)
+
+        try:
+            response = self._generate(prompt, **kwargs)
+            store.record(self.agent, hit=False)
+            if response.text and response.text.strip():
+                store.put(key, self.agent, self.model_name, response)
+            flight.response = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            flight.event.set()
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+from api.cache import get_cache
+
+MAX_WORKERS = 8
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+DEFAULT_DEADLINE = 12
+
+VALID_TTL = 6 * 60 * 60
+INVALID_TTL = 30 * 60
+# A host that could not be reached by HEAD nor GET is skipped entirely for a short while
+UNREACHABLE_HOST_TTL = 10 * 60
+
+USER_AGENT = "Mozilla/5.0 (compatible; LMSReferenceChecker/1.0)"
+
+link_cache = get_cache("linkcheck", ttl=VALID_TTL)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def cached_verdict(url) -> Optional[bool]:
+    if link_cache.get("host", _host(url)) is False:
+        return False
+    return link_cache.get("url", url)
+
+
+def check_link(url) -> bool:
+    """
+    HEAD first, then a streamed GET for servers that reject, drop or stall HEAD requests.
+    The verdict is cached per URL. When the GET cannot connect or times out as well, the host is
+    cached as unreachable for a short while; an error status marks only the page.
+    """
+    session = get_session()
+    timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    try:
+        valid = session.head(url, timeout=timeout, allow_redirects=True).status_code < 400
+    except RequestException:
+        valid = False
+    if not valid:
+        try:
+            with session.get(url, timeout=timeout, allow_redirects=True, stream=True) as response:
+                valid = response.status_code < 400
+        except (ConnectionError, Timeout):
+            link_cache.set("host", _host(url), value=False, ttl=UNREACHABLE_HOST_TTL)
+            valid = False
+        except RequestException:
+            valid = False
+
+    link_cache.set("url", url, value=valid, ttl=VALID_TTL if valid else INVALID_TTL)
+    return valid
+
+
+def validate_links(urls: Iterable[str], needed: Optional[int] = None, deadline: float = DEFAULT_DEADLINE) -> List[str]:
+    """
+    Return the reachable URLs in their original order.
+    Stops early once `needed` valid links are known; URLs still unchecked at the deadline are dropped.
+    """
+    urls = list(dict.fromkeys(urls))
+    verdicts = {}
+    to_check = []
+    for url in urls:
+        verdict = cached_verdict(url)
+        if verdict is None:
+            to_check.append(url)
+        else:
+            verdicts[url] = verdict
+
+    def enough():
+        return needed is not None and sum(1 for valid in verdicts.values() if valid) >= needed
+
+    if to_check and not enough():
+        stop_at = time.monotonic() + deadline
+        executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(to_check)), thread_name_prefix="link-check")
+        futures = {executor.submit(check_link, url): url for url in to_check}
+        try:
+            pending = set(futures)
+            while pending and not enough():
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    verdicts[futures[future]] = future.result()
+        finally:
+            # Don't block on stragglers; they finish in the background and still fill the cache
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    valid = [url for url in urls if verdicts.get(url)]
+    return valid[:needed] if needed is not None else valid
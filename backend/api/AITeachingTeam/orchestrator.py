@@ -0,0 +1,120 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.db import close_old_connections, connection
+
+
+@dataclass
+class Stage:
+    """One node of the pipeline. ``func`` receives the values of its dependencies keyed by stage name."""
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any = None
+    error: Optional[str] = None
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+    @property
+    def duration(self) -> float:
+        return round(self.finished_at - self.started_at, 3)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "status": "skipped" if self.skipped else ("done" if self.error is None else "failed"),
+            "duration": self.duration,
+            "error": self.error,
+        }
+
+
+@dataclass
+class AgentPipeline:
+    """Runs stages as soon as their dependencies finish, so total time follows the critical path."""
+
+    stages: List[Stage]
+    max_workers: int = 4
+    results: Dict[str, StageResult] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __post_init__(self):
+        names = {stage.name for stage in self.stages}
+        for stage in self.stages:
+            missing = set(stage.depends_on) - names
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(sorted(missing))}")
+
+    def _execute(self, stage: Stage, inputs: Dict[str, Any]) -> StageResult:
+        result = StageResult(name=stage.name, started_at=time.monotonic())
+        close_old_connections()
+        try:
+            result.value = stage.func(inputs)
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.finished_at = time.monotonic()
+            # Worker threads get their own DB connection; release it instead of leaking one per stage
+            connection.close()
+        return result
+
+    def run(self) -> Iterator[StageResult]:
+        """Yield each StageResult as it completes. Dependents of a failed stage are skipped."""
+        pending = {stage.name: stage for stage in self.stages}
+        running = {}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-stage") as executor:
+            while pending or running:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    if any(dep not in self.results for dep in stage.depends_on):
+                        continue
+                    del pending[name]
+                    progressed = True
+
+                    failed = [dep for dep in stage.depends_on if not self.results[dep].ok]
+                    if failed:
+                        now = time.monotonic()
+                        result = StageResult(
+                            name=name,
+                            error=f"Skipped because '{failed[0]}' did not complete",
+                            started_at=now,
+                            finished_at=now,
+                            skipped=True,
+                        )
+                        self.results[name] = result
+                        yield result
+                        continue
+
+                    inputs = {dep: self.results[dep].value for dep in stage.depends_on}
+                    running[executor.submit(self._execute, stage, inputs)] = name
+
+                if not running:
+                    if not progressed:
+                        raise ValueError(f"Dependency cycle between stages: {', '.join(sorted(pending))}")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    result = future.result()
+                    self.results[result.name] = result
+                    yield result
+
+        self.elapsed = round(time.monotonic() - started, 3)
+
+    def timings(self) -> Dict[str, float]:
+        return {name: result.duration for name, result in self.results.items()}
@@ -1,34 +1,38 @@
 from googleapiclient.discovery import build
 import mistune
 import re
-import requests
 import datetime
 from serpapi import GoogleSearch
 from django.conf import settings
-from django.core.cache import cache
-from requests.exceptions import RequestException
+from api.cache import cached, get_cache
+from api.AITeachingTeam.link_validator import check_link, validate_links
 
 SERVICE_ACCOUNT_FILE = settings.CREDENTIALS_FILE
 SCOPES = ["https://www.googleapis.com/auth/documents", "https://www.googleapis.com/auth/drive"]
 SERPAPI_KEY = settings.SERPAPI_KEY
 
+serpapi_cache = get_cache("serpapi", ttl=3600)
+
+# Section fallbacks the generators write when a Gemini call fails; such output must not be reused
+INCOMPLETE_OUTPUT_MARKERS = ("## Error\n", "Content is being updated...")
+
+
+def is_complete_output(content):
+    return bool(content and content.strip()) and not any(marker in content for marker in INCOMPLETE_OUTPUT_MARKERS)
+
+
+# Generated agent content is shared by every user and worker asking for the same topic and options
+cache_agent_output = cached("agent_output", ttl=settings.AGENT_OUTPUT_CACHE_TTL, accept=is_complete_output)
+
 def is_valid_link(url):
-    try:
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        return response.status_code in [200, 301, 302]
-    except RequestException:
-        try:
-            response = requests.get(url, timeout=5, allow_redirects=True)
-            return response.status_code in [200, 301, 302]
-        except RequestException:
-            return False
+    return check_link(url)
 
 def search_serpapi_links(topic, is_update=False, max_results=10):
     if not hasattr(settings, 'SERPAPI_KEY') or not settings.SERPAPI_KEY:
         raise ValueError("Missing SERPAPI_KEY in settings.")
 
-    cache_key = f"serpapi_{topic}_{is_update}_{max_results}"
-    cached_results = cache.get(cache_key)
+    cache_key = (topic.strip().lower(), is_update, max_results)
+    cached_results = serpapi_cache.get(*cache_key)
     if cached_results and len(cached_results) >= 2:
         return cached_results
 
@@ -51,17 +55,18 @@ def search_serpapi_links(topic, is_update=False, max_results=10):
         search = GoogleSearch(params)
         results = search.get_dict().get("organic_results", [])
 
-        valid_links = [
-            (r["title"], r["link"])
+        candidates = {
+            r["link"]: r["title"]
             for r in results
-            if r.get("title") and r.get("link", "").startswith("http") and is_valid_link(r["link"])
-        ]
+            if r.get("title") and r.get("link", "").startswith("http")
+        }
+        valid_links = [(candidates[url], url) for url in validate_links(candidates, needed=max_results)]
 
         if len(valid_links) < 2:
             raise ValueError(f"Only {len(valid_links)} valid references found for topic '{topic}'. Minimum 2 required.")
 
         final_links = valid_links[:max_results]
-        cache.set(cache_key, final_links, timeout=3600)
+        serpapi_cache.set(*cache_key, value=final_links)
         return final_links
 
     except Exception as e:
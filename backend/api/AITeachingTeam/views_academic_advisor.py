@@ -1,13 +1,14 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from userauths.models import User
 from google.oauth2 import service_account
 import google.generativeai as genai
+from api.AITeachingTeam.generation_cache import CachedGenerativeModel
 from api import models as api_models
+from api.AITeachingTeam.agent_jobs import AgentJobAPIView
 from django.conf import settings
-from api.AITeachingTeam.utils import create_google_doc, update_google_doc, extract_text_from_google_doc
+from api.AITeachingTeam.utils import create_google_doc, update_google_doc, extract_text_from_google_doc, cache_agent_output
 import re
 
 SERVICE_ACCOUNT_FILE = settings.CREDENTIALS_FILE
@@ -55,7 +56,7 @@ def parse_study_duration(study_duration):
 
 
 def analyze_professor_content(professor_content):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="advisor")
     
     prompt = f"""
     Analyze this professor content and extract the following information in JSON format:
@@ -99,8 +100,9 @@ def analyze_professor_content(professor_content):
     }
 
 
+@cache_agent_output
 def generate_advisor_content(topic, study_duration, language="en"):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="advisor")
     lang_note = "Please write the entire content in Vietnamese, using clear, formal academic language suitable for university-level learners." if language == "vi" else "Please write the entire content in English, using clear, formal academic language suitable for university-level learners."
     
     duration_info = parse_study_duration(study_duration)
@@ -157,8 +159,9 @@ For lower intensity (longer duration), include:
     return model.generate_content(prompt).text.strip()
 
 
+@cache_agent_output
 def generate_advisor_from_professor(topic, professor_content, study_duration, language="en"):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="advisor")
     lang_note = "Please write the entire content in Vietnamese, using clear, formal academic language suitable for university-level learners." if language == "vi" else "Please write the entire content in English, using clear, formal academic language suitable for university-level learners."
     
     content_analysis = analyze_professor_content(professor_content)
@@ -284,7 +287,7 @@ def calculate_phases(total_weeks):
 
 
 def generate_advisor_update(content_summary, study_duration, language="en"):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="advisor")
     lang_note = "Please write the entire content in Vietnamese, using clear, formal academic language suitable for university-level learners." if language == "vi" else "Please write the entire content in English, using clear, formal academic language suitable for university-level learners."
     
     duration_info = parse_study_duration(study_duration)
@@ -332,21 +335,25 @@ Current Roadmap Summary:
     return model.generate_content(prompt).text.strip()
 
 
-class AcademicAdvisorAgentAPIView(APIView):
+class AcademicAdvisorAgentAPIView(AgentJobAPIView):
+    job_kind = "advisor"
     permission_classes = [AllowAny]
+    required_fields = ("topic", "user_id", "study_duration")
+    missing_fields_error = "Missing topic, user_id, or study_duration"
 
-    def post(self, request):
+    def generate(self, data):
         try:
-            topic = request.data.get("topic")
-            user_id = request.data.get("user_id")
-            language = request.data.get("language", "en")
-            study_duration = request.data.get("study_duration", "").strip()
+            topic = data.get("topic")
+            user_id = data.get("user_id")
+            language = data.get("language", "en")
+            study_duration = data.get("study_duration", "").strip()
 
-            professor_input = request.data.get("professor_content")
-            advisor_input = request.data.get("advisor_content")
+            professor_input = data.get("professor_content")
+            advisor_input = data.get("advisor_content")
 
-            if not topic or not user_id or not study_duration:
-                return Response({"error": "Missing topic, user_id, or study_duration"}, status=400)
+            error = self.validate(data)
+            if error:
+                return Response({"error": error}, status=400)
 
             user = User.objects.get(id=user_id)
             creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
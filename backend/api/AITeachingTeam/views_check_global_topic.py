@@ -9,12 +9,21 @@ import google.generativeai as genai
 from difflib import get_close_matches
 from django.conf import settings
 from api.models import UserDocument, ApprovedTopic, Category
+from api.cache import get_cache
 
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+approved_topic_cache = get_cache("approved_topic", ttl=24 * 3600)
+
 def normalize_topic(topic: str) -> str:
     return ' '.join(topic.strip().split()).lower()
 
+def get_approved_topic(normalized: str):
+    return approved_topic_cache.get_or_set(
+        normalized,
+        factory=lambda: ApprovedTopic.objects.filter(normalized_topic=normalized).first(),
+    )
+
 def get_user_existing_topics(user_id: int) -> list:
     return list(UserDocument.objects.filter(user_id=user_id).values_list('topic', flat=True).distinct())
 
@@ -324,7 +333,7 @@ class CheckGlobalTopicAPIView(APIView):
                            else f"This topic already exists for AI types: {', '.join(ai_types)}."
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        approved = ApprovedTopic.objects.filter(normalized_topic=normalized).first()
+        approved = get_approved_topic(normalized)
         if approved:
             existing_topics = get_user_existing_topics(user_id)
             suggestions_result = generate_topic_suggestions(approved.field_en, existing_topics, language)
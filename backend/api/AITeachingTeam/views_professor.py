@@ -1,17 +1,19 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from userauths.models import User
 from google.oauth2 import service_account
 import google.generativeai as genai
+from api.AITeachingTeam.generation_cache import CachedGenerativeModel
 from api import models as api_models
+from api.AITeachingTeam.agent_jobs import AgentJobAPIView
 from django.conf import settings
 from api.AITeachingTeam.utils import (
     search_serpapi_links,
     create_google_doc,
     extract_text_from_google_doc,
     update_google_doc,
+    cache_agent_output,
 )
 import time
 import json
@@ -29,6 +31,7 @@ def get_enhanced_references(topic: str, max_results: int = 12, is_recent: bool =
     valid_references = [(title, url) for title, url in raw_references if title and url]
     return valid_references[:max_results]
 
+@cache_agent_output
 def generate_professor_content(topic: str, language: str = "en") -> str:
     # Lấy danh sách tham chiếu
     primary_refs = get_enhanced_references(topic, max_results=8, is_recent=False)
@@ -147,7 +150,7 @@ Explain **6-8 core concepts**, each including:
 **Note: All references will be properly formatted and listed at the end of the document.**
 """
 
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="professor")
     
     try:
         response = model.generate_content(
@@ -174,7 +177,7 @@ def language_instruction(language: str) -> str:
     return "Vietnamese" if language == "vi" else "English"
 
 def generate_content_in_chunks(topic: str, references: List[Tuple[str, str]], language: str) -> str:
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="professor")
     
     sections = [
         "Introduction and Overview",
@@ -306,7 +309,7 @@ You are a leading expert on **"{topic}"**. Your task is to create a **FOCUSED UP
 {references_text}
 """
 
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="professor")
     
     try:
         response = model.generate_content(
@@ -330,7 +333,7 @@ You are a leading expert on **"{topic}"**. Your task is to create a **FOCUSED UP
         return generate_simple_update(topic, previous_summary, valid_references, language)
 
 def generate_simple_update(topic: str, previous_summary: str, references: List[Tuple[str, str]], language: str) -> str:
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="professor")
     
     simple_prompt = f"""
     Create a focused update for topic "{topic}" based on:
@@ -411,22 +414,23 @@ This topic is being researched and detailed content is being developed.
 Reference sources will be added in the next update.
 """
 
-class ProfessorAgentAPIView(APIView):
+class ProfessorAgentAPIView(AgentJobAPIView):
+    job_kind = "professor"
     permission_classes = [AllowAny]
-
-    def post(self, request):
-        topic = request.data.get("topic")
-        user_id = request.data.get("user_id")
-        doc_url = request.data.get("doc_url", None)
-        language = request.data.get("language", "en")
+    required_fields = ("topic", "user_id")
+    missing_fields_error = "Missing 'topic' or 'user_id'"
+
+    def generate(self, data):
+        topic = data.get("topic")
+        user_id = data.get("user_id")
+        doc_url = data.get("doc_url", None)
+        language = data.get("language", "en")
         
-        use_enhanced_generation = request.data.get("use_enhanced_generation", True)
+        use_enhanced_generation = data.get("use_enhanced_generation", True)
 
-        if not topic or not user_id:
-            return Response(
-                {"error": "Missing 'topic' or 'user_id'"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        error = self.validate(data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             user = User.objects.get(id=user_id)
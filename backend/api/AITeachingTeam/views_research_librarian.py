@@ -1,4 +1,3 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
@@ -6,9 +5,11 @@ from django.db.models import Q
 from userauths.models import User
 from google.oauth2 import service_account
 import google.generativeai as genai
+from api.AITeachingTeam.generation_cache import CachedGenerativeModel
 from api import models as api_models
+from api.AITeachingTeam.agent_jobs import AgentJobAPIView
 from django.conf import settings
-from api.AITeachingTeam.utils import search_serpapi_links, create_google_doc, extract_text_from_google_doc
+from api.AITeachingTeam.utils import search_serpapi_links, create_google_doc, extract_text_from_google_doc, cache_agent_output
 
 SERVICE_ACCOUNT_FILE = settings.CREDENTIALS_FILE
 SCOPES = ["https://www.googleapis.com/auth/documents", "https://www.googleapis.com/auth/drive"]
@@ -16,9 +17,10 @@ GEMINI_API_KEY = settings.GEMINI_API_KEY
 SERPAPI_KEY = settings.SERPAPI_KEY
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+@cache_agent_output
 def generate_librarian_content(topic, language="en", has_internal_courses=False):
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+        model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="librarian")
         lang_note = (
             "Please write the entire content in Vietnamese, using clear, formal academic language suitable for university-level learners."
             if language == "vi"
@@ -124,9 +126,10 @@ Organize resources into the following categories, with **4-6 entries per categor
     except Exception as e:
         raise
 
+@cache_agent_output
 def generate_librarian_from_professor(topic, professor_content, language="en", has_internal_courses=False):
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+        model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="librarian")
         lang_note = (
             "Please write the entire content in Vietnamese, using clear, formal academic language suitable for university-level learners."
             if language == "vi"
@@ -312,19 +315,30 @@ def _format_external_courses(courses_data, topic):
         )
     return markdown
 
-class ResearchLibrarianAgentAPIView(APIView):
+class ResearchLibrarianAgentAPIView(AgentJobAPIView):
+    job_kind = "librarian"
     permission_classes = [AllowAny]
 
-    def post(self, request):
-        topic = request.data.get("topic")
-        user_id = request.data.get("user_id")
-        professor_input = request.data.get("professor_content")
-        language = request.data.get("language", "en")
-
-        if not user_id:
-            return Response({"error": "Missing 'user_id'"}, status=status.HTTP_400_BAD_REQUEST)
-        if language not in ["en", "vi"]:
-            return Response({"error": "Invalid language. Use 'en' or 'vi'"}, status=status.HTTP_400_BAD_REQUEST)
+    def validate(self, data):
+        error = super().validate(data)
+        if error:
+            return error
+        if data.get("language", "en") not in ["en", "vi"]:
+            return "Invalid language. Use 'en' or 'vi'"
+        # A professor_content that turns out unreadable is only found out while generating
+        if not data.get("topic") and not data.get("professor_content"):
+            return "Topic is required when professor_content is empty or invalid"
+        return None
+
+    def generate(self, data):
+        topic = data.get("topic")
+        user_id = data.get("user_id")
+        professor_input = data.get("professor_content")
+        language = data.get("language", "en")
+
+        error = self.validate(data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             try:
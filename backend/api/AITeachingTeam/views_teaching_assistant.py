@@ -1,12 +1,13 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from userauths.models import User
 import google.generativeai as genai
+from api.AITeachingTeam.generation_cache import CachedGenerativeModel
 from api import models as api_models
+from api.AITeachingTeam.agent_jobs import AgentJobAPIView
 from django.conf import settings
-from api.AITeachingTeam.utils import search_serpapi_links, create_google_doc, extract_text_from_google_doc
+from api.AITeachingTeam.utils import search_serpapi_links, create_google_doc, extract_text_from_google_doc, cache_agent_output
 from google.oauth2 import service_account
 import time
 
@@ -19,7 +20,7 @@ genai.configure(api_key=GEMINI_API_KEY)
 
 
 def generate_content_in_chunks(topic, language="en"):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="assistant")
     references = search_serpapi_links(topic, is_update=False, max_results=10)
     references_text = "\n".join([f"- [{title}]({url})" for title, url in (references or []) if title and url]) or "No external references provided."
     
@@ -378,7 +379,7 @@ Create COMPREHENSIVE solutions for ALL exercises, quizzes, projects, and scenari
 
 
 def generate_content_in_chunks_from_professor(topic, professor_content, language="en"):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-05-20")
+    model = CachedGenerativeModel("gemini-2.5-flash-preview-05-20", agent="assistant")
     references = search_serpapi_links(topic, is_update=False, max_results=10)
     references_text = "\n".join([f"- [{title}]({url})" for title, url in (references or []) if title and url]) or "No external references provided."
     
@@ -743,32 +744,35 @@ Create COMPREHENSIVE solutions for ALL exercises, quizzes, projects, and scenari
     return "\n".join(chunks)
 
 
+@cache_agent_output
 def generate_assistant_content(topic, language="en"):
     return generate_content_in_chunks(topic, language)
 
 
+@cache_agent_output
 def generate_assistant_from_professor(topic, professor_content, language="en"):
     return generate_content_in_chunks_from_professor(topic, professor_content, language)
 
 
-class TeachingAssistantAgentAPIView(APIView):
+class TeachingAssistantAgentAPIView(AgentJobAPIView):
+    job_kind = "assistant"
     permission_classes = [AllowAny]
+    required_fields = ("topic", "user_id")
+    missing_fields_error = "Missing required fields: topic or user_id"
 
-    def post(self, request):
+    def generate(self, data):
         try:
             if not all([hasattr(settings, attr) for attr in ['CREDENTIALS_FILE', 'GEMINI_API_KEY', 'SERPAPI_KEY']]):
                 return Response({"error": "Missing API configuration"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            topic = request.data.get("topic")
-            user_id = request.data.get("user_id")
-            professor_input = request.data.get("professor_content", "")
-            language = request.data.get("language", "en")
+            topic = data.get("topic")
+            user_id = data.get("user_id")
+            professor_input = data.get("professor_content", "")
+            language = data.get("language", "en")
 
-            if not topic or not user_id:
-                return Response(
-                    {"error": "Missing required fields: topic or user_id"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            error = self.validate(data)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
             user = User.objects.get(id=user_id)
             creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
@@ -1,5 +1,6 @@
 import os
 import uuid
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from dataclasses import dataclass
@@ -15,6 +16,8 @@ genai.configure(api_key=settings.GEMINI_API_KEY)
 # Vietnam timezone
 VIETNAM_TZ = pytz.timezone('Asia/Ho_Chi_Minh')
 
+MEMORY_RETENTION_DAYS = 30
+
 @dataclass
 class ChatResponse:
     message: str
@@ -25,9 +28,9 @@ class CustomerSupportAIAgent:
     def __init__(self):
         self.collection_name = "customer_support_memory"
         self.model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-        self.qdrant_client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+        # One client per process keeps its HTTP connection pool warm between requests
+        self.qdrant_client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=10)
         self._ensure_collection_exists()
-        self._cleanup_old_memories()
 
         self.agent_system_message = """
 /no_think
@@ -163,9 +166,13 @@ You must NEVER:
             print(f"Error generating embedding: {e}")
             return None
 
-    def _cleanup_old_memories(self):
+    def cleanup_old_memories(self, days: int = MEMORY_RETENTION_DAYS) -> bool:
+        """
+        Delete memories older than `days`. Run from the `cleanup_chat_memories`
+        management command on a schedule, never from the request path.
+        """
         try:
-            cutoff_time = self._get_vietnam_time() - timedelta(days=30)
+            cutoff_time = self._get_vietnam_time() - timedelta(days=days)
             cutoff_timestamp = cutoff_time.timestamp()
             self.qdrant_client.delete(
                 collection_name=self.collection_name,
@@ -174,8 +181,10 @@ You must NEVER:
                 )
             )
             print(f"Cleaned up memories older than {cutoff_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            return True
         except Exception as e:
             print(f"Error cleaning up old memories: {e}")
+            return False
 
     def get_course_suggestions(self, query: str, limit: int = 2) -> List[Dict]:
         """
@@ -577,4 +586,23 @@ Please respond naturally and helpfully. Detect the language of the user's query
                 "timestamp": self._get_vietnam_time().strftime("%Y-%m-%d %H:%M:%S"),
                 "error": str(e),
                 "success": False
-            }
\ No newline at end of file
+            }
+
+
+_support_agent = None
+_support_agent_lock = threading.Lock()
+
+
+def get_support_agent() -> CustomerSupportAIAgent:
+    """
+    Return the process-wide CustomerSupportAIAgent, building it on first use.
+
+    The Gemini model, Qdrant client and collection check are set up once per
+    worker instead of on every chat request.
+    """
+    global _support_agent
+    if _support_agent is None:
+        with _support_agent_lock:
+            if _support_agent is None:
+                _support_agent = CustomerSupportAIAgent()
+    return _support_agent
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from api import signals  # noqa: F401
+        from api.AITeachingTeam import agent_jobs  # noqa: F401
+        from api import uploads  # noqa: F401
+        from api import outbox  # noqa: F401
+        from api import jobs
+        request_started.connect(jobs.start_local_workers, dispatch_uid="api.start_local_workers")
@@ -0,0 +1,176 @@
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class TieredCache:
+    """
+    A small in-process LRU (L1) in front of the shared Django cache (L2).
+
+    L1 entries live for at most `l1_ttl` seconds so a value deleted by another worker
+    is not served from this process for long. Keys are namespaced and hashed so any
+    tuple of arguments can be used as a key.
+    """
+
+    def __init__(self, namespace: str, ttl: int = 3600, l1_size: int = 256, l1_ttl: int = 60, alias: str = "default", version: int = 1):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self.alias = alias
+        self.version = version
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def make_key(self, *parts) -> str:
+        digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:40]
+        return f"{self.namespace}:v{self.version}:{digest}"
+
+    def _l1_get(self, key):
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._l1[key]
+                return _MISSING
+            self._l1.move_to_end(key)
+            return value
+
+    def _l1_set(self, key, value, ttl):
+        with self._lock:
+            self._l1[key] = (time.monotonic() + min(ttl, self.l1_ttl), value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def get(self, *parts, default=None):
+        key = self.make_key(*parts)
+        value = self._l1_get(key)
+        if value is not _MISSING:
+            self.l1_hits += 1
+            return value
+
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self.l2_hits += 1
+            self._l1_set(key, value, self.ttl)
+            return value
+
+        self.misses += 1
+        return default
+
+    def set(self, *parts, value, ttl: Optional[int] = None):
+        key = self.make_key(*parts)
+        ttl = self.ttl if ttl is None else ttl
+        self.backend.set(key, value, ttl)
+        self._l1_set(key, value, ttl)
+
+    def delete(self, *parts):
+        key = self.make_key(*parts)
+        with self._lock:
+            self._l1.pop(key, None)
+        self.backend.delete(key)
+
+    def get_or_set(self, *parts, factory: Callable[[], Any], ttl: Optional[int] = None, accept: Optional[Callable[[Any], bool]] = None):
+        """
+        Return the cached value or compute it once per process, even when several threads ask at the same time.
+        The computed value is stored only if it is not None and passes `accept`.
+        """
+        value = self.get(*parts, default=_MISSING)
+        if value is not _MISSING:
+            return value
+
+        key = self.make_key(*parts)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                value = self._l1_get(key)
+                if value is not _MISSING:
+                    return value
+                value = factory()
+                if value is not None and (accept is None or accept(value)):
+                    self.set(*parts, value=value, ttl=ttl)
+                return value
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.l1_hits + self.l2_hits) / lookups, 3) if lookups else 0.0,
+            "l1_entries": len(self._l1),
+        }
+
+
+_registry: Dict[str, TieredCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(namespace: str, **options) -> TieredCache:
+    """
+    The process-wide TieredCache of `namespace`, created with `options` on first use.
+    Asking again with different options is a mistake: the first caller's would silently win.
+    """
+    with _registry_lock:
+        if namespace not in _registry:
+            _registry[namespace] = TieredCache(namespace, **options)
+            return _registry[namespace]
+
+        tiered = _registry[namespace]
+        conflicts = {name: value for name, value in options.items() if getattr(tiered, name) != value}
+        if conflicts:
+            raise ValueError(f"Cache {namespace!r} already exists with other options than {conflicts}")
+        return tiered
+
+
+def cache_stats():
+    return [tiered.stats() for tiered in _registry.values()]
+
+
+def cached(namespace: str, ttl: int = 3600, key: Optional[Callable[..., tuple]] = None, accept: Optional[Callable[[Any], bool]] = None):
+    """
+    Memoize a function's return value in a TieredCache namespace.
+    None results, results rejected by `accept` and exceptions are never cached.
+    """
+    def decorator(func):
+        tiered = get_cache(namespace, ttl=ttl)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key:
+                parts = key(*args, **kwargs)
+            else:
+                # Positional and keyword spellings of the same call share one entry
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                parts = tuple(bound.arguments.items())
+            return tiered.get_or_set(func.__module__, func.__qualname__, parts, factory=lambda: func(*args, **kwargs), accept=accept)
+
+        wrapper.cache = tiered
+        return wrapper
+    return decorator
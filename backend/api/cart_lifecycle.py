@@ -0,0 +1,149 @@
+"""
+Cart lifecycle: carts are keyed by a client-generated cart_id and nobody deletes them, so
+carts the shopper walked away from are purged by `manage.py purge_carts` (schedule it, e.g.
+daily cron).
+
+Every row of a cart carries `last_touched`, bumped whenever the shopper adds to the cart. A cart
+is abandoned when none of its rows was touched since the cutoff. Purging deletes whole carts,
+`batch_size` carts per transaction, so writers are never locked out for long; the purged rows
+can be archived to gzip-compressed JSONL first. Each run is recorded as a CartPurgeRun.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal("0.01")
+ARCHIVE_FIELDS = ["id", "cart_id", "course_id", "user_id", "price", "tax_fee", "total", "country", "date", "last_touched"]
+
+
+def touch(cart_id, now=None):
+    """Mark every row of the cart as used now; rows touched already are not rewritten."""
+    now = now or timezone.now()
+    api_models.Cart.objects.filter(cart_id=cart_id, last_touched__lt=now).update(last_touched=now)
+
+
+def cutoff_for(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def abandoned(cutoff, guests_only=False):
+    """Rows of carts with no row touched since `cutoff` (and, with guests_only, no signed-in owner)."""
+    keep = Q(last_touched__gte=cutoff)
+    if guests_only:
+        keep |= Q(user__isnull=False)
+    kept_carts = api_models.Cart.objects.filter(keep).values("cart_id")
+    return api_models.Cart.objects.filter(last_touched__lt=cutoff).exclude(cart_id__in=kept_carts)
+
+
+def _volume(rows):
+    volume = rows.aggregate(carts=Count("cart_id", distinct=True), rows=Count("id"), total=Sum("total"))
+    volume["total"] = (volume["total"] or Decimal("0.00")).quantize(CENT)
+    return volume
+
+
+class Archive:
+    """Append-only gzip JSONL file, created on the first write and flushed after every batch."""
+
+    def __init__(self, directory, started_at):
+        self.path = os.path.join(directory, f"carts-{started_at:%Y%m%dT%H%M%S}.jsonl.gz")
+        self._file = None
+
+    def write(self, rows):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        for row in rows:
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        # Sync-flush so the archived rows are on disk before their batch is deleted
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def purge(days=None, batch_size=None, archive=False, archive_dir=None, guests_only=False, dry_run=False, pause=0.0):
+    """
+    Delete abandoned carts older than `days`, `batch_size` carts per transaction, sleeping
+    `pause` seconds between batches. Returns the CartPurgeRun describing what was removed.
+    """
+    days = settings.CART_RETENTION_DAYS if days is None else days
+    batch_size = max(batch_size or settings.CART_PURGE_BATCH_SIZE, 1)
+    run = api_models.CartPurgeRun.objects.create(cutoff=cutoff_for(days), dry_run=dry_run, total=Decimal("0.00"))
+
+    if dry_run:
+        volume = _volume(abandoned(run.cutoff, guests_only))
+        run.carts, run.rows, run.total = volume["carts"], volume["rows"], volume["total"]
+        run.finished_at = timezone.now()
+        run.save()
+        return run
+
+    writer = Archive(archive_dir or settings.CART_ARCHIVE_DIR, run.started_at) if archive else None
+    try:
+        while True:
+            cart_ids = list(
+                abandoned(run.cutoff, guests_only).order_by().values_list("cart_id", flat=True).distinct()[:batch_size]
+            )
+            if not cart_ids:
+                break
+            with transaction.atomic():
+                # Re-checked inside the transaction: a cart touched since the select above is kept
+                rows = list(abandoned(run.cutoff, guests_only).filter(cart_id__in=cart_ids).values(*ARCHIVE_FIELDS))
+                if writer and rows:
+                    writer.write(rows)
+                api_models.Cart.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+            run.batches += 1
+            run.carts += len({row["cart_id"] for row in rows})
+            run.rows += len(rows)
+            run.total += sum((row["total"] for row in rows), Decimal("0.00"))
+            if pause:
+                time.sleep(pause)
+    except Exception as e:
+        logger.exception("Cart purge stopped after %s batch(es)", run.batches)
+        run.error = str(e)
+        raise
+    finally:
+        if writer:
+            writer.close()
+            run.archive_path = writer.path if run.rows else None
+        run.finished_at = timezone.now()
+        run.save()
+    return run
+
+
+def stats(days=None):
+    """Current cart volume split at the retention cutoff, and totals of the purges so far."""
+    days = settings.CART_RETENTION_DAYS if days is None else days
+    cutoff = cutoff_for(days)
+    current = _volume(api_models.Cart.objects.all())
+    stale = _volume(abandoned(cutoff))
+    runs = api_models.CartPurgeRun.objects.filter(dry_run=False)
+    purged = runs.aggregate(runs=Count("id"), carts=Sum("carts"), rows=Sum("rows"), total=Sum("total"))
+    return {
+        "retention_days": days,
+        "carts": current["carts"],
+        "rows": current["rows"],
+        "abandoned_carts": stale["carts"],
+        "abandoned_rows": stale["rows"],
+        "purged": {
+            "runs": purged["runs"],
+            "carts": purged["carts"] or 0,
+            "rows": purged["rows"] or 0,
+            "total": (purged["total"] or Decimal("0.00")).quantize(CENT),
+        },
+        "last_run": runs.values("started_at", "finished_at", "carts", "rows", "batches", "archive_path", "error").first(),
+    }
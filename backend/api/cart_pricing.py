@@ -0,0 +1,94 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api import cart_lifecycle
+from api import models as api_models
+from api.cache import get_cache
+
+CENT = Decimal("0.01")
+# Country used when the client's country is unknown; such carts are not taxed
+DEFAULT_COUNTRY = "United States"
+
+# Country rows are few and rarely edited: the whole name -> rate map is cached and dropped
+# by the Country signals, other processes pick the change up when their L1 entry expires
+tax_cache = get_cache("tax_rates", ttl=60 * 60)
+
+
+class CartError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _load_tax_rates():
+    return dict(api_models.Country.objects.values_list("name", "tax_rate"))
+
+
+def tax_rates():
+    return tax_cache.get_or_set("rates", factory=_load_tax_rates)
+
+
+def invalidate_tax_rates():
+    tax_cache.delete("rates")
+
+
+def price_line(price, country_name):
+    """(country, price, tax_fee, total) of a cart row, in Decimal cents."""
+    rates = tax_rates()
+    country = country_name if country_name in rates else DEFAULT_COUNTRY
+    rate = rates.get(country_name, 0)
+    price = Decimal(price or 0).quantize(CENT)
+    tax_fee = (price * rate / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+    return country, price, tax_fee, price + tax_fee
+
+
+def add_item(cart_id, course_id, country_name, user_id=None):
+    """
+    Put a course in the cart, or refresh its row. The price is the course's current price, never
+    the client's. Upserts on the unique (cart_id, course) pair; returns (row values, created).
+    """
+    price = api_models.Course.objects.filter(pk=course_id).values_list("price", flat=True).first()
+    if price is None:
+        raise CartError("Course Not Found", status=404)
+
+    country, price, tax_fee, total = price_line(price, country_name)
+    now = timezone.now()
+    values = {
+        "user_id": user_id, "price": price, "tax_fee": tax_fee, "total": total, "country": country, "last_touched": now,
+    }
+    rows = api_models.Cart.objects.filter(cart_id=cart_id, course_id=course_id)
+    created = False
+    if not rows.update(**values):
+        try:
+            with transaction.atomic():
+                api_models.Cart.objects.create(cart_id=cart_id, course_id=course_id, **values)
+            created = True
+        except IntegrityError:
+            # The same course was added from another tab at the same moment
+            rows.update(**values)
+    # The whole cart stays alive, not only the row just added
+    cart_lifecycle.touch(cart_id, now)
+    return values, created
+
+
+def items(cart_id):
+    return api_models.Cart.objects.filter(cart_id=cart_id).select_related("course").order_by("id")
+
+
+def totals(cart_id):
+    """Price, tax and total of a cart in one aggregate query, as Decimal."""
+    money = DecimalField(max_digits=12, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+    result = api_models.Cart.objects.filter(cart_id=cart_id).aggregate(
+        price=Coalesce(Sum("price"), zero, output_field=money),
+        tax=Coalesce(Sum("tax_fee"), zero, output_field=money),
+        total=Coalesce(Sum("total"), zero, output_field=money),
+        items=Count("id"),
+    )
+    for key in ("price", "tax", "total"):
+        result[key] = Decimal(result[key]).quantize(CENT)
+    return result
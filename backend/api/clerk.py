@@ -0,0 +1,166 @@
+"""
+Verification of Clerk session tokens against Clerk's JWKS, without a network round-trip per login.
+
+Parsed RSA public keys are kept in memory by `kid`; the raw JWKS document is shared with the other
+workers through the default cache. The document is kept for the Cache-Control max-age Clerk sends,
+refreshed in the background shortly before it expires, and refetched at most once every
+UNKNOWN_KID_REFETCH seconds when a token is signed with a key we have not seen (key rotation).
+If Clerk cannot be reached, the keys we already have keep being used.
+"""
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from jwt.algorithms import RSAAlgorithm
+
+logger = logging.getLogger(__name__)
+
+JWKS_URL = f"https://{settings.CLERK_FRONTEND_API}/.well-known/jwks.json"
+ISSUER = f"https://{settings.CLERK_FRONTEND_API}"
+
+DEFAULT_TTL = 60 * 60
+MIN_TTL = 5 * 60
+MAX_TTL = 24 * 60 * 60
+# Refresh in the background once this share of the lifetime is left
+REFRESH_MARGIN = 0.2
+UNKNOWN_KID_REFETCH = 30
+FETCH_TIMEOUT = (2, 5)
+
+
+def _max_age(cache_control):
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    if not match:
+        return DEFAULT_TTL
+    return min(max(int(match.group(1)), MIN_TTL), MAX_TTL)
+
+
+class KeyStore:
+    def __init__(self, url, cache_key="clerk:jwks", cache_alias="default"):
+        self.url = url
+        self.cache_key = cache_key
+        self.cache_alias = cache_alias
+        self._keys = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._ttl = DEFAULT_TTL
+        self._last_refetch = float("-inf")
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._session = requests.Session()
+
+    def _load(self, document):
+        keys = {}
+        for jwk in document["keys"]:
+            if jwk.get("kty") == "RSA" and jwk.get("kid"):
+                keys[jwk["kid"]] = RSAAlgorithm.from_jwk(jwk)
+        self._keys = keys
+        self._fetched_at = document["fetched_at"]
+        self._expires_at = document["expires_at"]
+        self._ttl = document["expires_at"] - document["fetched_at"]
+
+    def _from_shared_cache(self):
+        """Take the document another worker fetched, if it is newer than ours."""
+        try:
+            document = caches[self.cache_alias].get(self.cache_key)
+        except Exception:
+            logger.warning("Could not read the JWKS from the cache", exc_info=True)
+            return False
+        if not document or document["fetched_at"] <= self._fetched_at:
+            return False
+        self._load(document)
+        return True
+
+    def _fetch(self):
+        response = self._session.get(self.url, timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+        now = time.time()
+        ttl = _max_age(response.headers.get("Cache-Control"))
+        document = {"keys": response.json()["keys"], "fetched_at": now, "expires_at": now + ttl}
+        self._load(document)
+        try:
+            # Kept in the shared cache past its expiry so a worker can still start during an outage
+            caches[self.cache_alias].set(self.cache_key, document, MAX_TTL)
+        except Exception:
+            logger.warning("Could not store the JWKS in the cache", exc_info=True)
+
+    def _refresh(self, force=False):
+        """Bring the keys up to date; on failure keep the ones we have. Call with the lock held."""
+        if not force and time.time() < self._expires_at:
+            return
+        if self._from_shared_cache() and not force and time.time() < self._expires_at:
+            return
+        try:
+            self._fetch()
+        except (requests.RequestException, ValueError, KeyError) as e:
+            if not self._keys:
+                raise jwt.InvalidTokenError(f"Could not fetch the signing keys: {e}")
+            self._retry_at = time.time() + UNKNOWN_KID_REFETCH
+            logger.warning("JWKS refresh failed, keeping the cached keys: %s", e)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._lock:
+                    self._refresh(force=True)
+            except jwt.InvalidTokenError:
+                logger.warning("Background JWKS refresh failed", exc_info=True)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
+
+    def get_key(self, kid):
+        now = time.time()
+        if now < self._retry_at:
+            # Clerk failed us a moment ago; the cached keys are used until the next attempt
+            pass
+        elif now >= self._expires_at:
+            with self._lock:
+                self._refresh()
+        elif self._expires_at - now < self._ttl * REFRESH_MARGIN:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # Unknown kid: Clerk may have rotated its keys. Look again, but not more than once per interval
+        # so tokens with made-up kids cannot turn every request into a fetch.
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._last_refetch >= UNKNOWN_KID_REFETCH:
+                self._last_refetch = time.monotonic()
+                if not self._from_shared_cache() or kid not in self._keys:
+                    self._refresh(force=True)
+                key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Public key not found.")
+        return key
+
+
+key_store = KeyStore(JWKS_URL)
+
+
+def verify_token(token):
+    """Decode a Clerk session token; raises jwt.InvalidTokenError (or a subclass) when it is not valid."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not kid:
+        raise jwt.InvalidTokenError("Token has no key id.")
+    return jwt.decode(
+        token,
+        key_store.get_key(kid),
+        algorithms=["RS256"],
+        audience=None,
+        issuer=ISSUER,
+    )
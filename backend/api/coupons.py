@@ -0,0 +1,113 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from api import models as api_models
+
+CENT = Decimal("0.01")
+
+
+class CouponError(Exception):
+    def __init__(self, message, status=400, icon="error"):
+        super().__init__(message)
+        self.status = status
+        self.icon = icon
+
+
+def check_redeemable(coupon, today=None):
+    """Raise CouponError saying why the coupon cannot be applied today: inactive, not started, ended or used up."""
+    today = today or timezone.localdate()
+    if not coupon.active:
+        raise CouponError("Coupon Is Not Active", icon="warning")
+    if coupon.date > today:
+        raise CouponError("Coupon Is Not Valid Yet", icon="warning")
+    if coupon.end_date is not None and coupon.end_date < today:
+        raise CouponError("Coupon Has Expired", icon="warning")
+    if coupon.max_uses is not None and coupon.used_count >= coupon.max_uses:
+        raise CouponError("Coupon Usage Limit Reached", icon="warning")
+
+
+def _discount(amount, percent):
+    return (amount * percent / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def apply(order_oid, code):
+    """
+    Apply a coupon to every item of the order sold by the coupon's teacher.
+
+    Runs in one transaction with a fixed number of statements: the order row is locked, the
+    coupon is read with a single query on its unique code and validated, and the items and the
+    order totals are adjusted with one UPDATE each. No use is counted here: an order that is never
+    paid would hold it forever, so uses are counted by order_paid(). Returns (coupon, discounted
+    items, discount).
+    """
+    with transaction.atomic():
+        order = api_models.CartOrder.objects.select_for_update().filter(oid=order_oid).first()
+        if order is None:
+            raise CouponError("Order Not Found", status=404)
+        if order.payment_status != "Processing":
+            raise CouponError("Order Already Paid", icon="warning")
+
+        coupon = api_models.Coupon.objects.filter(code=code).first()
+        if coupon is None:
+            raise CouponError("Coupon Not Found", status=404)
+        check_redeemable(coupon)
+        if order.coupons.filter(pk=coupon.pk).exists():
+            raise CouponError("Coupon Already Applied", status=200, icon="warning")
+
+        items = list(
+            api_models.CartOrderItem.objects.filter(order=order, teacher_id=coupon.teacher_id)
+            .exclude(coupons=coupon)
+            .values_list("pk", "total")
+        )
+        if not items:
+            raise CouponError("Coupon Not Valid For This Order", icon="warning")
+
+        money = DecimalField(max_digits=12, decimal_places=2)
+        discounts = {pk: _discount(total, coupon.discount) for pk, total in items}
+        discount = Case(*[When(pk=pk, then=Value(amount)) for pk, amount in discounts.items()], output_field=money)
+        api_models.CartOrderItem.objects.filter(pk__in=discounts).update(
+            total=F("total") - discount,
+            price=F("price") - discount,
+            saved=F("saved") + discount,
+            applied_coupon=True,
+        )
+        total_discount = sum(discounts.values(), Decimal("0.00"))
+        api_models.CartOrder.objects.filter(pk=order.pk).update(
+            total=F("total") - total_discount,
+            sub_total=F("sub_total") - total_discount,
+            saved=F("saved") + total_discount,
+        )
+
+        api_models.CartOrderItem.coupons.through.objects.bulk_create(
+            [api_models.CartOrderItem.coupons.through(cartorderitem_id=pk, coupon_id=coupon.pk) for pk in discounts],
+            ignore_conflicts=True,
+        )
+        order.coupons.add(coupon)
+    return coupon, len(discounts), total_discount
+
+
+def order_paid(order):
+    """
+    Count one use of every coupon on a just-paid order, in one UPDATE; call it inside the
+    fulfillment transaction. The payment is already taken, so a coupon whose last use went to
+    another order meanwhile is counted past max_uses rather than refused.
+    """
+    coupon_ids = list(order.coupons.values_list("pk", flat=True))
+    if not coupon_ids:
+        return
+    api_models.Coupon.objects.filter(pk__in=coupon_ids).update(used_count=F("used_count") + 1)
+    if order.student_id:
+        api_models.Coupon.used_by.through.objects.bulk_create(
+            [api_models.Coupon.used_by.through(coupon_id=pk, user_id=order.student_id) for pk in coupon_ids],
+            ignore_conflicts=True,
+        )
+
+
+def order_refunded(order):
+    """Give back the uses order_paid() counted for a refunded order."""
+    api_models.Coupon.objects.filter(pk__in=order.coupons.values("pk"), used_count__gt=0).update(
+        used_count=F("used_count") - 1
+    )
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from api import models as api_models
+
+STARS = [star for star, _ in api_models.RATING]
+
+
+def counted(review):
+    """The (course_id, rating) a review contributes to its course's aggregates, or None."""
+    if review is None or not review.active:
+        return None
+    try:
+        # A freshly created instance still holds the raw request value, e.g. "4"
+        rating = int(review.rating)
+    except (TypeError, ValueError):
+        return None
+    return (review.course_id, rating) if rating in STARS else None
+
+
+def reconcile(course_id):
+    """Recompute a course's aggregates from its active reviews (first write, repairs)."""
+    totals = api_models.Review.objects.filter(course_id=course_id, active=True, rating__in=STARS).aggregate(
+        count=Count("id"),
+        total=Sum("rating"),
+        **{f"stars_{star}": Count("id", filter=Q(rating=star)) for star in STARS},
+    )
+    totals["total"] = totals["total"] or 0
+    if not totals["count"]:
+        api_models.CourseRating.objects.filter(course_id=course_id).delete()
+        return None
+    rating, _ = api_models.CourseRating.objects.update_or_create(course_id=course_id, defaults=totals)
+    return rating
+
+
+def _adjust(course_id, star, sign):
+    updated = api_models.CourseRating.objects.filter(course_id=course_id).update(
+        count=F("count") + sign,
+        total=F("total") + sign * star,
+        updated_at=timezone.now(),
+        **{f"stars_{star}": F(f"stars_{star}") + sign},
+    )
+    if not updated and api_models.Course.objects.filter(pk=course_id).exists():
+        # Called after the review row changed, so rebuilding already includes this change
+        reconcile(course_id)
+
+
+def review_changed(before, after):
+    """
+    Move a review's contribution from `before` to `after`, both as returned by counted().
+    Runs in the caller's transaction so the review and its course aggregates commit together.
+    """
+    if before == after:
+        return
+    with transaction.atomic():
+        if before is not None:
+            _adjust(before[0], before[1], -1)
+        if after is not None:
+            _adjust(after[0], after[1], 1)
@@ -0,0 +1,143 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from api import models as api_models
+from api.cache import get_cache
+
+SALES_TTL = 15 * 60
+
+WINDOWS = {
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+}
+
+# Revenue is counted from orders that were paid, including the ones refunded later, so that
+# `refunded` can be subtracted to get the net figure
+SOLD_STATUSES = ("Paid", "Refunded")
+
+sales_cache = get_cache("course_sales", ttl=SALES_TTL)
+
+
+class InvalidWindow(ValueError):
+    pass
+
+
+def _parse_day(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidWindow(f"{name} must be a date formatted as YYYY-MM-DD")
+
+
+def resolve_window(window=None, start=None, end=None):
+    """
+    Turn the query params into an inclusive (start, end) pair of dates, None meaning unbounded.
+    `window` is one of 7d, 30d, 90d, ytd or all; explicit start/end dates take precedence.
+    """
+    if start or end:
+        start_day = _parse_day(start, "start") if start else None
+        end_day = _parse_day(end, "end") if end else None
+        if start_day and end_day and start_day > end_day:
+            raise InvalidWindow("start must be on or before end")
+        return start_day, end_day
+
+    today = timezone.localdate()
+    if not window or window == "all":
+        return None, None
+    if window == "ytd":
+        return today.replace(month=1, day=1), today
+    if window in WINDOWS:
+        return today - timedelta(days=WINDOWS[window] - 1), today
+    raise InvalidWindow(f"window must be one of {', '.join([*WINDOWS, 'ytd', 'all'])}")
+
+
+def _window_filter(start_day, end_day):
+    condition = Q(order_item__order__payment_status__in=SOLD_STATUSES)
+    if start_day:
+        condition &= Q(order_item__date__gte=timezone.make_aware(datetime.combine(start_day, time.min)))
+    if end_day:
+        condition &= Q(order_item__date__lt=timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min)))
+    return condition
+
+
+def course_sales_queryset(teacher_id, start_day=None, end_day=None):
+    """All of a teacher's courses with their sales in the window, grouped in one query."""
+    sold = _window_filter(start_day, end_day)
+    refunded = sold & Q(order_item__order__payment_status="Refunded")
+    money = DecimalField(max_digits=12, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+
+    return (
+        api_models.Course.objects.filter(teacher_id=teacher_id)
+        .annotate(
+            revenue=Coalesce(Sum("order_item__price", filter=sold), zero, output_field=money),
+            refunded=Coalesce(Sum("order_item__price", filter=refunded), zero, output_field=money),
+            sales=Count("order_item", filter=sold),
+            refunds=Count("order_item", filter=refunded),
+            average_rating=ExpressionWrapper(
+                F("rating_stats__total") * 1.0 / NullIf("rating_stats__count", 0), output_field=FloatField()
+            ),
+        )
+        .annotate(net_revenue=F("revenue") - F("refunded"))
+        .values(
+            "id", "course_id", "title", "image",
+            "revenue", "refunded", "net_revenue", "sales", "refunds", "average_rating",
+        )
+        .order_by("-net_revenue", "-sales", "id")
+    )
+
+
+def _generation(teacher_id):
+    return sales_cache.backend.get(sales_cache.make_key("generation", teacher_id), 0)
+
+
+def invalidate(teacher_ids):
+    """Drop every cached report of these teachers by moving them to a new cache generation."""
+    for teacher_id in set(teacher_ids):
+        if not teacher_id:
+            continue
+        key = sales_cache.make_key("generation", teacher_id)
+        # incr is atomic on Redis (REDIS_URL). The file and local-memory backends implement it as a
+        # get and a set, so two invalidations at the same moment can produce a single bump there and a
+        # report built between them can outlive the second change until SALES_TTL expires
+        try:
+            sales_cache.backend.incr(key)
+        except ValueError:
+            # No generation yet; if another process just created one, bump that instead
+            if not sales_cache.backend.add(key, 1, None):
+                sales_cache.backend.incr(key)
+
+
+def _serialize(row):
+    return {
+        "course_id": row["course_id"],
+        "course_title": row["title"],
+        "course_image": default_storage.url(row["image"]) if row["image"] else None,
+        "revenue": row["revenue"],
+        "refunded": row["refunded"],
+        "net_revenue": row["net_revenue"],
+        "sales": row["sales"],
+        "refunds": row["refunds"],
+        "average_rating": round(row["average_rating"], 2) if row["average_rating"] is not None else None,
+    }
+
+
+def course_sales(teacher_id, start_day=None, end_day=None, top=None):
+    """Sales report rows, best sellers first, cached per teacher until their next paid order."""
+    # The generation is read from the shared cache on every call so a bump made by another
+    # process is seen at once instead of after the in-process L1 expires
+    parts = ("report", teacher_id, _generation(teacher_id), start_day, end_day, top)
+
+    def build():
+        rows = course_sales_queryset(teacher_id, start_day, end_day)
+        if top:
+            rows = rows[:top]
+        return [_serialize(row) for row in rows]
+
+    return sales_cache.get_or_set(*parts, factory=build)
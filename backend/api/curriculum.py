@@ -0,0 +1,140 @@
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from api import media
+from api import media_cache
+from api import models as api_models
+from api import progress
+
+ITEM_FIELDS = ["title", "description", "file", "preview", "duration", "content_duration"]
+
+
+def variants_from_request(request):
+    """The `variants` list of a multipart course form, where it is sent as a JSON string."""
+    raw_variants = request.data.get("variants") if request else None
+    if not raw_variants:
+        return []
+    if not isinstance(raw_variants, str):
+        return raw_variants
+    try:
+        return json.loads(raw_variants)
+    except json.JSONDecodeError:
+        raise serializers.ValidationError({"variants": "Invalid JSON format."})
+
+
+def _set_duration(item, durations):
+    seconds = durations.get(item.file)
+    if seconds:
+        item.duration, item.content_duration = media.duration_fields(seconds)
+    else:
+        item.duration, item.content_duration = None, None
+
+
+def probe_media(variants_data, course=None):
+    """
+    Fill the media metadata cache for the files of a course form before it is saved.
+
+    Probing is remote HTTP reads that can take up to MEDIA_PROBE_TIMEOUT, so it must run outside
+    the transaction that saves the course: on SQLite an open write transaction locks out every
+    other writer. Covers the files sent in the form and, for an existing course, the lessons
+    still missing a duration.
+    """
+    urls = [
+        item_data.get("file")
+        for variant_data in variants_data
+        for item_data in variant_data.get("items") or []
+    ]
+    if course is not None and course.pk:
+        urls += api_models.VariantItem.objects.filter(
+            variant__course=course, duration__isnull=True
+        ).exclude(file__isnull=True).exclude(file="").values_list("file", flat=True)
+    media_cache.lookup(urls)
+
+
+def save(course, variants_data):
+    """
+    Create or update the variants and items of a course from the course form.
+
+    Variants and items with an id are updated, the others created; the ones left out are kept.
+    Lesson durations are read from the media metadata cache, which probe_media() fills before
+    the transaction opens, and an item whose file did not change keeps its duration. Rows are
+    written with bulk_create / bulk_update, a few queries per save whatever the size of the course.
+    """
+    with transaction.atomic():
+        variants = {variant.variant_id: variant for variant in course.variants.all()}
+        items = {
+            item.variant_item_id: item
+            for item in api_models.VariantItem.objects.filter(variant__course=course)
+        }
+
+        new_variants, changed_variants, plan = [], [], []
+        for variant_data in variants_data:
+            variant_id = variant_data.get("variant_id")
+            if variant_id:
+                variant = variants.get(str(variant_id))
+                if variant is None:
+                    raise serializers.ValidationError({"variant_id": f"Variant {variant_id} not found"})
+                if "title" in variant_data and variant_data["title"] != variant.title:
+                    variant.title = variant_data["title"]
+                    changed_variants.append(variant)
+            else:
+                variant = api_models.Variant(course=course, title=variant_data.get("title"))
+                new_variants.append(variant)
+            plan.append((variant, variant_data.get("items") or []))
+
+        api_models.Variant.objects.bulk_create(new_variants)
+        api_models.Variant.objects.bulk_update(changed_variants, ["title"])
+        if any(variant.pk is None for variant in new_variants):
+            # Backends that do not return ids from a bulk insert
+            ids = dict(
+                api_models.Variant.objects.filter(variant_id__in=[v.variant_id for v in new_variants])
+                .values_list("variant_id", "id")
+            )
+            for variant in new_variants:
+                variant.pk = ids[variant.variant_id]
+
+        new_items, changed_items, to_probe = [], [], []
+        for variant, items_data in plan:
+            for item_data in items_data:
+                item_id = item_data.get("variant_item_id")
+                file_url = item_data.get("file") or None
+                if item_id:
+                    item = items.get(str(item_id))
+                    if item is None or item.variant_id != variant.pk:
+                        raise serializers.ValidationError({"variant_item_id": f"Item {item_id} not found"})
+                    before = [getattr(item, field) for field in ITEM_FIELDS]
+                    item.title = item_data.get("title", item.title)
+                    item.description = item_data.get("description", item.description)
+                    item.preview = item_data.get("preview", item.preview)
+                    file_changed = file_url is not None and file_url != item.file
+                    item.file = file_url or item.file
+                    if item.file and (file_changed or not item.duration):
+                        to_probe.append(item)
+                    changed_items.append((item, before))
+                else:
+                    item = api_models.VariantItem(
+                        variant=variant,
+                        title=item_data.get("title"),
+                        description=item_data.get("description"),
+                        file=file_url,
+                        preview=item_data.get("preview", False),
+                    )
+                    if item.file:
+                        to_probe.append(item)
+                    new_items.append(item)
+
+        durations = media_cache.durations((item.file for item in to_probe), probe=False)
+        for item in to_probe:
+            _set_duration(item, durations)
+
+        api_models.VariantItem.objects.bulk_create(new_items)
+        api_models.VariantItem.objects.bulk_update(
+            [item for item, before in changed_items if before != [getattr(item, f) for f in ITEM_FIELDS]],
+            ITEM_FIELDS,
+        )
+        if new_items:
+            # bulk_create does not send post_save, which keeps the enrollment lesson totals
+            progress.curriculum_changed(course.id)
+    return course
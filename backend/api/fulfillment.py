@@ -0,0 +1,127 @@
+"""
+Order fulfillment after a confirmed payment, and refunds.
+
+The order row is locked and moved from Processing to Paid exactly once; whichever callback
+(PayPal return, VNPay return, a retry of either) gets the lock first does the work and the
+others see the order already paid. Notifications and enrollments are bulk-inserted, so the
+number of statements does not grow with the number of items.
+"""
+from django.db import transaction
+
+from api import coupons
+from api import models as api_models
+from api import outbox
+from api import progress
+from api import revenue
+from api import teacher_stats
+from api.cache import get_cache
+
+RESULT_TTL = 24 * 60 * 60
+
+results_cache = get_cache("order_fulfillment", ttl=RESULT_TTL)
+
+
+class OrderNotFound(Exception):
+    pass
+
+
+def cached_result(order_oid):
+    """The outcome of an earlier fulfillment of this order, if any, without touching the database."""
+    return results_cache.get(order_oid)
+
+
+def _result(order, enrolled):
+    return {"order_oid": order.oid, "payment_status": order.payment_status, "enrolled": enrolled}
+
+
+def fulfill(order_oid, **payment_fields):
+    """
+    Mark the order Paid and enroll the student in its courses; `payment_fields` are extra
+    CartOrder fields recorded with the payment (e.g. vnp_TransactionNo).
+    Returns (result, fulfilled_now); fulfilled_now is False when the order was not Processing.
+    """
+    with transaction.atomic():
+        order = (
+            api_models.CartOrder.objects.select_for_update()
+            .select_related("student")
+            .filter(oid=order_oid)
+            .first()
+        )
+        if order is None:
+            raise OrderNotFound(order_oid)
+        if order.payment_status != "Processing":
+            return _result(order, 0), False
+
+        order.payment_status = "Paid"
+        for field, value in payment_fields.items():
+            setattr(order, field, value)
+        order.save(update_fields=["payment_status", *payment_fields])
+
+        order_items = list(api_models.CartOrderItem.objects.filter(order=order).select_related("course"))
+        student_id = order.student_id
+
+        notifications = [api_models.Notification(user_id=student_id, order=order, type="Course Enrollment Completed")]
+        notifications += [
+            api_models.Notification(teacher_id=item.teacher_id, order=order, order_item=item, type="New Order")
+            for item in order_items
+        ]
+        api_models.Notification.objects.bulk_create(notifications)
+
+        # Teachers this student already learns from; they already count the student
+        known_teachers = set()
+        enrolled_courses = set()
+        if student_id:
+            for teacher_id, course_id in api_models.EnrolledCourse.objects.filter(user_id=student_id).values_list(
+                "teacher_id", "course_id"
+            ):
+                known_teachers.add(teacher_id)
+                enrolled_courses.add(course_id)
+
+        enrollments = list({
+            item.course_id: api_models.EnrolledCourse(
+                course_id=item.course_id, user_id=student_id, teacher_id=item.teacher_id, order_item=item
+            )
+            for item in order_items
+            if item.course_id not in enrolled_courses
+        }.values())
+        progress.init_enrollments(enrollments)
+        # ignore_conflicts: unique (course, user) keeps a course bought twice to one enrollment
+        api_models.EnrolledCourse.objects.bulk_create(enrollments, ignore_conflicts=True)
+
+        # bulk_create sends no signals, so the counters the signals keep are updated here
+        new_student_teachers = {e.teacher_id for e in enrollments} - known_teachers if student_id else set()
+        teacher_stats.order_paid(order_items, new_student_teachers)
+        revenue.order_paid(order_items)
+        coupons.order_paid(order)
+        outbox.order_paid(order, order_items)
+
+        result = _result(order, len(enrollments))
+        transaction.on_commit(lambda: results_cache.set(order.oid, value=result))
+    return result, True
+
+
+def refund(order_oid):
+    """
+    Move a Paid order to Refunded and take its items out of the teachers' stats and revenue
+    rollup. Enrollments are kept; revoking access is a separate decision.
+    Returns (result, refunded_now); refunded_now is False when the order was not Paid.
+    """
+    with transaction.atomic():
+        order = api_models.CartOrder.objects.select_for_update().filter(oid=order_oid).first()
+        if order is None:
+            raise OrderNotFound(order_oid)
+        result = {"order_oid": order.oid, "payment_status": order.payment_status}
+        if order.payment_status != "Paid":
+            return result, False
+
+        order.payment_status = "Refunded"
+        # save() (not update) so the signals drop the teachers' cached sales reports
+        order.save(update_fields=["payment_status"])
+        order_items = list(api_models.CartOrderItem.objects.filter(order=order))
+        teacher_stats.order_refunded(order_items)
+        revenue.order_refunded(order_items)
+        coupons.order_refunded(order)
+
+        result["payment_status"] = order.payment_status
+        transaction.on_commit(lambda: results_cache.delete(order.oid))
+    return result, True
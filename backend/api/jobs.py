@@ -0,0 +1,304 @@
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 15 * 60
+# A Running job whose lock is older than this is assumed orphaned by a dead worker
+LOCK_TIMEOUT = 30 * 60
+# Running jobs refresh their lock this often, so a long job is never mistaken for an orphan
+HEARTBEAT_INTERVAL = LOCK_TIMEOUT / 6
+CLAIM_BATCH = 10
+
+_handlers: Dict[str, Callable] = {}
+
+
+class JobError(Exception):
+    """Raised by handlers; retry=False marks the failure as permanent (bad input, missing user...)."""
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+class LockLost(Exception):
+    """The job's lock went stale and another worker claimed it; this run must stop without writing."""
+
+
+def register(kind: str):
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def get_mode() -> str:
+    return getattr(settings, "JOBS_MODE", "worker")
+
+
+def enqueue(kind: str, payload: dict, user=None, idempotency_key: Optional[str] = None, max_attempts: int = 3):
+    """Create a job (or return the one already created for idempotency_key) and hand it to the configured runner."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    fields = {"kind": kind, "payload": payload, "user": user, "max_attempts": max_attempts}
+    if idempotency_key:
+        # Keys come from clients: a key only matches the same user's job of the same kind
+        lookup = {"user": user, "kind": kind, "idempotency_key": idempotency_key}
+        job, created = api_models.AgentJob.objects.filter(**lookup).first(), False
+        if job is None:
+            try:
+                with transaction.atomic():
+                    job, created = api_models.AgentJob.objects.create(**fields, idempotency_key=idempotency_key), True
+            except IntegrityError:
+                # A concurrent request with the same key created it first
+                job = api_models.AgentJob.objects.get(**lookup)
+    else:
+        job, created = api_models.AgentJob.objects.create(**fields), True
+
+    if created:
+        if get_mode() == "inline":
+            claimed = claim(job.pk, default_worker_id())
+            if claimed:
+                run_job(claimed)
+            job.refresh_from_db()
+        elif get_mode() == "thread":
+            transaction.on_commit(local_worker.wake)
+    return job, created
+
+
+def _lock(queryset, worker_id):
+    now = timezone.now()
+    return queryset.update(
+        status="Running",
+        locked_by=worker_id,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+        updated_at=now,
+    )
+
+
+def _claimable():
+    now = timezone.now()
+    stale = now - timedelta(seconds=LOCK_TIMEOUT)
+    return Q(status="Queued", run_after__lte=now) | Q(status="Running", locked_at__lt=stale)
+
+
+def claim(pk, worker_id):
+    # Compare-and-swap on status: only one worker's UPDATE can match the row
+    if _lock(api_models.AgentJob.objects.filter(_claimable(), pk=pk), worker_id):
+        return api_models.AgentJob.objects.get(pk=pk)
+    return None
+
+
+def claim_next(worker_id):
+    candidates = (
+        api_models.AgentJob.objects.filter(_claimable())
+        .order_by("run_after", "id")
+        .values_list("pk", flat=True)[:CLAIM_BATCH]
+    )
+    for pk in candidates:
+        job = claim(pk, worker_id)
+        if job:
+            return job
+    return None
+
+
+def _owned(job):
+    return api_models.AgentJob.objects.filter(pk=job.pk, status="Running", locked_by=job.locked_by)
+
+
+def heartbeat(job):
+    """Refresh the job's lock; raises LockLost when another worker has reclaimed it."""
+    now = timezone.now()
+    if not _owned(job).update(locked_at=now, updated_at=now):
+        raise LockLost(f"Job {job.job_id} was reclaimed by another worker")
+    job.locked_at = now
+
+
+def report_progress(job, stage: str, status: str, **info):
+    now = timezone.now()
+    job.progress[stage] = {"status": status, "updated_at": now.isoformat(), **info}
+    # Written only while this worker still owns the job; doubles as a heartbeat
+    if not _owned(job).update(progress=job.progress, locked_at=now, updated_at=now):
+        raise LockLost(f"Job {job.job_id} was reclaimed by another worker")
+    job.locked_at = now
+
+
+class _Heartbeat:
+    """Background thread calling heartbeat(job) every HEARTBEAT_INTERVAL while the handler runs."""
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval or HEARTBEAT_INTERVAL
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job.job_id}", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    heartbeat(self.job)
+                except LockLost:
+                    logger.warning("Job %s lost its lock while running", self.job.job_id)
+                    return
+                except Exception:
+                    logger.exception("Heartbeat of job %s failed", self.job.job_id)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def retry_delay(attempts: int) -> int:
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+def run_job(job):
+    handler = _handlers.get(job.kind)
+    owner_id = job.locked_by
+    try:
+        if handler is None:
+            raise JobError(f"No handler registered for '{job.kind}'", retry=False)
+        if job.attempts > job.max_attempts:
+            raise JobError("Maximum attempts exceeded", retry=False)
+        with _Heartbeat(job):
+            result = handler(job)
+    except LockLost:
+        logger.warning("Job %s (%s) was reclaimed by another worker; dropping this run", job.job_id, job.kind)
+        return job
+    except Exception as e:
+        logger.exception("Job %s (%s) failed on attempt %s", job.job_id, job.kind, job.attempts)
+        job.error = str(e)
+        job.locked_by = None
+        job.locked_at = None
+        if getattr(e, "retry", True) and job.attempts < job.max_attempts:
+            job.status = "Queued"
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = "Failed"
+    else:
+        job.status = "Succeeded"
+        job.result = result
+        job.error = None
+        job.locked_by = None
+        job.locked_at = None
+
+    # A worker that lost the job to a reclaim must not overwrite the new owner's state
+    fields = ["status", "result", "error", "run_after", "locked_by", "locked_at"]
+    owner = api_models.AgentJob.objects.filter(pk=job.pk, status="Running", locked_by=owner_id)
+    if not owner.update(**{field: getattr(job, field) for field in fields}, updated_at=timezone.now()):
+        logger.warning("Job %s (%s) was reclaimed by another worker; result discarded", job.job_id, job.kind)
+    return job
+
+
+def _run_in_thread(job):
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        connection.close()
+
+
+def work(worker_id=None, concurrency=1, once=False, poll_interval=2.0, wake_event=None, stop_event=None):
+    """
+    Claim and run jobs on a pool of `concurrency` threads.
+    With once=True, return as soon as the queue is drained instead of polling forever.
+    """
+    worker_id = worker_id or default_worker_id()
+    wake_event = wake_event or threading.Event()
+    stop_event = stop_event or threading.Event()
+    running = set()
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job-worker") as executor:
+        while not stop_event.is_set():
+            while len(running) < concurrency:
+                job = claim_next(worker_id)
+                if job is None:
+                    break
+                running.add(executor.submit(_run_in_thread, job))
+
+            if running:
+                done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                processed += len(done)
+                continue
+
+            if once:
+                break
+            wake_event.wait(poll_interval)
+            wake_event.clear()
+
+        if running:
+            wait(running)
+            processed += len(running)
+
+    return processed
+
+
+_local_workers = []
+
+
+class LocalWorker:
+    """In-process worker thread used when JOBS_MODE is "thread" (no separate run_jobs process)."""
+
+    thread_name = "local-job-worker"
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        _local_workers.append(self)
+
+    def _run(self):
+        close_old_connections()
+        work(
+            worker_id=f"{default_worker_id()}:local",
+            concurrency=getattr(settings, "JOBS_CONCURRENCY", 2),
+            wake_event=self._wake,
+        )
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+
+local_worker = LocalWorker()
+
+
+def start_local_workers(**kwargs):
+    """
+    request_started receiver: starts the in-process workers with the first request a process
+    serves, so work queued before a restart is drained without waiting for a new enqueue.
+    """
+    request_started.disconnect(dispatch_uid="api.start_local_workers")
+    if get_mode() == "thread":
+        for worker in _local_workers:
+            worker.wake()
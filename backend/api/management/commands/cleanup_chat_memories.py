@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ai_agent import MEMORY_RETENTION_DAYS, get_support_agent
+
+
+class Command(BaseCommand):
+    help = "Delete chatbot memories older than the retention window. Schedule it (e.g. daily cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=MEMORY_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        if not get_support_agent().cleanup_old_memories(days=options["days"]):
+            raise CommandError("Failed to clean up chat memories.")
+        self.stdout.write(self.style.SUCCESS(f"Removed chat memories older than {options['days']} days."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.AITeachingTeam.generation_cache import get_store
+
+
+class Command(BaseCommand):
+    help = "Show per-agent hit rate and saved tokens of the Gemini generation cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached generation and reset the counters.")
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if options["clear"]:
+            store.clear()
+            self.stdout.write(self.style.SUCCESS("Generation cache cleared."))
+            return
+
+        stats = store.stats()
+        self.stdout.write(f"{stats['entries']} entries, {stats['size_bytes']} / {stats['max_bytes']} bytes")
+        for row in stats["agents"]:
+            self.stdout.write(
+                f"{row['agent']:<12} hits={row['hits']:<6} misses={row['misses']:<6} hit_rate={row['hit_rate']:<6} "
+                f"saved_prompt_tokens={row['saved_prompt_tokens']} saved_output_tokens={row['saved_output_tokens']}"
+            )
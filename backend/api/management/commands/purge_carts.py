@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import cart_lifecycle
+
+
+class Command(BaseCommand):
+    help = "Delete carts nobody touched for --days, in batches, optionally archiving them. Schedule it (e.g. daily cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.CART_RETENTION_DAYS, help="Age of an abandoned cart.")
+        parser.add_argument("--batch-size", type=int, default=settings.CART_PURGE_BATCH_SIZE, help="Carts deleted per transaction.")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument("--archive", action="store_true", help="Write the purged rows to gzip JSONL in CART_ARCHIVE_DIR first.")
+        parser.add_argument("--archive-dir", default=None, help="Directory for the archive instead of CART_ARCHIVE_DIR.")
+        parser.add_argument("--guests-only", action="store_true", help="Keep carts that belong to a signed-in user.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be purged.")
+        parser.add_argument("--stats", action="store_true", help="Show cart volume and past purges, purge nothing.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            stats = cart_lifecycle.stats(days=options["days"])
+            purged = stats["purged"]
+            self.stdout.write(f"{stats['carts']} carts ({stats['rows']} rows)")
+            self.stdout.write(
+                f"{stats['abandoned_carts']} carts ({stats['abandoned_rows']} rows) untouched for {stats['retention_days']}+ days"
+            )
+            self.stdout.write(
+                f"Purged so far: {purged['carts']} carts, {purged['rows']} rows, {purged['total']} total in {purged['runs']} run(s)"
+            )
+            if stats["last_run"]:
+                last = stats["last_run"]
+                self.stdout.write(f"Last run: {last['started_at']:%Y-%m-%d %H:%M} - {last['carts']} carts in {last['batches']} batch(es)")
+            return
+
+        run = cart_lifecycle.purge(
+            days=options["days"],
+            batch_size=options["batch_size"],
+            archive=options["archive"],
+            archive_dir=options["archive_dir"],
+            guests_only=options["guests_only"],
+            dry_run=options["dry_run"],
+            pause=options["pause"],
+        )
+        if run.dry_run:
+            self.stdout.write(f"Would purge {run.carts} cart(s), {run.rows} row(s), {run.total} total.")
+            return
+        message = f"Purged {run.carts} cart(s), {run.rows} row(s), {run.total} total in {run.batches} batch(es)."
+        if run.archive_path:
+            message += f" Archived to {run.archive_path}."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads that received no chunk for --hours, and their .part files. Schedule it (e.g. hourly cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.UPLOAD_EXPIRE_HOURS, help="Age of an abandoned upload.")
+
+    def handle(self, *args, **options):
+        purged = uploads.purge_expired(hours=options["hours"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {purged['sessions']} upload(s) and {purged['files']} orphaned .part file(s).")
+        )
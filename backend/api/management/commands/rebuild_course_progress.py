@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api import models as api_models
+from api import progress
+
+
+class Command(BaseCommand):
+    help = "Recompute the completed / total lesson counters of enrollments from the lesson tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", help="Only rebuild enrollments of these course ids.")
+
+    def handle(self, *args, **options):
+        enrollments = api_models.EnrolledCourse.objects.all()
+        if options["course"]:
+            enrollments = enrollments.filter(course_id__in=options["course"])
+
+        count = progress.rebuild(enrollments)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {count} enrollment(s)."))
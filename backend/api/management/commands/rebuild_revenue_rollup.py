@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api import models as api_models
+from api import revenue
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-day revenue rollup of teachers from their paid order items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teacher", type=int, action="append", help="Only rebuild these teacher ids.")
+
+    def handle(self, *args, **options):
+        teachers = api_models.Teacher.objects.all()
+        if options["teacher"]:
+            teachers = teachers.filter(id__in=options["teacher"])
+
+        count = 0
+        for teacher_id in teachers.values_list("id", flat=True).iterator():
+            revenue.rebuild(teacher_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt revenue rollup for {count} teacher(s)."))
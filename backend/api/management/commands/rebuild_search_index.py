@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course full-text search index from the Course table."
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index()
+        backend = search.get_backend()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} courses with the {backend.name} backend."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api import course_ratings
+from api import models as api_models
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-course rating aggregates from active reviews and report the courses that had drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", help="Only reconcile these course ids.")
+
+    def handle(self, *args, **options):
+        courses = api_models.Course.objects.select_related("rating_stats")
+        if options["course"]:
+            courses = courses.filter(id__in=options["course"])
+
+        checked = fixed = 0
+        for course in courses.iterator(chunk_size=500):
+            before = course.rating_summary()
+            before = (before.count, before.total, before.histogram()) if before else None
+            after = course_ratings.reconcile(course.id)
+            after = (after.count, after.total, after.histogram()) if after else None
+            if before != after and not (before and before[0] == 0 and after is None):
+                fixed += 1
+                self.stdout.write(f"Course {course.id}: {before} -> {after}")
+            checked += 1
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {checked} course(s), {fixed} corrected."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (AI document generation). Use with JOBS_MODE=worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Number of jobs to run at the same time.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        processed = jobs.work(
+            concurrency=max(options["concurrency"], 1),
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
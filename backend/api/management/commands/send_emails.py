@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox in batches. Use with JOBS_MODE=worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE, help="Emails sent over one connection.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the outbox is drained.")
+
+    def handle(self, *args, **options):
+        sent, failed = outbox.work(
+            batch_size=max(options["batch_size"], 1),
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s), {failed} failed."))
@@ -0,0 +1,333 @@
+"""
+Duration and frame size of video files read from their container headers only.
+
+Nothing is decoded: MP4/MOV read the `mvhd` and `tkhd` boxes, Matroska/WebM the Segment Info
+and Tracks elements, AVI the `avih` main header. Boxes and elements that are not needed are
+skipped with seek(), so a moov atom at the end of a multi-GB file costs a few small reads.
+"""
+import datetime
+import math
+import os
+import struct
+
+VIDEO_EXTENSIONS = (".mp4", ".m4v", ".mov", ".mkv", ".webm", ".avi")
+
+# Upper bound on header elements walked before giving up on a file
+MAX_ELEMENTS = 10000
+# Longest EBML unsigned integer or float element; anything larger is corrupt, not read
+MAX_EBML_NUMBER = 8
+
+
+class MediaProbeError(Exception):
+    pass
+
+
+def is_video(name):
+    return os.path.splitext(name or "")[1].lower() in VIDEO_EXTENSIONS
+
+
+def _read(f, size):
+    data = f.read(size)
+    if len(data) < size:
+        raise MediaProbeError("Unexpected end of file")
+    return data
+
+
+def _file_size(f):
+    position = f.tell()
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(position)
+    return size
+
+
+# ISO base media (MP4, MOV, M4V)
+
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf"}
+
+
+def _mp4_boxes(f, start, end):
+    position = start
+    for _ in range(MAX_ELEMENTS):
+        if position + 8 > end:
+            return
+        f.seek(position)
+        size, kind = struct.unpack(">I4s", _read(f, 8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", _read(f, 8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            raise MediaProbeError("Corrupt MP4 box")
+        yield kind, position + header, position + size
+        position += size
+
+
+def _probe_mp4(f, end):
+    info = {"container": "mp4"}
+    pending = [(0, end)]
+    while pending:
+        start, stop = pending.pop(0)
+        for kind, body, box_end in _mp4_boxes(f, start, stop):
+            if kind in MP4_CONTAINERS:
+                pending.append((body, box_end))
+            elif kind == b"mvhd":
+                f.seek(body)
+                version = _read(f, 4)[0]
+                if version == 1:
+                    timescale, duration = struct.unpack(">16xIQ", _read(f, 28))
+                else:
+                    timescale, duration = struct.unpack(">8xII", _read(f, 16))
+                if timescale:
+                    info["duration"] = duration / timescale
+            elif kind == b"tkhd" and "width" not in info:
+                f.seek(body)
+                version = _read(f, 4)[0]
+                # Skip the times, track id and duration, then reserved, layer, group, volume and matrix
+                f.seek(body + 4 + (32 if version == 1 else 20) + 8 + 8 + 36)
+                width, height = struct.unpack(">II", _read(f, 8))
+                if width and height:
+                    info["width"], info["height"] = width >> 16, height >> 16
+    if "duration" not in info:
+        raise MediaProbeError("No movie header (mvhd) found")
+    return info
+
+
+# Matroska / WebM (EBML)
+
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_VIDEO = 0xE0
+EBML_PIXEL_WIDTH = 0xB0
+EBML_PIXEL_HEIGHT = 0xBA
+EBML_CLUSTER = 0x1F43B675
+
+
+def _vint(f, keep_marker):
+    first = _read(f, 1)[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise MediaProbeError("Corrupt EBML variable-size integer")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for byte in _read(f, length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return value, (all_ones and not keep_marker)
+
+
+def _ebml_elements(f, start, end):
+    position = start
+    for _ in range(MAX_ELEMENTS):
+        if position >= end:
+            return
+        f.seek(position)
+        element_id, _ = _vint(f, keep_marker=True)
+        size, unknown = _vint(f, keep_marker=False)
+        body = f.tell()
+        element_end = end if unknown else body + size
+        yield element_id, body, element_end
+        position = element_end
+
+
+def _ebml_number(f, start, end):
+    if not 0 <= end - start <= MAX_EBML_NUMBER:
+        raise MediaProbeError("Corrupt EBML number element")
+    f.seek(start)
+    return _read(f, end - start)
+
+
+def _ebml_uint(f, start, end):
+    return int.from_bytes(_ebml_number(f, start, end), "big")
+
+
+def _ebml_float(f, start, end):
+    raw = _ebml_number(f, start, end)
+    if len(raw) not in (4, 8):
+        raise MediaProbeError("Corrupt EBML float element")
+    return struct.unpack(">f" if len(raw) == 4 else ">d", raw)[0]
+
+
+def _probe_matroska(f, end):
+    info = {"container": "matroska"}
+    scale = 1000000
+    duration = None
+    for element_id, body, element_end in _ebml_elements(f, 0, end):
+        if element_id != EBML_SEGMENT:
+            continue
+        for child, child_body, child_end in _ebml_elements(f, body, element_end):
+            if child == EBML_INFO:
+                for field, field_body, field_end in _ebml_elements(f, child_body, child_end):
+                    if field == EBML_TIMECODE_SCALE:
+                        scale = _ebml_uint(f, field_body, field_end)
+                    elif field == EBML_DURATION:
+                        duration = _ebml_float(f, field_body, field_end)
+            elif child == EBML_TRACKS:
+                for entry, entry_body, entry_end in _ebml_elements(f, child_body, child_end):
+                    if entry != EBML_TRACK_ENTRY or "width" in info:
+                        continue
+                    for field, field_body, field_end in _ebml_elements(f, entry_body, entry_end):
+                        if field != EBML_VIDEO:
+                            continue
+                        for video, video_body, video_end in _ebml_elements(f, field_body, field_end):
+                            if video == EBML_PIXEL_WIDTH:
+                                info["width"] = _ebml_uint(f, video_body, video_end)
+                            elif video == EBML_PIXEL_HEIGHT:
+                                info["height"] = _ebml_uint(f, video_body, video_end)
+            elif child == EBML_CLUSTER:
+                # Media data starts here; the headers we need come before it
+                break
+        break
+    if duration is None:
+        raise MediaProbeError("No duration in the Matroska segment info")
+    info["duration"] = duration * scale / 1e9
+    return info
+
+
+# AVI (RIFF)
+
+def _probe_avi(f, end):
+    position = 12
+    for _ in range(MAX_ELEMENTS):
+        if position + 8 > end:
+            break
+        f.seek(position)
+        kind, size = struct.unpack("<4sI", _read(f, 8))
+        if kind == b"LIST":
+            list_type = _read(f, 4)
+            if list_type == b"hdrl":
+                # Descend into the header list
+                position += 12
+                continue
+        elif kind == b"avih":
+            usec_per_frame, _, _, _, total_frames, _, _, _, width, height = struct.unpack("<10I", _read(f, 40))
+            return {
+                "container": "avi",
+                "duration": total_frames * usec_per_frame / 1e6,
+                "width": width,
+                "height": height,
+            }
+        position += 8 + size + (size & 1)
+    raise MediaProbeError("No AVI main header (avih) found")
+
+
+def probe(f):
+    """
+    Read container metadata from a seekable binary file object.
+    Returns {"container", "duration" (seconds), "width", "height"}; raises MediaProbeError.
+    """
+    end = _file_size(f)
+    f.seek(0)
+    head = f.read(12)
+    if len(head) < 12:
+        raise MediaProbeError("File too small")
+    if head[4:8] in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"):
+        info = _probe_mp4(f, end)
+    elif head[:4] == b"\x1a\x45\xdf\xa3":
+        info = _probe_matroska(f, end)
+    elif head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        info = _probe_avi(f, end)
+    else:
+        raise MediaProbeError("Unsupported container")
+    if not math.isfinite(info["duration"]) or info["duration"] < 0:
+        raise MediaProbeError("Corrupt duration")
+    info["duration"] = round(info["duration"], 3)
+    return info
+
+
+def probe_path(path):
+    with open(path, "rb") as f:
+        return probe(f)
+
+
+def duration_fields(seconds):
+    """VariantItem.duration / content_duration values for a duration in seconds."""
+    total_seconds = int(seconds)
+    minutes, secs = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return datetime.timedelta(seconds=total_seconds), f"{hours:02}:{minutes:02}:{secs:02}"
+
+
+class HTTPRangeFile:
+    """
+    Read-only, seekable view of a remote file that fetches only the blocks probe() touches,
+    using HTTP Range requests. Servers that ignore Range are rejected rather than downloaded.
+    """
+
+    def __init__(self, url, session, block_size=64 * 1024, max_blocks=64, timeout=(3, 10)):
+        self.url = url
+        self.session = session
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.timeout = timeout
+        self.position = 0
+        self._blocks = {}
+        self.size = self._fetch_size()
+
+    def _fetch_size(self):
+        response = self.session.get(self.url, headers={"Range": "bytes=0-0"}, timeout=self.timeout, stream=True)
+        with response:
+            if response.status_code != 206:
+                raise MediaProbeError(f"Range requests not supported (HTTP {response.status_code})")
+            content_range = response.headers.get("Content-Range", "")
+        try:
+            return int(content_range.rsplit("/", 1)[1])
+        except (IndexError, ValueError):
+            raise MediaProbeError("Unknown remote file size")
+
+    def _block(self, index):
+        if index not in self._blocks:
+            start = index * self.block_size
+            end = min(start + self.block_size, self.size) - 1
+            response = self.session.get(self.url, headers={"Range": f"bytes={start}-{end}"}, timeout=self.timeout)
+            if response.status_code != 206:
+                raise MediaProbeError(f"Range request failed (HTTP {response.status_code})")
+            if len(self._blocks) >= self.max_blocks:
+                self._blocks.pop(next(iter(self._blocks)))
+            self._blocks[index] = response.content
+        return self._blocks[index]
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_END:
+            offset += self.size
+        elif whence == os.SEEK_CUR:
+            offset += self.position
+        self.position = max(offset, 0)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        chunks = []
+        while size > 0:
+            index, start = divmod(self.position, self.block_size)
+            data = self._block(index)[start:start + size]
+            if not data:
+                break
+            chunks.append(data)
+            self.position += len(data)
+            size -= len(data)
+        return b"".join(chunks)
+
+    def close(self):
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
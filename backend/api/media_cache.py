@@ -0,0 +1,125 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from urllib.parse import unquote, urlparse
+
+import requests
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from api import media
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ("container", "duration", "width", "height", "error", "probed_at")
+
+_session = None
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=settings.MEDIA_PROBE_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def _storage_name(url):
+    """Storage path of a URL served from MEDIA_URL, whatever host it was built with."""
+    path = urlparse(url).path
+    if path.startswith(settings.MEDIA_URL):
+        return unquote(path[len(settings.MEDIA_URL):])
+    return None
+
+
+def _open(url):
+    name = _storage_name(url)
+    if name and default_storage.exists(name):
+        return default_storage.open(name, "rb")
+    if urlparse(url).scheme in ("http", "https"):
+        return media.HTTPRangeFile(url, _get_session())
+    raise media.MediaProbeError("Not a stored file or an http(s) URL")
+
+
+def probe_url(url):
+    try:
+        with _open(url) as f:
+            return media.probe(f)
+    except media.MediaProbeError:
+        raise
+    except (OSError, requests.RequestException) as e:
+        raise media.MediaProbeError(str(e))
+
+
+def _row(url, info=None, error=None):
+    info = info or {}
+    return api_models.MediaMetadata(
+        url=url,
+        container=info.get("container", ""),
+        duration=info.get("duration"),
+        width=info.get("width"),
+        height=info.get("height"),
+        error=error,
+        probed_at=timezone.now(),
+    )
+
+
+def _save(rows):
+    api_models.MediaMetadata.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["url"], update_fields=list(METADATA_FIELDS)
+    )
+
+
+def store(url, info=None, error=None):
+    """Record the result of a probe made elsewhere (upload ingestion)."""
+    if url:
+        _save([_row(url, info, error)])
+
+
+def _stale(row):
+    retry_after = timedelta(seconds=settings.MEDIA_PROBE_RETRY_AFTER)
+    return row.error is not None and row.probed_at < timezone.now() - retry_after
+
+
+def lookup(urls, probe=True):
+    """
+    Metadata for each URL as {url: MediaMetadata}, read in one query. With probe=True the URLs
+    never seen before (and failures older than MEDIA_PROBE_RETRY_AFTER) are probed in parallel
+    on a bounded pool and stored; a URL still unknown when the deadline passes is left out.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
+    known = {row.url: row for row in api_models.MediaMetadata.objects.filter(url__in=urls)}
+    missing = [url for url in urls if url not in known or _stale(known[url])]
+    if not probe or not missing:
+        return known
+
+    executor = ThreadPoolExecutor(max_workers=min(settings.MEDIA_PROBE_WORKERS, len(missing)))
+    futures = {executor.submit(probe_url, url): url for url in missing}
+    done, _ = wait(futures, timeout=settings.MEDIA_PROBE_TIMEOUT)
+    # Probes still running finish in the background; their result is simply not cached
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    rows = []
+    for future in done:
+        url = futures[future]
+        try:
+            rows.append(_row(url, info=future.result()))
+        except media.MediaProbeError as e:
+            logger.info("Could not probe %s: %s", url, e)
+            rows.append(_row(url, error=str(e)))
+    if rows:
+        _save(rows)
+        known.update((row.url, row) for row in rows)
+    return known
+
+
+def durations(urls, probe=True):
+    """{url: seconds} for the URLs whose duration is known or could be probed."""
+    return {url: row.duration for url, row in lookup(urls, probe=probe).items() if row.duration is not None}
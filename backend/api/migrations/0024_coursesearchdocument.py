@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS api_course_fts USING fts5("
+            "title, meta, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS api_course_fts_vocab USING fts5vocab(api_course_fts, 'row')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE api_coursesearchdocument ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX api_coursesearchdocument_search_vector_idx "
+            "ON api_coursesearchdocument USING gin (search_vector)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS api_course_fts_vocab")
+        schema_editor.execute("DROP TABLE IF EXISTS api_course_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_alter_course_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchDocument',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='api.course')),
+                ('title', models.TextField(blank=True, default='')),
+                ('meta', models.TextField(blank=True, default='')),
+                ('description', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_agentjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherStats',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.teacher')),
+                ('total_courses', models.PositiveIntegerField(default=0)),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('daily_revenue', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
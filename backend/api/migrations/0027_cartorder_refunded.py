@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_teacherstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cartorder',
+            name='payment_status',
+            field=models.CharField(choices=[('Paid', 'Paid'), ('Processing', 'Processing'), ('Failed', 'Failed'), ('Refunded', 'Refunded')], default='Processing', max_length=100),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    CartOrderItem = apps.get_model('api', 'CartOrderItem')
+    RevenueRollup = apps.get_model('api', 'RevenueRollup')
+    rows = (
+        CartOrderItem.objects.filter(order__payment_status__in=('Paid', 'Refunded'))
+        .annotate(day=TruncDate('date'))
+        .values('teacher_id', 'course_id', 'day')
+        .annotate(revenue=Sum('price'), sales=Count('id'))
+        .order_by()
+    )
+    RevenueRollup.objects.bulk_create(
+        [RevenueRollup(teacher_id=row['teacher_id'], course_id=row['course_id'], day=row['day'], revenue=row['revenue'], sales=row['sales']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_cartorder_refunded'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='api.course')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='api.teacher')),
+            ],
+            options={
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['teacher', 'day'], name='api_revenue_teacher_d0dfbc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('teacher', 'course', 'day'), name='unique_revenue_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Review = apps.get_model('api', 'Review')
+    CourseRating = apps.get_model('api', 'CourseRating')
+    stars = range(1, 6)
+    rows = (
+        Review.objects.filter(active=True, rating__in=stars)
+        .values('course_id')
+        .annotate(count=Count('id'), total=Sum('rating'), **{f'stars_{star}': Count('id', filter=Q(rating=star)) for star in stars})
+        .order_by()
+    )
+    CourseRating.objects.bulk_create([CourseRating(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_revenuerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRating',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to='api.course')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:32
+
+from django.db import migrations, models
+from django.db.models import F, Func, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_progress(apps, schema_editor):
+    EnrolledCourse = apps.get_model('api', 'EnrolledCourse')
+    VariantItem = apps.get_model('api', 'VariantItem')
+    CompletedLesson = apps.get_model('api', 'CompletedLesson')
+
+    def count(queryset):
+        counted = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+        return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+    completed = CompletedLesson.objects.filter(course=OuterRef('course'), user=OuterRef('user'))
+    EnrolledCourse.objects.update(
+        total_lessons=count(VariantItem.objects.filter(variant__course=OuterRef('course'))),
+        completed_lessons=count(completed),
+        last_activity=Subquery(completed.order_by('-date').values('date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_courserating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrolledcourse',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrolledcourse',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrolledcourse',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Func, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_completions(apps, schema_editor):
+    # Keep the newest completion of each (user, lesson) pair, then recount enrollment progress
+    CompletedLesson = apps.get_model('api', 'CompletedLesson')
+    EnrolledCourse = apps.get_model('api', 'EnrolledCourse')
+
+    duplicates = (
+        CompletedLesson.objects.filter(user__isnull=False)
+        .values('user_id', 'variant_item_id')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    removed = 0
+    for pair in duplicates.iterator():
+        removed += CompletedLesson.objects.filter(
+            user_id=pair['user_id'], variant_item_id=pair['variant_item_id']
+        ).exclude(id=pair['keep']).delete()[0]
+
+    if removed:
+        completed = (
+            CompletedLesson.objects.filter(course=OuterRef('course'), user=OuterRef('user'))
+            .order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+        )
+        EnrolledCourse.objects.update(completed_lessons=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_enrolledcourse_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_completions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='completedlesson',
+            constraint=models.UniqueConstraint(fields=('user', 'variant_item'), name='unique_completed_lesson'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:38
+
+import django.db.models.deletion
+import shortuuid.django_fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_completedlesson_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', shortuuid.django_fields.ShortUUIDField(alphabet='abcdefghijklmnopqrstuvwxyz1234567890', length=16, max_length=30, prefix='', unique=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('size', models.PositiveBigIntegerField()),
+                ('received', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('Uploading', 'Uploading'), ('Uploaded', 'Uploaded'), ('Ready', 'Ready'), ('Failed', 'Failed')], default='Uploading', max_length=20)),
+                ('path', models.CharField(blank=True, default='', max_length=500)),
+                ('url', models.CharField(blank=True, db_index=True, default='', max_length=500)),
+                ('metadata', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('container', models.CharField(blank=True, default='', max_length=20)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('probed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
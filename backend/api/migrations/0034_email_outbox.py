@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:46
+
+import django.utils.timezone
+import shortuuid.django_fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_media_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', shortuuid.django_fields.ShortUUIDField(alphabet='abcdefghijklmnopqrstuvwxyz1234567890', length=12, max_length=30, prefix='', unique=True)),
+                ('kind', models.CharField(max_length=50)),
+                ('to', models.JSONField(default=list)),
+                ('subject', models.CharField(max_length=255)),
+                ('body_text', models.TextField()),
+                ('body_html', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('Queued', 'Queued'), ('Sending', 'Sending'), ('Sent', 'Sent'), ('Dead', 'Dead')], default='Queued', max_length=20)),
+                ('idempotency_key', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100, null=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='api_emailou_status_a1fb8b_idx')],
+            },
+        ),
+    ]
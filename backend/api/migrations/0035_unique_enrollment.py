@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_enrollments(apps, schema_editor):
+    # Keep the first enrollment of each (course, user) pair
+    EnrolledCourse = apps.get_model('api', 'EnrolledCourse')
+
+    duplicates = (
+        EnrolledCourse.objects.filter(user__isnull=False)
+        .values('course_id', 'user_id')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for pair in duplicates.iterator():
+        EnrolledCourse.objects.filter(course_id=pair['course_id'], user_id=pair['user_id']).exclude(id=pair['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrolledcourse',
+            constraint=models.UniqueConstraint(fields=('course', 'user'), name='unique_enrollment'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:53
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_coupon_uses(apps, schema_editor):
+    # A use is an order the coupon was applied to
+    Coupon = apps.get_model('api', 'Coupon')
+    CartOrder = apps.get_model('api', 'CartOrder')
+    uses = (
+        CartOrder.coupons.through.objects.filter(coupon_id=OuterRef('pk'))
+        .order_by().values('coupon_id').annotate(total=Count('id')).values('total')
+    )
+    Coupon.objects.update(used_count=Coalesce(Subquery(uses, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0035_unique_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='used_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_coupon_uses, migrations.RunPython.noop),
+    ]
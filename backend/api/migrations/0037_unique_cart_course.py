@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_cart_rows(apps, schema_editor):
+    # Keep the latest row of each (cart, course) pair
+    Cart = apps.get_model('api', 'Cart')
+
+    duplicates = (
+        Cart.objects.values('cart_id', 'course_id')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for pair in duplicates.iterator():
+        Cart.objects.filter(cart_id=pair['cart_id'], course_id=pair['course_id']).exclude(id=pair['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_coupon_used_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_cart_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('cart_id', 'course'), name='unique_cart_course'),
+        ),
+    ]
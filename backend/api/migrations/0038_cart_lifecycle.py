@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:57
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def backfill_last_touched(apps, schema_editor):
+    # Existing carts were last touched when their newest row was added
+    Cart = apps.get_model('api', 'Cart')
+    newest = Cart.objects.filter(cart_id=OuterRef('cart_id')).order_by().values('cart_id').annotate(newest=Max('date')).values('newest')
+    Cart.objects.update(last_touched=Subquery(newest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_unique_cart_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartPurgeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('cutoff', models.DateTimeField()),
+                ('dry_run', models.BooleanField(default=False)),
+                ('carts', models.PositiveIntegerField(default=0)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('archive_path', models.CharField(blank=True, max_length=500, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='last_touched',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_touched, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0038_cart_lifecycle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='agentjob',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'idempotency_key'), name='unique_job_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:40
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Frozen copy of api.search.fold_text/build_document_fields as of this migration
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return TOKEN_RE.findall("".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower())
+
+
+def build_document_fields(course):
+    meta = []
+    if course.category_id:
+        meta.append(course.category.title)
+    if course.teacher_id:
+        meta.append(course.teacher.full_name)
+
+    return {
+        "title": " ".join(tokenize(course.title)),
+        "meta": " ".join(tokenize(" ".join(meta))),
+        "description": " ".join(tokenize(course.description)),
+    }
+
+
+def backfill_search_index(apps, schema_editor):
+    # 0024 created an empty index; fill it with the published courses (re-running is harmless)
+    Course = apps.get_model('api', 'Course')
+    CourseSearchDocument = apps.get_model('api', 'CourseSearchDocument')
+    courses = Course.objects.filter(
+        platform_status='Published', teacher_course_status='Published'
+    ).select_related('category', 'teacher')
+    documents = [CourseSearchDocument(course_id=course.pk, **build_document_fields(course)) for course in courses.iterator()]
+
+    CourseSearchDocument.objects.all().delete()
+    CourseSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute("DELETE FROM api_course_fts")
+            cursor.executemany(
+                "INSERT INTO api_course_fts (rowid, title, meta, description) VALUES (%s, %s, %s, %s)",
+                [(d.course_id, d.title, d.meta, d.description) for d in documents],
+            )
+        elif vendor == 'postgresql':
+            cursor.execute(
+                "UPDATE api_coursesearchdocument SET search_vector = "
+                "setweight(to_tsvector('simple', title), 'A') || "
+                "setweight(to_tsvector('simple', meta), 'B') || "
+                "setweight(to_tsvector('simple', description), 'D')"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_scope_job_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:55
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def rebuild_rollup(apps, schema_editor):
+    # Earlier rollups also counted Refunded orders; recount them from Paid orders only
+    CartOrderItem = apps.get_model('api', 'CartOrderItem')
+    RevenueRollup = apps.get_model('api', 'RevenueRollup')
+    rows = (
+        CartOrderItem.objects.filter(order__payment_status='Paid')
+        .annotate(day=TruncDate('date'))
+        .values('teacher_id', 'course_id', 'day')
+        .annotate(revenue=Sum('price'), sales=Count('id'))
+        .order_by()
+    )
+    RevenueRollup.objects.all().delete()
+    RevenueRollup.objects.bulk_create(
+        [RevenueRollup(teacher_id=row['teacher_id'], course_id=row['course_id'], day=row['day'], revenue=row['revenue'], sales=row['sales']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_backfill_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_rollup, migrations.RunPython.noop),
+    ]
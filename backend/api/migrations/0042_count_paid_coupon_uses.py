@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:20
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_paid_coupon_uses(apps, schema_editor):
+    # Uses were claimed when a coupon was applied; only Paid orders count now
+    Coupon = apps.get_model('api', 'Coupon')
+    CartOrder = apps.get_model('api', 'CartOrder')
+    uses = (
+        CartOrder.coupons.through.objects.filter(coupon_id=OuterRef('pk'), cartorder__payment_status='Paid')
+        .order_by().values('coupon_id').annotate(total=Count('id')).values('total')
+    )
+    Coupon.objects.update(used_count=Coalesce(Subquery(uses, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_rollup_paid_orders_only'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_paid_coupon_uses, migrations.RunPython.noop),
+    ]
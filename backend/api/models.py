@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.text import slugify
 from django.utils import timezone
 from datetime import date
@@ -6,7 +7,6 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 from userauths.models import User, Profile
 from shortuuid.django_fields import ShortUUIDField
-from moviepy.editor import VideoFileClip
 import math
 
 LANGUAGE = (
@@ -33,6 +33,31 @@ PAYMENT_STATUS = (
     ("Paid", "Paid"),
     ("Processing", "Processing"),
     ("Failed", "Failed"),
+    ("Refunded", "Refunded"),
+)
+
+
+JOB_STATUS = (
+    ("Queued", "Queued"),
+    ("Running", "Running"),
+    ("Succeeded", "Succeeded"),
+    ("Failed", "Failed"),
+)
+
+
+EMAIL_STATUS = (
+    ("Queued", "Queued"),
+    ("Sending", "Sending"),
+    ("Sent", "Sent"),
+    ("Dead", "Dead"),
+)
+
+
+UPLOAD_STATUS = (
+    ("Uploading", "Uploading"),
+    ("Uploaded", "Uploaded"),
+    ("Ready", "Ready"),
+    ("Failed", "Failed"),
 )
 
 
@@ -141,15 +166,92 @@ class Course(models.Model):
     def lectures(self):
         return VariantItem.objects.filter(variant__course=self)
     
+    def rating_summary(self):
+        # Maintained by api.course_ratings; a course without active reviews has no row
+        try:
+            return self.rating_stats
+        except CourseRating.DoesNotExist:
+            return None
+
     def average_rating(self):
-        average_rating = Review.objects.filter(course=self, active=True).aggregate(avg_rating=models.Avg('rating'))
-        return average_rating['avg_rating']
+        summary = self.rating_summary()
+        return summary.average() if summary else None
     
     def rating_count(self):
-        return Review.objects.filter(course=self, active=True).count()
+        summary = self.rating_summary()
+        return summary.count if summary else 0
+
+    def rating_histogram(self):
+        summary = self.rating_summary()
+        return summary.histogram() if summary else {str(star): 0 for star, _ in RATING}
     
     def reviews(self):
         return Review.objects.filter(course=self, active=True)
+
+class CourseRating(models.Model):
+    # Active review aggregates of a course, kept in step with Review writes by api.course_ratings
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="rating_stats")
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rating - {self.course}"
+
+    def average(self):
+        return self.total / self.count if self.count else None
+
+    def histogram(self):
+        return {str(star): getattr(self, f"stars_{star}") for star, _ in RATING}
+
+class CourseSearchDocument(models.Model):
+    # Diacritic-folded text of a course; the native full-text index (FTS5 / tsvector) is kept alongside it
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    title = models.TextField(blank=True, default="")
+    meta = models.TextField(blank=True, default="")
+    description = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
+
+class TeacherStats(models.Model):
+    # Materialized dashboard numbers, maintained by api.teacher_stats as courses, enrollments and payments change
+    teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    total_courses = models.PositiveIntegerField(default=0)
+    total_students = models.PositiveIntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=14, default=0.00, decimal_places=2)
+    # Paid revenue per day ("YYYY-MM-DD" -> amount) for the rolling monthly window only
+    daily_revenue = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats - {self.teacher.full_name}"
+
+class RevenueRollup(models.Model):
+    # Sold revenue per teacher, course and day, filled by api.revenue when a payment succeeds
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name="revenue_rollups")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="revenue_rollups")
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=14, default=0.00, decimal_places=2)
+    sales = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(fields=["teacher", "course", "day"], name="unique_revenue_rollup_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["teacher", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.course} - {self.revenue}"
     
 class Variant(models.Model):
     course = models.ForeignKey(Course, related_name='variants',on_delete=models.CASCADE)
@@ -227,6 +329,13 @@ class Cart(models.Model):
     country = models.CharField(max_length=100, null=True, blank=True)
     cart_id = ShortUUIDField(length=6, max_length=20, alphabet="1234567890")
     date = models.DateTimeField(default=timezone.now)
+    # Bumped on every row of the cart whenever the shopper adds to it; `purge_carts` uses it
+    last_touched = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart_id", "course"], name="unique_cart_course"),
+        ]
 
     def __str__(self):
         return self.course.title
@@ -299,6 +408,11 @@ class CompletedLesson(models.Model):
     variant_item = models.ForeignKey(VariantItem, on_delete=models.CASCADE)
     date = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "variant_item"], name="unique_completed_lesson"),
+        ]
+
     def __str__(self):
         return self.course.title
     
@@ -309,9 +423,23 @@ class EnrolledCourse(models.Model):
     order_item = models.ForeignKey(CartOrderItem, on_delete=models.CASCADE)
     enrollment_id = ShortUUIDField(unique=True, length=6, max_length=20, alphabet="1234567890")
     date = models.DateTimeField(default=timezone.now)
+    # Progress counters, maintained by api.progress as lessons are completed and the curriculum changes
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "user"], name="unique_enrollment"),
+        ]
 
     def __str__(self):
         return self.course.title
+
+    def progress(self):
+        if not self.total_lessons:
+            return 0
+        return min(round(self.completed_lessons * 100 / self.total_lessons), 100)
     
     def lectures(self):
         return VariantItem.objects.filter(variant__course=self.course)
@@ -381,6 +509,8 @@ class Coupon(models.Model):
     date = models.DateField(default=date.today)
     end_date = models.DateField(null=True, blank=True)
     max_uses = models.PositiveIntegerField(null=True, blank=True)
+    # Paid orders the coupon was applied to, counted by api.coupons when the order is fulfilled
+    used_count = models.PositiveIntegerField(default=0)
     active = models.BooleanField(default=True)
 
     def __str__(self):
@@ -449,3 +579,120 @@ class ApprovedTopic(models.Model):
     def __str__(self):
         return self.topic
 
+
+class UploadSession(models.Model):
+    # A (possibly chunked) file upload; see api.uploads. Chunks are appended to a temp file until `received == size`
+    upload_id = ShortUUIDField(unique=True, length=16, max_length=30, alphabet="abcdefghijklmnopqrstuvwxyz1234567890")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="uploads")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=UPLOAD_STATUS, default="Uploading")
+    path = models.CharField(max_length=500, blank=True, default="")
+    url = models.CharField(max_length=500, blank=True, default="", db_index=True)
+    metadata = models.JSONField(default=dict)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
+
+
+class EmailOutbox(models.Model):
+    # Rendered emails waiting for `manage.py send_emails` (or the in-process dispatcher)
+    message_id = ShortUUIDField(unique=True, length=12, max_length=30, alphabet="abcdefghijklmnopqrstuvwxyz1234567890")
+    kind = models.CharField(max_length=50)
+    to = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField()
+    body_html = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=EMAIL_STATUS, default="Queued")
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - {self.message_id} - {self.status}"
+
+
+class MediaMetadata(models.Model):
+    # Container metadata of a media URL (uploaded or remote), probed once and reused by every lesson using it
+    url = models.CharField(max_length=500, unique=True)
+    container = models.CharField(max_length=20, blank=True, default="")
+    duration = models.FloatField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    probed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.url
+
+
+class CartPurgeRun(models.Model):
+    # One run of `manage.py purge_carts`: what was removed and where it was archived
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    cutoff = models.DateTimeField()
+    dry_run = models.BooleanField(default=False)
+    carts = models.PositiveIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, default=0.00, decimal_places=2)
+    archive_path = models.CharField(max_length=500, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M} - {self.carts} carts"
+
+
+class AgentJob(models.Model):
+    job_id = ShortUUIDField(unique=True, length=12, max_length=30, alphabet="abcdefghijklmnopqrstuvwxyz1234567890")
+    kind = models.CharField(max_length=50)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="agent_jobs")
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default="Queued")
+    # Client-chosen, so only unique per user and kind (see the constraint below)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    progress = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "kind", "idempotency_key"], name="unique_job_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - {self.job_id} - {self.status}"
@@ -0,0 +1,204 @@
+"""
+Transactional email outbox.
+
+Request handlers only render the email and insert an EmailOutbox row, in the same transaction
+as the change the email is about, so an email exists exactly when that change was committed.
+Delivery happens later: `manage.py send_emails` (JOBS_MODE=worker) or an in-process dispatcher
+thread (JOBS_MODE=thread) sends queued rows in batches over one backend connection, retries
+failures with backoff and marks a message Dead after `max_attempts`.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from api import jobs
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+# A Sending message whose lock is older than this is assumed orphaned by a dead dispatcher
+LOCK_TIMEOUT = 10 * 60
+
+
+def enqueue(kind, to, subject, template, context, idempotency_key=None):
+    """
+    Render `email/<template>.txt` (and `.html` when it exists) and queue the message.
+    With an idempotency_key, queuing the same email twice returns the first message.
+    """
+    body_text = render_to_string(f"email/{template}.txt", context)
+    try:
+        body_html = render_to_string(f"email/{template}.html", context)
+    except TemplateDoesNotExist:
+        body_html = None
+
+    fields = {
+        "kind": kind,
+        "to": [to] if isinstance(to, str) else list(to),
+        "subject": subject,
+        "body_text": body_text,
+        "body_html": body_html,
+    }
+    if idempotency_key:
+        message, created = api_models.EmailOutbox.objects.get_or_create(idempotency_key=idempotency_key, defaults=fields)
+    else:
+        message, created = api_models.EmailOutbox.objects.create(**fields), True
+
+    if created:
+        if jobs.get_mode() == "inline":
+            transaction.on_commit(dispatch)
+        elif jobs.get_mode() == "thread":
+            transaction.on_commit(local_dispatcher.wake)
+    return message
+
+
+def _claimable():
+    now = timezone.now()
+    stale = now - timedelta(seconds=LOCK_TIMEOUT)
+    return Q(status="Queued", run_after__lte=now) | Q(status="Sending", locked_at__lt=stale)
+
+
+def claim(batch_size=BATCH_SIZE, worker_id=None):
+    """Lock up to batch_size due messages for this dispatcher with one compare-and-swap UPDATE."""
+    token = f"{worker_id or jobs.default_worker_id()}:{uuid.uuid4().hex[:8]}"
+    candidates = list(
+        api_models.EmailOutbox.objects.filter(_claimable())
+        .order_by("run_after", "id")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    if not candidates:
+        return []
+    now = timezone.now()
+    api_models.EmailOutbox.objects.filter(_claimable(), pk__in=candidates).update(
+        status="Sending", locked_by=token, locked_at=now, attempts=F("attempts") + 1,
+    )
+    return list(api_models.EmailOutbox.objects.filter(locked_by=token, status="Sending").order_by("id"))
+
+
+def _message(row, connection):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body_text,
+        from_email=settings.FROM_EMAIL,
+        to=row.to,
+        connection=connection,
+    )
+    if row.body_html:
+        message.attach_alternative(row.body_html, "text/html")
+    return message
+
+
+def send_batch(rows):
+    """Send claimed rows over a single backend connection and record each outcome."""
+    if not rows:
+        return 0, 0
+    sent = 0
+    now = timezone.now()
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as e:
+        logger.exception("Could not open the email connection")
+        for row in rows:
+            _failed(row, e, now)
+    else:
+        try:
+            for row in rows:
+                try:
+                    _message(row, connection).send()
+                except Exception as e:
+                    logger.warning("Email %s (%s) failed on attempt %s: %s", row.message_id, row.kind, row.attempts, e)
+                    _failed(row, e, now)
+                else:
+                    row.status = "Sent"
+                    row.sent_at = timezone.now()
+                    row.error = None
+                    sent += 1
+                row.locked_by = None
+                row.locked_at = None
+        finally:
+            connection.close()
+
+    api_models.EmailOutbox.objects.bulk_update(rows, ["status", "sent_at", "error", "run_after", "locked_by", "locked_at"])
+    return sent, len(rows) - sent
+
+
+def _failed(row, error, now):
+    row.error = str(error)
+    row.locked_by = None
+    row.locked_at = None
+    if row.attempts < row.max_attempts:
+        row.status = "Queued"
+        row.run_after = now + timedelta(seconds=jobs.retry_delay(row.attempts))
+    else:
+        row.status = "Dead"
+
+
+def dispatch(batch_size=BATCH_SIZE, worker_id=None):
+    """Send everything that is due; returns (sent, failed)."""
+    sent = failed = 0
+    while True:
+        rows = claim(batch_size, worker_id)
+        if not rows:
+            return sent, failed
+        batch_sent, batch_failed = send_batch(rows)
+        sent += batch_sent
+        failed += batch_failed
+
+
+def work(batch_size=BATCH_SIZE, once=False, poll_interval=5.0, wake_event=None, stop_event=None):
+    wake_event = wake_event or threading.Event()
+    stop_event = stop_event or threading.Event()
+    sent = failed = 0
+    while not stop_event.is_set():
+        batch_sent, batch_failed = dispatch(batch_size)
+        sent += batch_sent
+        failed += batch_failed
+        if once:
+            break
+        wake_event.wait(poll_interval)
+        wake_event.clear()
+    return sent, failed
+
+
+class LocalDispatcher(jobs.LocalWorker):
+    """In-process dispatcher thread used when JOBS_MODE is "thread"."""
+
+    thread_name = "local-email-dispatcher"
+
+    def _run(self):
+        close_old_connections()
+        work(wake_event=self._wake)
+
+
+local_dispatcher = LocalDispatcher()
+
+
+def order_paid(order, order_items):
+    """Order confirmation and enrollment emails for a newly paid order."""
+    student = order.student
+    if not student or not student.email:
+        return
+    context = {
+        "username": student.username,
+        "order": order,
+        "order_items": list(order_items),
+        "site_url": settings.FRONTEND_SITE_URL,
+    }
+    enqueue(
+        "order_confirmation", student.email, f"Order confirmation #{order.oid}",
+        "order_confirmation", context, idempotency_key=f"order_confirmation:{order.oid}",
+    )
+    enqueue(
+        "enrollment_completed", student.email, "Your courses are ready",
+        "enrollment_completed", context, idempotency_key=f"enrollment_completed:{order.oid}",
+    )
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-date", "-id")
+
+
+class RosterCursorPagination(CursorPagination):
+    # Keyset pagination over the grouped student roster; the view picks `ordering` per request
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-date", "-user_id")
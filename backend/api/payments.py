@@ -0,0 +1,225 @@
+"""
+Clients for the payment providers.
+
+PayPal: the OAuth access token is cached in the shared cache until shortly before it expires and
+refreshed by one caller at a time, so verifying a payment is a single API call over a pooled,
+keep-alive session. VNPay: request signing and return-URL verification.
+
+Provider URLs come from settings (PAYPAL_API_URL, VNPAY_PAYMENT_URL), so a local fake server can
+stand in for tests and benchmarks. Latency of every provider call is recorded in `metrics`.
+"""
+import hashlib
+import hmac
+import logging
+import threading
+import time
+import urllib.parse
+from collections import defaultdict, deque
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Refresh the token this long before PayPal says it expires
+TOKEN_REFRESH_MARGIN = 5 * 60
+TOKEN_LOCK_TIMEOUT = 10
+# How long a caller waits for another process to finish refreshing the token
+TOKEN_WAIT = 3.0
+
+
+class PaymentProviderError(Exception):
+    pass
+
+
+class ProviderMetrics:
+    """Per (provider, operation) call counts, errors and latency percentiles of this process."""
+
+    def __init__(self, samples=500):
+        self._lock = threading.Lock()
+        self._calls = defaultdict(lambda: {"calls": 0, "errors": 0, "total": 0.0, "samples": deque(maxlen=samples)})
+
+    def record(self, provider, operation, seconds, error=False):
+        with self._lock:
+            entry = self._calls[(provider, operation)]
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["total"] += seconds
+            entry["samples"].append(seconds)
+
+    def stats(self):
+        rows = []
+        with self._lock:
+            for (provider, operation), entry in sorted(self._calls.items()):
+                samples = sorted(entry["samples"])
+
+                def percentile(p, samples=samples):
+                    return round(samples[min(int(len(samples) * p), len(samples) - 1)] * 1000, 1) if samples else None
+                rows.append({
+                    "provider": provider,
+                    "operation": operation,
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "avg_ms": round(entry["total"] / entry["calls"] * 1000, 1) if entry["calls"] else None,
+                    "p50_ms": percentile(0.5),
+                    "p95_ms": percentile(0.95),
+                })
+        return rows
+
+
+metrics = ProviderMetrics()
+
+
+def _session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PayPalClient:
+    provider = "paypal"
+
+    def __init__(self, base_url, client_id, secret, timeout=None, cache_alias="default"):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.secret = secret
+        self.timeout = timeout or settings.PAYMENT_HTTP_TIMEOUT
+        self.cache_alias = cache_alias
+        self.session = _session()
+        self._lock = threading.Lock()
+        self._token = None
+        client_key = hashlib.sha256(f"{self.base_url}:{client_id}".encode()).hexdigest()[:16]
+        self.token_key = f"payments:paypal:token:{client_key}"
+        self.token_lock_key = f"{self.token_key}:lock"
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _request(self, operation, method, path, **kwargs):
+        started = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            error = response.status_code >= 500
+            return response
+        except requests.RequestException as e:
+            raise PaymentProviderError(f"PayPal {operation} failed: {e}")
+        finally:
+            metrics.record(self.provider, operation, time.perf_counter() - started, error=error)
+
+    def _fetch_token(self):
+        response = self._request(
+            "oauth_token", "POST", "/v1/oauth2/token",
+            data={"grant_type": "client_credentials"}, auth=(self.client_id, self.secret),
+        )
+        if response.status_code != 200:
+            raise PaymentProviderError(f"Failed to get access token from paypal {response.status_code}")
+        payload = response.json()
+        ttl = max(int(payload.get("expires_in", 0)) - TOKEN_REFRESH_MARGIN, 60)
+        token = {"access_token": payload["access_token"], "expires_at": time.time() + ttl}
+        self.cache.set(self.token_key, token, ttl)
+        return token
+
+    def _valid(self, token):
+        return token if token and token["expires_at"] > time.time() else None
+
+    def _shared_token(self):
+        self._token = self._valid(self.cache.get(self.token_key)) or self._token
+        return self._valid(self._token)
+
+    def access_token(self):
+        token = self._valid(self._token) or self._shared_token()
+        if token:
+            return token["access_token"]
+        # One refresh per process (thread lock) and, through cache.add, one across processes
+        with self._lock:
+            token = self._shared_token()
+            if not token and self.cache.add(self.token_lock_key, 1, TOKEN_LOCK_TIMEOUT):
+                try:
+                    token = self._fetch_token()
+                finally:
+                    self.cache.delete(self.token_lock_key)
+            deadline = time.monotonic() + TOKEN_WAIT
+            while not token and time.monotonic() < deadline:
+                time.sleep(0.1)
+                token = self._shared_token()
+            # Without a token by now the other refresher is stuck or gone: fetch it ourselves
+            self._token = token or self._fetch_token()
+            return self._token["access_token"]
+
+    def invalidate_token(self):
+        self._token = None
+        self.cache.delete(self.token_key)
+
+    def get_order(self, order_id):
+        """The PayPal order as a dict; a rejected (expired or revoked) token is replaced once."""
+        path = f"/v2/checkout/orders/{urllib.parse.quote(str(order_id), safe='')}"
+        for attempt in range(2):
+            headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.access_token()}"}
+            response = self._request("get_order", "GET", path, headers=headers)
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            break
+        if response.status_code != 200:
+            logger.warning("PayPal error response: %s %s", response.status_code, response.text[:500])
+            raise PaymentProviderError(f"PayPal returned {response.status_code}")
+        return response.json()
+
+
+class VNPayClient:
+    provider = "vnpay"
+
+    def __init__(self, payment_url, tmn_code, hash_secret):
+        self.payment_url = payment_url
+        self.tmn_code = tmn_code
+        self.hash_secret = hash_secret
+
+    def _sign(self, query_string):
+        return hmac.new(self.hash_secret.encode("utf-8"), query_string.encode("utf-8"), hashlib.sha512).hexdigest()
+
+    @staticmethod
+    def _query_string(params):
+        return "&".join(f"{key}={urllib.parse.quote_plus(str(value))}" for key, value in sorted(params.items()))
+
+    def build_payment_url(self, params):
+        started = time.perf_counter()
+        query_string = self._query_string({**params, "vnp_TmnCode": self.tmn_code})
+        url = f"{self.payment_url}?{query_string}&vnp_SecureHash={self._sign(query_string)}"
+        metrics.record(self.provider, "sign", time.perf_counter() - started)
+        return url
+
+    def verify(self, data):
+        """Check the vnp_SecureHash of the parameters VNPay sent back to the return URL."""
+        started = time.perf_counter()
+        received = str(data.get("vnp_SecureHash", ""))
+        params = {
+            key: str(data[key])
+            for key in data
+            if key.startswith("vnp_") and key not in ("vnp_SecureHash", "vnp_SecureHashType")
+        }
+        valid = hmac.compare_digest(self._sign(self._query_string(params)).lower(), received.lower())
+        metrics.record(self.provider, "verify", time.perf_counter() - started, error=not valid)
+        return valid
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def paypal():
+    with _clients_lock:
+        if "paypal" not in _clients:
+            _clients["paypal"] = PayPalClient(settings.PAYPAL_API_URL, settings.PAYPAL_CLIENT_ID, settings.PAYPAL_SECRET_ID)
+        return _clients["paypal"]
+
+
+def vnpay():
+    with _clients_lock:
+        if "vnpay" not in _clients:
+            _clients["vnpay"] = VNPayClient(settings.VNPAY_PAYMENT_URL, settings.VNPAY_TMN_CODE, settings.VNPAY_HASH_SECRET)
+        return _clients["vnpay"]
@@ -0,0 +1,177 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from api import models as api_models
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def counters_deferred():
+    """Completions saved or deleted in this block leave the counters alone; the caller recounts them."""
+    _deferred.depth = getattr(_deferred, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+
+
+def _counting_deferred():
+    return getattr(_deferred, "depth", 0) > 0
+
+
+def _lesson_count(course_id):
+    return api_models.VariantItem.objects.filter(variant__course_id=course_id).count()
+
+
+def _count_subquery(queryset, *group_by):
+    # group_by: the field(s) the queryset is correlated on, so COUNT is a real grouped aggregate
+    counted = queryset.order_by().values(*group_by).annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def init_enrollment(enrollment):
+    """Fill the counters of a new enrollment before it is saved."""
+    enrollment.total_lessons = _lesson_count(enrollment.course_id)
+    if enrollment.user_id:
+        enrollment.completed_lessons = api_models.CompletedLesson.objects.filter(
+            course_id=enrollment.course_id, user_id=enrollment.user_id
+        ).count()
+
+
+def init_enrollments(enrollments):
+    """init_enrollment() for a batch about to be bulk-inserted, in two grouped queries."""
+    course_ids = {enrollment.course_id for enrollment in enrollments}
+    totals = dict(
+        api_models.VariantItem.objects.filter(variant__course_id__in=course_ids)
+        .values("variant__course_id").annotate(total=Count("id")).order_by()
+        .values_list("variant__course_id", "total")
+    )
+    completed = {
+        (row["user_id"], row["course_id"]): row["total"]
+        for row in api_models.CompletedLesson.objects.filter(
+            course_id__in=course_ids, user_id__in={enrollment.user_id for enrollment in enrollments}
+        ).values("user_id", "course_id").annotate(total=Count("id")).order_by()
+    }
+    for enrollment in enrollments:
+        enrollment.total_lessons = totals.get(enrollment.course_id, 0)
+        enrollment.completed_lessons = completed.get((enrollment.user_id, enrollment.course_id), 0)
+
+
+def curriculum_changed(course_id):
+    """Set the lesson total of every enrollment of a course after lessons were added or removed."""
+    if course_id:
+        api_models.EnrolledCourse.objects.filter(course_id=course_id).update(total_lessons=_lesson_count(course_id))
+
+
+def lesson_completed(lesson):
+    if lesson.user_id and not _counting_deferred():
+        api_models.EnrolledCourse.objects.filter(course_id=lesson.course_id, user_id=lesson.user_id).update(
+            completed_lessons=F("completed_lessons") + 1,
+            last_activity=timezone.now(),
+        )
+
+
+def lesson_uncompleted(lesson):
+    if lesson.user_id and not _counting_deferred():
+        api_models.EnrolledCourse.objects.filter(course_id=lesson.course_id, user_id=lesson.user_id).update(
+            completed_lessons=Greatest(F("completed_lessons") - 1, 0),
+            last_activity=timezone.now(),
+        )
+
+
+def rebuild(enrollments=None):
+    """Recompute the counters from the lesson tables in one UPDATE (backfills, repairs)."""
+    enrollments = api_models.EnrolledCourse.objects.all() if enrollments is None else enrollments
+    return enrollments.update(
+        total_lessons=_count_subquery(
+            api_models.VariantItem.objects.filter(variant__course=OuterRef("course")), "variant__course"
+        ),
+        completed_lessons=_count_subquery(
+            api_models.CompletedLesson.objects.filter(course=OuterRef("course"), user=OuterRef("user")), "course", "user"
+        ),
+    )
+
+
+def summary(enrollment):
+    return {
+        "enrollment_id": enrollment.enrollment_id,
+        "completed_lessons": enrollment.completed_lessons,
+        "total_lessons": enrollment.total_lessons,
+        "progress": enrollment.progress(),
+        "last_activity": enrollment.last_activity,
+    }
+
+
+def sync(enrollment, entries):
+    """
+    Apply a batch of (variant_item_id, completed, client_timestamp) entries for one enrollment.
+
+    Replaying a batch is harmless: an entry sets a state instead of toggling it. For each lesson
+    the newest entry wins, and it only overrides a stored completion if it is newer than that
+    completion's date. Returns (applied, ignored variant_item_ids, completed lesson ids).
+    """
+    now = timezone.now()
+    latest = {}
+    for entry in entries:
+        # Clocks running ahead must not make a completion unbeatable
+        entry = {**entry, "client_timestamp": min(entry.get("client_timestamp") or now, now)}
+        current = latest.get(entry["variant_item_id"])
+        if current is None or entry["client_timestamp"] >= current["client_timestamp"]:
+            latest[entry["variant_item_id"]] = entry
+
+    with transaction.atomic():
+        lessons = dict(
+            api_models.VariantItem.objects.filter(
+                variant__course_id=enrollment.course_id, variant_item_id__in=list(latest)
+            ).values_list("variant_item_id", "id")
+        )
+        ignored = [variant_item_id for variant_item_id in latest if variant_item_id not in lessons]
+        existing = {
+            lesson.variant_item_id: lesson
+            for lesson in api_models.CompletedLesson.objects.select_for_update().filter(
+                user_id=enrollment.user_id, variant_item_id__in=list(lessons.values())
+            )
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        for variant_item_id, lesson_pk in lessons.items():
+            entry = latest[variant_item_id]
+            stored = existing.get(lesson_pk)
+            if entry["completed"]:
+                if stored is None:
+                    to_create.append(api_models.CompletedLesson(
+                        user_id=enrollment.user_id, course_id=enrollment.course_id,
+                        variant_item_id=lesson_pk, date=entry["client_timestamp"],
+                    ))
+                elif entry["client_timestamp"] > stored.date:
+                    stored.date = entry["client_timestamp"]
+                    to_update.append(stored)
+            elif stored is not None and entry["client_timestamp"] >= stored.date:
+                to_delete.append(stored.pk)
+
+        # The counters are recounted once below instead of per row
+        with counters_deferred():
+            # ignore_conflicts: a concurrent sync may have completed the same lesson a moment ago
+            api_models.CompletedLesson.objects.bulk_create(to_create, ignore_conflicts=True)
+            api_models.CompletedLesson.objects.bulk_update(to_update, ["date"])
+            api_models.CompletedLesson.objects.filter(pk__in=to_delete).delete()
+
+        applied = len(to_create) + len(to_update) + len(to_delete)
+        enrollments = api_models.EnrolledCourse.objects.filter(course_id=enrollment.course_id, user_id=enrollment.user_id)
+        if applied:
+            rebuild(enrollments)
+            enrollments.update(last_activity=now)
+        enrollment.refresh_from_db(fields=["completed_lessons", "total_lessons", "last_activity"])
+
+        completed = list(
+            api_models.CompletedLesson.objects.filter(user_id=enrollment.user_id, course_id=enrollment.course_id)
+            .values_list("variant_item_id", flat=True)
+        )
+    return applied, ignored, completed
@@ -0,0 +1,172 @@
+import itertools
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from api import models as api_models
+
+INTERVALS = {
+    "day": F,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+# Number of points returned when the request gives no start date
+DEFAULT_POINTS = {
+    "day": 30,
+    "week": 12,
+    "month": 12,
+}
+
+MAX_BUCKETS = 1000
+
+
+class InvalidSeries(ValueError):
+    pass
+
+
+def _add(teacher_id, course_id, day, amount, count):
+    bucket = api_models.RevenueRollup.objects.filter(teacher_id=teacher_id, course_id=course_id, day=day)
+    if bucket.update(revenue=F("revenue") + amount, sales=F("sales") + count):
+        return
+    try:
+        with transaction.atomic():
+            api_models.RevenueRollup.objects.create(
+                teacher_id=teacher_id, course_id=course_id, day=day, revenue=amount, sales=count
+            )
+    except IntegrityError:
+        # Another payment created the bucket first
+        bucket.update(revenue=F("revenue") + amount, sales=F("sales") + count)
+
+
+def _buckets(order_items):
+    buckets = defaultdict(lambda: [Decimal("0.00"), 0])
+    for item in order_items:
+        bucket = buckets[(item.teacher_id, item.course_id, timezone.localdate(item.date))]
+        bucket[0] += Decimal(item.price)
+        bucket[1] += 1
+    return buckets
+
+
+def order_paid(order_items):
+    """Add the items of a freshly paid order to their (teacher, course, day) buckets."""
+    for (teacher_id, course_id, day), (amount, count) in _buckets(order_items).items():
+        _add(teacher_id, course_id, day, amount, count)
+
+
+def order_refunded(order_items):
+    """Take the items of an order moved from Paid to Refunded out of their buckets."""
+    for (teacher_id, course_id, day), (amount, count) in _buckets(order_items).items():
+        bucket = api_models.RevenueRollup.objects.filter(teacher_id=teacher_id, course_id=course_id, day=day)
+        bucket.update(revenue=F("revenue") - amount, sales=F("sales") - count)
+        # rebuild() has no bucket for a day without sales
+        bucket.filter(sales__lte=0).delete()
+
+
+def rebuild(teacher_id):
+    """Recompute a teacher's rollup from the paid order items (backfills and repairs)."""
+    # Paid only, like teacher_stats: a refunded sale is not revenue
+    rows = (
+        api_models.CartOrderItem.objects.filter(teacher_id=teacher_id, order__payment_status="Paid")
+        .annotate(day=TruncDate("date"))
+        .values("course_id", "day")
+        .annotate(revenue=Sum("price"), sales=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        api_models.RevenueRollup.objects.filter(teacher_id=teacher_id).delete()
+        api_models.RevenueRollup.objects.bulk_create(
+            [
+                api_models.RevenueRollup(teacher_id=teacher_id, course_id=row["course_id"], day=row["day"], revenue=row["revenue"], sales=row["sales"])
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+def _bucket_start(day, interval):
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day, interval):
+    if interval == "week":
+        return day + timedelta(weeks=1)
+    if interval == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+def _previous_bucket(day, interval):
+    if interval == "week":
+        return day - timedelta(weeks=1)
+    if interval == "month":
+        return (day - timedelta(days=1)).replace(day=1)
+    return day - timedelta(days=1)
+
+
+def buckets(start_day, end_day, interval):
+    current = _bucket_start(start_day, interval)
+    while current <= end_day:
+        yield current
+        current = _next_bucket(current, interval)
+
+
+def series(teacher_id, interval="month", start_day=None, end_day=None, by_course=False):
+    """
+    Revenue and sales per day/week/month between two dates (inclusive), with empty buckets filled in.
+    With by_course, every point also carries the per-course split.
+    """
+    if interval not in INTERVALS:
+        raise InvalidSeries(f"interval must be one of {', '.join(INTERVALS)}")
+    end_day = end_day or timezone.localdate()
+    if start_day is None:
+        start_day = _bucket_start(end_day, interval)
+        for _ in range(DEFAULT_POINTS[interval] - 1):
+            start_day = _previous_bucket(start_day, interval)
+    if start_day > end_day:
+        raise InvalidSeries("start must be on or before end")
+
+    points = {
+        bucket: {"period": bucket, "revenue": Decimal("0.00"), "sales": 0}
+        for bucket in itertools.islice(buckets(start_day, end_day, interval), MAX_BUCKETS + 1)
+    }
+    if len(points) > MAX_BUCKETS:
+        raise InvalidSeries(f"A series is limited to {MAX_BUCKETS} points; use a wider interval or a shorter range")
+
+    group_by = ["period", "course_id", "course__title"] if by_course else ["period"]
+    rows = (
+        api_models.RevenueRollup.objects.filter(teacher_id=teacher_id, day__gte=start_day, day__lte=end_day)
+        .annotate(period=INTERVALS[interval]("day"))
+        .values(*group_by)
+        .annotate(total_revenue=Sum("revenue"), total_sales=Sum("sales"))
+        .order_by(*group_by)
+    )
+
+    if by_course:
+        for point in points.values():
+            point["courses"] = []
+    for row in rows:
+        period = row["period"]
+        if hasattr(period, "date"):
+            period = period.date()
+        point = points[period]
+        point["revenue"] += row["total_revenue"]
+        point["sales"] += row["total_sales"]
+        if by_course:
+            point["courses"].append({
+                "course": row["course_id"],
+                "course_title": row["course__title"],
+                "revenue": row["total_revenue"],
+                "sales": row["total_sales"],
+            })
+
+    return list(points.values())
@@ -0,0 +1,322 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from difflib import get_close_matches
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from api import models as api_models
+
+FTS_TABLE = "api_course_fts"
+FTS_VOCAB_TABLE = "api_course_fts_vocab"
+
+# Relative weight of each indexed column (title, category + teacher, description)
+FIELD_WEIGHTS = (10.0, 4.0, 1.0)
+
+VOCABULARY_TTL = 300
+TYPO_MIN_LENGTH = 4
+TYPO_CUTOFF = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Lowercase and strip diacritics so "Lập trình" and "lap trinh" index the same."""
+    if not text:
+        return ""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(fold_text(text))
+
+
+def build_document_fields(course) -> Dict[str, str]:
+    meta = []
+    if course.category_id:
+        meta.append(course.category.title)
+    if course.teacher_id:
+        meta.append(course.teacher.full_name)
+
+    return {
+        "title": " ".join(tokenize(course.title)),
+        "meta": " ".join(tokenize(" ".join(meta))),
+        "description": " ".join(tokenize(course.description)),
+    }
+
+
+class SearchBackend:
+    name = "base"
+
+    def __init__(self):
+        self._vocabulary = None
+        self._vocabulary_loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def write(self, course_id: int, fields: Dict[str, str]):
+        raise NotImplementedError
+
+    def delete(self, course_id: int):
+        raise NotImplementedError
+
+    def load_vocabulary(self) -> List[str]:
+        raise NotImplementedError
+
+    def match(self, groups: List[List[str]], require_all: bool, limit: int) -> List[int]:
+        raise NotImplementedError
+
+    def invalidate(self):
+        self._vocabulary = None
+
+    def vocabulary(self) -> Dict[str, List[str]]:
+        # Terms bucketed by first letter so typo lookups stay cheap as the catalog grows
+        with self._lock:
+            expired = time.monotonic() - self._vocabulary_loaded_at > VOCABULARY_TTL
+            if self._vocabulary is None or expired:
+                buckets = defaultdict(list)
+                for term in self.load_vocabulary():
+                    buckets[term[0]].append(term)
+                for terms in buckets.values():
+                    terms.sort()
+                self._vocabulary = buckets
+                self._vocabulary_loaded_at = time.monotonic()
+            return self._vocabulary
+
+    def expand(self, term: str) -> List[str]:
+        """Return the term plus close spellings when nothing in the index starts with it."""
+        candidates = self.vocabulary().get(term[0], [])
+        position = bisect_left(candidates, term)
+        if position < len(candidates) and candidates[position].startswith(term):
+            return [term]
+        if len(term) < TYPO_MIN_LENGTH:
+            return [term]
+        return [term] + get_close_matches(term, candidates, n=3, cutoff=TYPO_CUTOFF)
+
+    def search(self, query: str, limit: int = 50) -> List[int]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        groups = [self.expand(term) for term in terms]
+        results = self.match(groups, require_all=True, limit=limit)
+        if not results and len(groups) > 1:
+            results = self.match(groups, require_all=False, limit=limit)
+        return results
+
+
+class SQLiteFTSBackend(SearchBackend):
+    name = "sqlite"
+
+    def write(self, course_id, fields):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course_id])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, meta, description) VALUES (%s, %s, %s, %s)",
+                [course_id, fields["title"], fields["meta"], fields["description"]],
+            )
+
+    def delete(self, course_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [course_id])
+
+    def load_vocabulary(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT term FROM {FTS_VOCAB_TABLE}")
+            return [row[0] for row in cursor.fetchall()]
+
+    def match(self, groups, require_all, limit):
+        clauses = ["(" + " OR ".join(f'"{term}"*' for term in group) + ")" for group in groups]
+        expression = (" AND " if require_all else " OR ").join(clauses)
+        weights = ", ".join(str(weight) for weight in FIELD_WEIGHTS)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [expression, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    name = "postgres"
+
+    def write(self, course_id, fields):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE api_coursesearchdocument SET search_vector = "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'D') "
+                "WHERE course_id = %s",
+                [fields["title"], fields["meta"], fields["description"], course_id],
+            )
+
+    def delete(self, course_id):
+        # The row (and its tsvector column) goes away with the document model
+        pass
+
+    def load_vocabulary(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT word FROM ts_stat('SELECT search_vector FROM api_coursesearchdocument')")
+            return [row[0] for row in cursor.fetchall()]
+
+    def match(self, groups, require_all, limit):
+        clauses = ["(" + " | ".join(f"{term}:*" for term in group) + ")" for group in groups]
+        expression = (" & " if require_all else " | ").join(clauses)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT course_id FROM api_coursesearchdocument, to_tsquery('simple', %s) query "
+                "WHERE search_vector @@ query "
+                "ORDER BY ts_rank_cd('{0.1, 0.2, 0.4, 1.0}', search_vector, query, 1) DESC LIMIT %s",
+                [expression, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PythonSearchBackend(SearchBackend):
+    """In-memory BM25 index built from CourseSearchDocument rows, used when no native FTS is available."""
+
+    name = "python"
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        super().__init__()
+        self._index = None
+        self._index_built_at = 0.0
+
+    def invalidate(self):
+        super().invalidate()
+        self._index = None
+
+    def write(self, course_id, fields):
+        self.invalidate()
+
+    def delete(self, course_id):
+        self.invalidate()
+
+    def _build(self):
+        postings = defaultdict(dict)
+        lengths = {}
+        for document in api_models.CourseSearchDocument.objects.values("course_id", "title", "meta", "description"):
+            length = 0
+            for weight, column in zip(FIELD_WEIGHTS, ("title", "meta", "description")):
+                for term in document[column].split():
+                    postings[term][document["course_id"]] = postings[term].get(document["course_id"], 0) + weight
+                    length += 1
+            lengths[document["course_id"]] = length
+
+        average_length = (sum(lengths.values()) / len(lengths)) if lengths else 0
+        return {
+            "postings": postings,
+            "terms": sorted(postings),
+            "lengths": lengths,
+            "average_length": average_length or 1,
+        }
+
+    def index(self):
+        with self._lock:
+            if self._index is None or time.monotonic() - self._index_built_at > VOCABULARY_TTL:
+                self._index = self._build()
+                self._index_built_at = time.monotonic()
+            return self._index
+
+    def load_vocabulary(self):
+        return self.index()["terms"]
+
+    def _prefix_terms(self, index, term):
+        terms = index["terms"]
+        position = bisect_left(terms, term)
+        while position < len(terms) and terms[position].startswith(term):
+            yield terms[position]
+            position += 1
+
+    def match(self, groups, require_all, limit):
+        index = self.index()
+        total = len(index["lengths"])
+        scores = defaultdict(float)
+        matched_groups = defaultdict(int)
+
+        for group in groups:
+            seen = set()
+            for alternative in group:
+                for term in self._prefix_terms(index, alternative):
+                    postings = index["postings"][term]
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for course_id, frequency in postings.items():
+                        length = index["lengths"][course_id] / index["average_length"]
+                        scores[course_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * (1 - self.b + self.b * length))
+                        seen.add(course_id)
+            for course_id in seen:
+                matched_groups[course_id] += 1
+
+        if require_all:
+            scores = {course_id: score for course_id, score in scores.items() if matched_groups[course_id] == len(groups)}
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgres": PostgresSearchBackend,
+    "python": PythonSearchBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> SearchBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = getattr(settings, "SEARCH_BACKEND", None)
+            if name is None:
+                name = {"sqlite": "sqlite", "postgresql": "postgres"}.get(connection.vendor, "python")
+            _backend = BACKENDS[name]()
+        return _backend
+
+
+def is_searchable(course) -> bool:
+    return course.platform_status == "Published" and course.teacher_course_status == "Published"
+
+
+def index_course(course):
+    # Only courses search may return are indexed, so drafts never take the place of a published hit
+    if not is_searchable(course):
+        remove_course(course.pk)
+        return
+    fields = build_document_fields(course)
+    api_models.CourseSearchDocument.objects.update_or_create(course_id=course.pk, defaults=fields)
+    backend = get_backend()
+    backend.write(course.pk, fields)
+    backend.invalidate()
+
+
+def remove_course(course_id: int):
+    api_models.CourseSearchDocument.objects.filter(course_id=course_id).delete()
+    backend = get_backend()
+    backend.delete(course_id)
+    backend.invalidate()
+
+
+def rebuild_index() -> int:
+    courses = api_models.Course.objects.select_related("category", "teacher")
+    count = 0
+    for course in courses.iterator():
+        index_course(course)
+        count += 1
+    return count
+
+
+def search_courses(query: str, limit: int = 50) -> List[int]:
+    return get_backend().search(query, limit=limit)
@@ -1,8 +1,9 @@
 from django.contrib.auth.password_validation import validate_password
-import requests
 import jwt
-from jwt.algorithms import RSAAlgorithm
-from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from api import clerk
+from api import curriculum
 from api import models as api_models
 
 from rest_framework import serializers
@@ -13,9 +14,6 @@ from django.contrib.auth.hashers import make_password
 
 
 from userauths.models import Profile, User
-from moviepy.editor import VideoFileClip
-import datetime
-import json
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -33,31 +31,11 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
-CLERK_JWKS_URL = f"https://{settings.CLERK_FRONTEND_API}/.well-known/jwks.json"
-CLERK_ISSUER = f"https://{settings.CLERK_FRONTEND_API}"
-
 class ClerkLoginSerializer(serializers.Serializer):
     token = serializers.CharField()
 
-    def get_clerk_public_keys(self):
-        response = requests.get(CLERK_JWKS_URL)
-        response.raise_for_status()
-        return response.json()["keys"]
-
     def verify_clerk_token(self, token):
-        unverified_header = jwt.get_unverified_header(token)
-        keys = self.get_clerk_public_keys()
-        for key in keys:
-            if key["kid"] == unverified_header["kid"]:
-                public_key = RSAAlgorithm.from_jwk(key)
-                return jwt.decode(
-                    token,
-                    public_key,
-                    algorithms=["RS256"],
-                    audience=None,
-                    issuer=CLERK_ISSUER,
-                )
-        raise jwt.InvalidTokenError("Public key not found.")
+        return clerk.verify_token(token)
 
     def validate(self, data):
         print("Request data received:", data)
@@ -394,6 +372,7 @@ class CouponSerializer(serializers.ModelSerializer):
     class Meta:
         model = api_models.Coupon
         fields = '__all__'
+        read_only_fields = ["used_count"]
 
     def validate_code(self, value):
         instance = self.instance
@@ -474,133 +453,31 @@ class CourseSerializer(serializers.ModelSerializer):
             "id", "category", "teacher", "file", "image", "title", "description",
             "price", "language", "level", "platform_status", "teacher_course_status",
             "featured", "course_id", "slug", "date", "students", "variants",
-            "lectures", "average_rating", "rating_count", "reviews"
+            "lectures", "average_rating", "rating_count", "rating_histogram", "reviews"
         ]
 
     def create(self, validated_data):
-        request = self.context.get("request")
         variants_data = validated_data.pop('variants', None)
+        if variants_data is None:
+            variants_data = curriculum.variants_from_request(self.context.get("request"))
 
-        if variants_data is None and request:
-            raw_variants = request.data.get("variants")
-            if raw_variants:
-                try:
-                    variants_data = json.loads(raw_variants)
-                except json.JSONDecodeError:
-                    raise serializers.ValidationError({"variants": "Invalid JSON format."})
-            else:
-                variants_data = []
-
-        course = api_models.Course.objects.create(**validated_data)
-
-        for variant_data in variants_data:
-            items_data = variant_data.pop('items', [])
-            variant = api_models.Variant.objects.create(course=course, **variant_data)
-
-            for item_data in items_data:
-                file_url = item_data.get("file")
-                duration = None
-                content_duration = None
-
-                if file_url:
-                    try:
-                        clip = VideoFileClip(file_url)
-                        total_seconds = int(clip.duration)
-                        duration = datetime.timedelta(seconds=total_seconds)
-                        minutes, seconds = divmod(total_seconds, 60)
-                        hours, minutes = divmod(minutes, 60)
-                        content_duration = f"{hours:02}:{minutes:02}:{seconds:02}"
-                        clip.close()
-                    except Exception:
-                        pass
-
-                api_models.VariantItem.objects.create(
-                    variant=variant,
-                    title=item_data.get("title"),
-                    description=item_data.get("description"),
-                    file=file_url,
-                    preview=item_data.get("preview", False),
-                    duration=duration,
-                    content_duration=content_duration
-                )
-
-        return course
+        # Media probes run before the transaction, which then only holds the writes
+        curriculum.probe_media(variants_data)
+        with transaction.atomic():
+            course = api_models.Course.objects.create(**validated_data)
+            return curriculum.save(course, variants_data)
 
     def update(self, instance, validated_data):
-        request = self.context.get("request")
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
         variants_data = validated_data.pop('variants', None)
+        if variants_data is None:
+            variants_data = curriculum.variants_from_request(self.context.get("request"))
 
-        if variants_data is None and request:
-            raw_variants = request.data.get("variants")
-            if raw_variants:
-                try:
-                    variants_data = json.loads(raw_variants)
-                except json.JSONDecodeError:
-                    raise serializers.ValidationError({"variants": "Invalid JSON format."})
-            else:
-                variants_data = []
-
-        if variants_data is not None:
-            for variant_data in variants_data:
-                items_data = variant_data.pop('items', [])
-
-                variant_id = variant_data.get('variant_id')
-                if variant_id:
-                    variant = instance.variants.filter(variant_id=variant_id).first()
-                    if not variant:
-                        raise serializers.ValidationError({"variant_id": f"Variant {variant_id} not found"})
-                    for attr, val in variant_data.items():
-                        setattr(variant, attr, val)
-                    variant.save()
-                else:
-                    variant = api_models.Variant.objects.create(course=instance, **variant_data)
-
-                for item_data in items_data:
-                    item_id = item_data.get('variant_item_id')
-                    file_url = item_data.get("file")
-                    duration = None
-                    content_duration = None
-
-                    if file_url:
-                        try:
-                            clip = VideoFileClip(file_url)
-                            total_seconds = int(clip.duration)
-                            duration = datetime.timedelta(seconds=total_seconds)
-                            minutes, seconds = divmod(total_seconds, 60)
-                            hours, minutes = divmod(minutes, 60)
-                            content_duration = f"{hours:02}:{minutes:02}:{seconds:02}"
-                            clip.close()
-                        except Exception:
-                            pass
-
-                    if item_id:
-                        item = variant.items.filter(variant_item_id=item_id).first()
-                        if not item:
-                            raise serializers.ValidationError({"variant_item_id": f"Item {item_id} not found"})
-                        item.title = item_data.get("title", item.title)
-                        item.description = item_data.get("description", item.description)
-                        item.file = file_url or item.file
-                        item.preview = item_data.get("preview", item.preview)
-                        item.duration = duration
-                        item.content_duration = content_duration
-                        item.save()
-                    else:
-                        api_models.VariantItem.objects.create(
-                            variant=variant,
-                            title=item_data.get("title"),
-                            description=item_data.get("description"),
-                            file=file_url,
-                            preview=item_data.get("preview", False),
-                            duration=duration,
-                            content_duration=content_duration
-                        )
-
-        return instance
+        curriculum.probe_media(variants_data, course=instance)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            return curriculum.save(instance, variants_data)
 
 
     def __init__(self, *args, **kwargs):
@@ -616,11 +493,97 @@ class CourseSerializer(serializers.ModelSerializer):
 
 
 
+class DynamicFieldsMixin:
+    # Keeps only the fields listed in the comma separated `?fields=` query param.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+
+        requested = request.query_params.get("fields")
+        if requested:
+            allowed = {name.strip() for name in requested.split(",") if name.strip()}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+class CatalogCategorySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ['id', 'title', 'slug']
+        model = api_models.Category
+
+class CatalogTeacherSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ['id', 'full_name', 'image']
+        model = api_models.Teacher
+
+class CourseCatalogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    category = CatalogCategorySerializer(read_only=True)
+    teacher = CatalogTeacherSerializer(read_only=True)
+    average_rating = serializers.FloatField(source="catalog_average_rating", read_only=True)
+    rating_count = serializers.IntegerField(source="catalog_rating_count", read_only=True)
+    student_count = serializers.IntegerField(source="catalog_student_count", read_only=True)
+    lecture_count = serializers.IntegerField(source="catalog_lecture_count", read_only=True)
+
+    class Meta:
+        model = api_models.Course
+        fields = [
+            "id", "course_id", "slug", "title", "description", "image", "price",
+            "language", "level", "featured", "date", "category", "teacher",
+            "average_rating", "rating_count", "student_count", "lecture_count",
+        ]
+
+
+class StudentCourseCardSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ["id", "course_id", "slug", "title", "image", "language", "level"]
+        model = api_models.Course
+
+class CartItemSerializer(serializers.ModelSerializer):
+    # Compact cart row for the cart page: the course card instead of the nested course
+    course = StudentCourseCardSerializer(read_only=True)
+
+    class Meta:
+        fields = ["id", "cart_id", "course", "price", "tax_fee", "total", "country", "date"]
+        model = api_models.Cart
+
+class StudentCourseProgressSerializer(serializers.ModelSerializer):
+    # Compact enrollment for course lists: the progress counters instead of the nested curriculum
+    course = StudentCourseCardSerializer(read_only=True)
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        fields = ["id", "enrollment_id", "date", "course", "completed_lessons", "total_lessons", "progress", "last_activity"]
+        model = api_models.EnrolledCourse
+
+
+class ProgressSyncEntrySerializer(serializers.Serializer):
+    variant_item_id = serializers.CharField()
+    completed = serializers.BooleanField()
+    client_timestamp = serializers.DateTimeField(required=False, allow_null=True)
+
+class ProgressSyncSerializer(serializers.Serializer):
+    enrollment_id = serializers.CharField()
+    entries = ProgressSyncEntrySerializer(many=True, allow_empty=True, max_length=500)
+
+
 class StudentSummarySerializer(serializers.Serializer):
     total_courses = serializers.IntegerField(default=0)
     completed_lessons = serializers.IntegerField(default=0)
     achieved_certificates = serializers.IntegerField(default=0)
 
+class TeacherStudentSerializer(serializers.Serializer):
+    full_name = serializers.CharField()
+    image = serializers.SerializerMethodField()
+    country = serializers.CharField(allow_blank=True)
+    date = serializers.DateTimeField()
+
+    def get_image(self, obj):
+        return default_storage.url(obj["image"]) if obj["image"] else None
+
 class TeacherSummarySerializer(serializers.Serializer):
     total_courses = serializers.IntegerField(default=0)
     total_students = serializers.IntegerField(default=0)
@@ -633,11 +596,23 @@ class TeacherSummarySerializer(serializers.Serializer):
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField(required=True)
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = api_models.UploadSession
+        fields = ["upload_id", "filename", "content_type", "size", "received", "status", "url", "metadata", "error", "created_at"]
+        read_only_fields = ["upload_id", "received", "status", "url", "metadata", "error", "created_at"]
+
 class UserDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = api_models.UserDocument
         fields = '__all__'
 
+class AgentJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = api_models.AgentJob
+        fields = ["job_id", "kind", "status", "attempts", "max_attempts", "progress", "result", "error", "run_after", "created_at", "updated_at"]
+
 class SimpleNestedTopReviewSerializer(serializers.Serializer):  
     id = serializers.IntegerField()
     review = serializers.CharField()
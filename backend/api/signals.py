@@ -0,0 +1,156 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from api import models as api_models
+from api import search
+from api import teacher_stats
+from api import course_sales
+from api import course_ratings
+from api import progress
+from api import uploads
+from api import cart_pricing
+from api.AITeachingTeam.views_check_global_topic import approved_topic_cache
+
+
+@receiver(post_save, sender=api_models.Course)
+def index_course_on_save(sender, instance, **kwargs):
+    search.index_course(instance)
+
+
+@receiver(post_delete, sender=api_models.Course)
+def remove_course_on_delete(sender, instance, **kwargs):
+    search.remove_course(instance.pk)
+
+
+@receiver(pre_save, sender=api_models.Course)
+def remember_course_teacher(sender, instance, raw=False, **kwargs):
+    instance._previous_teacher_id = None
+    if instance.pk and not raw:
+        instance._previous_teacher_id = (
+            api_models.Course.objects.filter(pk=instance.pk).values_list("teacher_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=api_models.Course)
+def count_course_for_teacher(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_teacher_id = getattr(instance, "_previous_teacher_id", None)
+    if created:
+        teacher_stats.course_added(instance.teacher_id)
+    elif previous_teacher_id != instance.teacher_id:
+        teacher_stats.course_removed(previous_teacher_id)
+        teacher_stats.course_added(instance.teacher_id)
+
+
+@receiver(post_delete, sender=api_models.Course)
+def uncount_course_for_teacher(sender, instance, **kwargs):
+    teacher_stats.course_removed(instance.teacher_id)
+
+
+@receiver(post_save, sender=api_models.EnrolledCourse)
+def count_enrolled_student(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        teacher_stats.student_enrolled(instance)
+
+
+@receiver(post_delete, sender=api_models.EnrolledCourse)
+def uncount_enrolled_student(sender, instance, **kwargs):
+    teacher_stats.student_unenrolled(instance)
+
+
+@receiver(post_save, sender=api_models.Category)
+@receiver(post_save, sender=api_models.Teacher)
+def reindex_related_courses(sender, instance, created, **kwargs):
+    if created:
+        return
+    lookup = "category" if sender is api_models.Category else "teacher"
+    for course in api_models.Course.objects.filter(**{lookup: instance}).select_related("category", "teacher"):
+        search.index_course(course)
+
+
+@receiver(post_save, sender=api_models.ApprovedTopic)
+@receiver(post_delete, sender=api_models.ApprovedTopic)
+def invalidate_approved_topic(sender, instance, **kwargs):
+    approved_topic_cache.delete(instance.normalized_topic)
+
+
+@receiver(post_save, sender=api_models.Country)
+@receiver(post_delete, sender=api_models.Country)
+def invalidate_tax_rates(sender, instance, **kwargs):
+    cart_pricing.invalidate_tax_rates()
+
+
+@receiver(pre_save, sender=api_models.CartOrder)
+def remember_payment_status(sender, instance, raw=False, **kwargs):
+    instance._previous_payment_status = None
+    if instance.pk and not raw:
+        instance._previous_payment_status = (
+            api_models.CartOrder.objects.filter(pk=instance.pk).values_list("payment_status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=api_models.CartOrder)
+def invalidate_sales_on_payment(sender, instance, created, raw=False, **kwargs):
+    # Paid and Refunded orders are the ones the sales report counts
+    if raw or getattr(instance, "_previous_payment_status", None) == instance.payment_status:
+        return
+    if instance.payment_status in course_sales.SOLD_STATUSES or instance._previous_payment_status in course_sales.SOLD_STATUSES:
+        course_sales.invalidate(instance.orderitem.values_list("teacher_id", flat=True))
+
+
+@receiver(post_save, sender=api_models.Review)
+@receiver(post_delete, sender=api_models.Review)
+def invalidate_sales_on_review(sender, instance, **kwargs):
+    teacher_id = api_models.Course.objects.filter(pk=instance.course_id).values_list("teacher_id", flat=True).first()
+    course_sales.invalidate([teacher_id])
+
+
+@receiver(pre_save, sender=api_models.Review)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = course_ratings.counted(api_models.Review.objects.filter(pk=instance.pk).first())
+
+
+@receiver(post_save, sender=api_models.Review)
+def update_course_rating(sender, instance, raw=False, **kwargs):
+    if not raw:
+        course_ratings.review_changed(getattr(instance, "_previous_rating", None), course_ratings.counted(instance))
+
+
+@receiver(post_delete, sender=api_models.Review)
+def remove_course_rating(sender, instance, **kwargs):
+    course_ratings.review_changed(course_ratings.counted(instance), None)
+
+
+@receiver(pre_save, sender=api_models.EnrolledCourse)
+def init_enrollment_progress(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        progress.init_enrollment(instance)
+
+
+@receiver(post_save, sender=api_models.CompletedLesson)
+def count_completed_lesson(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        progress.lesson_completed(instance)
+
+
+@receiver(post_delete, sender=api_models.CompletedLesson)
+def uncount_completed_lesson(sender, instance, **kwargs):
+    progress.lesson_uncompleted(instance)
+
+
+@receiver(post_save, sender=api_models.VariantItem)
+@receiver(post_delete, sender=api_models.VariantItem)
+def count_course_lessons(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    course_id = api_models.Variant.objects.filter(pk=instance.variant_id).values_list("course_id", flat=True).first()
+    progress.curriculum_changed(course_id)
+
+
+@receiver(pre_save, sender=api_models.VariantItem)
+def fill_lesson_duration(sender, instance, raw=False, **kwargs):
+    if not raw:
+        uploads.fill_lesson_duration(instance)
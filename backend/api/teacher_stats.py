@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api import models as api_models
+
+REVENUE_WINDOW_DAYS = 28
+
+
+def _window_start():
+    return timezone.localdate() - timedelta(days=REVENUE_WINDOW_DAYS - 1)
+
+
+def _prune(daily_revenue):
+    start = _window_start().isoformat()
+    return {day: amount for day, amount in daily_revenue.items() if day >= start}
+
+
+def monthly_revenue(stats) -> Decimal:
+    return sum((Decimal(amount) for amount in _prune(stats.daily_revenue).values()), Decimal("0.00"))
+
+
+def rebuild(teacher_id):
+    """Recompute a teacher's stats from the source tables (backfills, repairs, first read)."""
+    paid_items = api_models.CartOrderItem.objects.filter(teacher_id=teacher_id, order__payment_status="Paid")
+    total_revenue = paid_items.aggregate(total=Sum("price"))["total"] or Decimal("0.00")
+    daily = (
+        paid_items.filter(date__date__gte=_window_start())
+        .annotate(day=TruncDate("date"))
+        .values("day")
+        .annotate(amount=Sum("price"))
+        .order_by()
+    )
+
+    stats, _ = api_models.TeacherStats.objects.update_or_create(
+        teacher_id=teacher_id,
+        defaults={
+            "total_courses": api_models.Course.objects.filter(teacher_id=teacher_id).count(),
+            "total_students": api_models.EnrolledCourse.objects.filter(teacher_id=teacher_id, user__isnull=False)
+            .values("user").distinct().count(),
+            "total_revenue": total_revenue,
+            "daily_revenue": {row["day"].isoformat(): str(row["amount"]) for row in daily},
+        },
+    )
+    return stats
+
+
+def get_stats(teacher_id):
+    """The teacher's stats, built on first read; None for an unknown teacher."""
+    stats = api_models.TeacherStats.objects.filter(teacher_id=teacher_id).first()
+    if stats is None and api_models.Teacher.objects.filter(pk=teacher_id).exists():
+        stats = rebuild(teacher_id)
+    return stats
+
+
+def _update(teacher_id, change):
+    # Called after the source rows changed: a missing stats row is rebuilt (which already includes
+    # the change), an existing one is locked and adjusted in place
+    if not teacher_id:
+        return
+    with transaction.atomic():
+        stats = api_models.TeacherStats.objects.select_for_update().filter(teacher_id=teacher_id).first()
+        if stats is None:
+            if api_models.Teacher.objects.filter(pk=teacher_id).exists():
+                rebuild(teacher_id)
+            return
+        change(stats)
+        stats.save()
+
+
+def course_added(teacher_id):
+    def change(stats):
+        stats.total_courses += 1
+    _update(teacher_id, change)
+
+
+def course_removed(teacher_id):
+    def change(stats):
+        stats.total_courses = max(stats.total_courses - 1, 0)
+    _update(teacher_id, change)
+
+
+def _other_enrollments(enrollment):
+    return api_models.EnrolledCourse.objects.filter(teacher_id=enrollment.teacher_id, user_id=enrollment.user_id).exclude(pk=enrollment.pk)
+
+
+# The "other enrollments" checks run inside change(), i.e. under the stats row lock, so two
+# enrollments of the same student committed at the same time cannot both count (or uncount)
+def student_enrolled(enrollment):
+    if not enrollment.user_id:
+        return
+
+    def change(stats):
+        if not _other_enrollments(enrollment).exists():
+            stats.total_students += 1
+    _update(enrollment.teacher_id, change)
+
+
+def student_unenrolled(enrollment):
+    if not enrollment.user_id:
+        return
+
+    def change(stats):
+        if not _other_enrollments(enrollment).exists():
+            stats.total_students = max(stats.total_students - 1, 0)
+    _update(enrollment.teacher_id, change)
+
+
+def _revenue_by_teacher(order_items):
+    window_start = _window_start()
+    per_teacher = defaultdict(lambda: {"students": 0, "total": Decimal("0.00"), "days": defaultdict(Decimal)})
+    for item in order_items:
+        revenue = per_teacher[item.teacher_id]
+        revenue["total"] += Decimal(item.price)
+        day = timezone.localdate(item.date)
+        if day >= window_start:
+            revenue["days"][day.isoformat()] += Decimal(item.price)
+    return per_teacher
+
+
+def _add_revenue(teacher_id, revenue, sign=1):
+    def change(stats):
+        stats.total_students = max(stats.total_students + sign * revenue["students"], 0)
+        stats.total_revenue = max(stats.total_revenue + sign * revenue["total"], Decimal("0.00"))
+        daily = _prune(stats.daily_revenue)
+        for day, amount in revenue["days"].items():
+            total = Decimal(daily.get(day, "0")) + sign * amount
+            if total > 0:
+                daily[day] = str(total)
+            else:
+                daily.pop(day, None)
+        stats.daily_revenue = daily
+    _update(teacher_id, change)
+
+
+def order_paid(order_items, new_student_teachers=()):
+    """
+    Add a freshly paid order to its teachers' stats: the items' revenue and, for the teachers in
+    `new_student_teachers` (the student had no enrollment with them before this order), one more
+    student. Each teacher gets a single _update, so a stats row rebuilt from the source tables,
+    which already include this order, is not adjusted a second time.
+    """
+    per_teacher = _revenue_by_teacher(order_items)
+    for teacher_id in set(new_student_teachers):
+        per_teacher[teacher_id]["students"] = 1
+    for teacher_id, revenue in per_teacher.items():
+        _add_revenue(teacher_id, revenue)
+
+
+def order_refunded(order_items):
+    """Take the items of an order moved from Paid to Refunded out of their teachers' revenue."""
+    for teacher_id, revenue in _revenue_by_teacher(order_items).items():
+        _add_revenue(teacher_id, revenue, sign=-1)
@@ -0,0 +1,46 @@
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_user
+
+
+class AgentJobRequestTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("teacher")
+
+    def post(self, path, **data):
+        return self.client.post(f"/api/v1/{path}", {"user_id": self.user.pk, **data}, content_type="application/json")
+
+    def test_bad_input_is_refused_before_a_job_is_queued(self):
+        cases = [
+            ("professor-agent/", {}, "Missing 'topic' or 'user_id'"),
+            ("academic-advisor-agent/", {"topic": "Django"}, "Missing topic, user_id, or study_duration"),
+            ("academic-advisor-agent/", {"topic": "Django", "study_duration": "  "}, "Missing topic, user_id, or study_duration"),
+            ("research-librarian-agent/", {"topic": "Django", "language": "fr"}, "Invalid language. Use 'en' or 'vi'"),
+            ("research-librarian-agent/", {}, "Topic is required when professor_content is empty or invalid"),
+            ("teaching-assistant-agent/", {}, "Missing required fields: topic or user_id"),
+            ("all-agent/", {"topic": "Django"}, "Missing topic, user_id, or study_duration"),
+            ("all-agent/", {"topic": "Django", "study_duration": "4 weeks", "language": "fr"}, "Language fr not supported"),
+        ]
+        for path, data, error in cases:
+            with self.subTest(path=path, data=data):
+                response = self.post(path, **data)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], error)
+        self.assertFalse(api_models.AgentJob.objects.exists())
+
+    def test_valid_input_is_queued(self):
+        response = self.post("academic-advisor-agent/", topic="Django", study_duration="4 weeks")
+
+        self.assertEqual(response.status_code, 202)
+        job = api_models.AgentJob.objects.get(job_id=response.json()["job_id"])
+        self.assertEqual((job.kind, job.status, job.user), ("advisor", "Queued", self.user))
+
+    def test_all_agents_needs_a_study_duration(self):
+        # The advisor stage plans the course over it, so the whole pipeline is refused without one
+        for data in ({"topic": "Django"}, {"topic": "Django", "study_duration": ""}, {"topic": "Django", "study_duration": " "}):
+            with self.subTest(data=data):
+                self.assertEqual(self.post("all-agent/", **data).status_code, 400)
+
+        response = self.post("all-agent/", topic="Django", study_duration="4 weeks")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(api_models.AgentJob.objects.get().kind, "all_agents")
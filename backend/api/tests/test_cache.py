@@ -0,0 +1,32 @@
+from api.cache import get_cache
+from api.tests.utils import ServiceTestCase, make_user
+
+
+class CacheStatsTests(ServiceTestCase):
+    def test_admins_see_hit_rates_per_namespace(self):
+        tiered = get_cache("test_stats")
+        tiered.get_or_set("key", factory=lambda: "value")
+        tiered.get("key")
+        self.client.force_login(make_user("admin", is_staff=True))
+
+        response = self.client.get("/api/v1/cache/stats/")
+
+        self.assertEqual(response.status_code, 200)
+        stats = {entry["namespace"]: entry for entry in response.json()["caches"]}
+        self.assertGreaterEqual(stats["test_stats"]["l1_hits"], 1)
+        self.assertGreaterEqual(stats["test_stats"]["misses"], 1)
+
+    def test_other_users_are_refused(self):
+        self.client.force_login(make_user("student"))
+        self.assertEqual(self.client.get("/api/v1/cache/stats/").status_code, 403)
+
+
+class GetCacheTests(ServiceTestCase):
+    def test_a_namespace_is_shared_and_keeps_its_options(self):
+        tiered = get_cache("test_options", ttl=60)
+        self.assertIs(get_cache("test_options"), tiered)
+        self.assertIs(get_cache("test_options", ttl=60), tiered)
+
+        with self.assertRaisesMessage(ValueError, "'test_options'"):
+            get_cache("test_options", ttl=3600)
+        self.assertEqual(tiered.ttl, 60)
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from api import cart_pricing
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_teacher
+
+
+class CartPricingTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = make_course(make_teacher(), "Python", "19.99")
+        api_models.Country.objects.create(name="Vietnam", tax_rate=10)
+
+    def test_adding_the_same_course_again_updates_its_row(self):
+        values, created = cart_pricing.add_item("123456", self.course.pk, "Vietnam")
+        self.assertTrue(created)
+        # 10% of 19.99 rounds half up to 2.00
+        self.assertEqual((values["price"], values["tax_fee"], values["total"]), (Decimal("19.99"), Decimal("2.00"), Decimal("21.99")))
+
+        api_models.Course.objects.filter(pk=self.course.pk).update(price=Decimal("9.99"))
+        values, created = cart_pricing.add_item("123456", self.course.pk, "Nowhere")
+        self.assertFalse(created)
+
+        row = api_models.Cart.objects.get(cart_id="123456")
+        self.assertEqual((row.price, row.tax_fee, row.total), (Decimal("9.99"), Decimal("0.00"), Decimal("9.99")))
+        self.assertEqual(row.country, cart_pricing.DEFAULT_COUNTRY)
+
+    def test_tax_rate_changes_are_picked_up(self):
+        cart_pricing.add_item("123456", self.course.pk, "Vietnam")
+        api_models.Country.objects.filter(name="Vietnam").update(tax_rate=20)
+        api_models.Country.objects.get(name="Vietnam").save()
+
+        values, _ = cart_pricing.add_item("123456", self.course.pk, "Vietnam")
+        self.assertEqual(values["tax_fee"], Decimal("4.00"))
+
+    def test_unknown_course_is_refused(self):
+        with self.assertRaises(cart_pricing.CartError) as raised:
+            cart_pricing.add_item("123456", 0, "Vietnam")
+        self.assertEqual(raised.exception.status, 404)
+
+    def test_totals(self):
+        other = make_course(self.course.teacher, "Go", "5.00")
+        cart_pricing.add_item("123456", self.course.pk, "Vietnam")
+        cart_pricing.add_item("123456", other.pk, "Vietnam")
+        self.assertEqual(
+            cart_pricing.totals("123456"),
+            {"price": Decimal("24.99"), "tax": Decimal("2.50"), "total": Decimal("27.49"), "items": 2},
+        )
+        self.assertEqual(cart_pricing.totals("654321")["items"], 0)
+
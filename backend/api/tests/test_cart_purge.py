@@ -0,0 +1,76 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from api import cart_lifecycle
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_teacher, make_user
+
+
+class CartPurgeTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        teacher = make_teacher()
+        self.courses = [make_course(teacher, "Python", "10.00"), make_course(teacher, "Go", "5.00")]
+
+    def cart(self, cart_id, days_ago, user=None, courses=None):
+        touched = timezone.now() - timedelta(days=days_ago)
+        for course in courses or self.courses:
+            api_models.Cart.objects.create(
+                cart_id=cart_id, course=course, user=user, price=course.price, total=course.price, last_touched=touched
+            )
+
+    def cart_ids(self):
+        return set(api_models.Cart.objects.values_list("cart_id", flat=True))
+
+    def test_only_carts_untouched_since_the_cutoff_are_purged(self):
+        self.cart("111111", days_ago=40)
+        self.cart("222222", days_ago=1)
+        # One row added yesterday keeps the whole cart
+        self.cart("333333", days_ago=40, courses=self.courses[:1])
+        self.cart("333333", days_ago=1, courses=self.courses[1:])
+
+        run = cart_lifecycle.purge(days=30, batch_size=1)
+
+        self.assertEqual(self.cart_ids(), {"222222", "333333"})
+        self.assertEqual((run.carts, run.rows, run.total, run.batches), (1, 2, Decimal("15.00"), 1))
+        self.assertIsNotNone(run.finished_at)
+
+    def test_carts_are_deleted_in_batches(self):
+        for i in range(5):
+            self.cart(f"90000{i}", days_ago=40)
+        run = cart_lifecycle.purge(days=30, batch_size=2)
+        self.assertEqual((run.carts, run.rows, run.batches), (5, 10, 3))
+        self.assertEqual(self.cart_ids(), set())
+
+    def test_dry_run_and_guests_only(self):
+        self.cart("111111", days_ago=40)
+        self.cart("222222", days_ago=40, user=make_user("shopper"))
+
+        run = cart_lifecycle.purge(days=30, dry_run=True)
+        self.assertEqual((run.carts, run.rows), (2, 4))
+        self.assertEqual(self.cart_ids(), {"111111", "222222"})
+
+        cart_lifecycle.purge(days=30, guests_only=True)
+        self.assertEqual(self.cart_ids(), {"222222"})
+
+    def test_archive_holds_the_purged_rows(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        self.cart("111111", days_ago=40)
+
+        run = cart_lifecycle.purge(days=30, archive=True, archive_dir=archive_dir)
+
+        with gzip.open(run.archive_path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(sorted((row["cart_id"], row["total"]) for row in rows), [("111111", "10.00"), ("111111", "5.00")])
+
+    def test_touch_keeps_a_cart(self):
+        self.cart("111111", days_ago=40)
+        cart_lifecycle.touch("111111")
+        self.assertEqual(cart_lifecycle.purge(days=30).carts, 0)
@@ -0,0 +1,21 @@
+from api import fulfillment
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+
+class CourseCatalogTests(ServiceTestCase):
+    def test_student_and_lecture_counts(self):
+        teacher = make_teacher()
+        popular = make_course(teacher, "Python")
+        empty = make_course(teacher, "Go")
+        variant = api_models.Variant.objects.create(course=popular, title="Basics")
+        for i in range(3):
+            api_models.VariantItem.objects.create(variant=variant, title=f"Lesson {i}")
+        for name in ("ann", "bob"):
+            fulfillment.fulfill(make_order(make_user(name), [popular]).oid)
+
+        response = self.client.get("/api/v1/course/catalog/")
+
+        self.assertEqual(response.status_code, 200)
+        counts = {course["id"]: (course["student_count"], course["lecture_count"]) for course in response.json()["results"]}
+        self.assertEqual(counts, {popular.pk: (2, 3), empty.pk: (0, 0)})
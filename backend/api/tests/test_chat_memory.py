@@ -0,0 +1,70 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+from qdrant_client import QdrantClient
+
+from api import ai_agent
+
+
+class ChatMemoryTests(SimpleTestCase):
+    """The shared chatbot agent against a local in-memory Qdrant, with Gemini stubbed out."""
+
+    def setUp(self):
+        super().setUp()
+        self.prompts = []
+        patches = [
+            mock.patch.object(ai_agent, "_support_agent", None),
+            mock.patch.object(ai_agent, "QdrantClient", lambda **kwargs: QdrantClient(":memory:")),
+            mock.patch.object(ai_agent.genai, "embed_content", return_value={"embedding": [0.1] * 768}),
+            mock.patch.object(ai_agent.genai, "GenerativeModel", return_value=mock.Mock(generate_content=self.reply)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.agent = ai_agent.get_support_agent()
+
+    def reply(self, messages):
+        prompt = messages[0]["parts"][0]
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=f"Reply {len(self.prompts)}")
+
+    def history(self, user_id):
+        return sorted(memory["text"] for memory in self.agent.get_user_conversation_history(user_id))
+
+    def test_one_agent_keeps_each_users_memory_apart(self):
+        self.assertIs(ai_agent.get_support_agent(), self.agent)
+
+        self.agent.handle_query("My name is Lan", user_id="1")
+        self.agent.handle_query("My name is Minh", user_id="2")
+        second = ai_agent.get_support_agent().handle_query("What is my name?", user_id="2")
+
+        self.assertTrue(second["has_context"])
+        self.assertIn("My name is Minh", self.prompts[-1])
+        self.assertNotIn("My name is Lan", self.prompts[-1])
+        self.assertEqual(self.history("1"), ["My name is Lan", "Reply 1"])
+        self.assertEqual(self.history("2"), ["My name is Minh", "Reply 2", "Reply 3", "What is my name?"])
+
+        self.agent.clear_user_memory("2")
+        self.assertEqual(self.history("2"), [])
+        self.assertEqual(len(self.history("1")), 2)
+
+    def test_cleanup_command_removes_only_old_memories(self):
+        now = self.agent._get_vietnam_time()
+        with mock.patch.object(self.agent, "_get_vietnam_time", return_value=now - timedelta(days=31)):
+            self.agent.add_memory("Last month", user_id="1")
+        self.agent.add_memory("Today", user_id="1")
+
+        call_command("cleanup_chat_memories", stdout=mock.Mock())
+        self.assertEqual(self.history("1"), ["Today"])
+
+        call_command("cleanup_chat_memories", days=0, stdout=mock.Mock())
+        self.assertEqual(self.history("1"), [])
+
+    def test_cleanup_command_fails_when_qdrant_does(self):
+        with mock.patch.object(self.agent.qdrant_client, "delete", side_effect=ConnectionError("down")):
+            with self.assertRaisesMessage(CommandError, "Failed to clean up chat memories."):
+                call_command("cleanup_chat_memories", stdout=mock.Mock())
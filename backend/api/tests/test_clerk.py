@@ -0,0 +1,117 @@
+import json
+from unittest import mock
+
+import jwt
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from api import clerk
+from api.tests.utils import ServiceTestCase
+
+
+def make_jwk(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return {**json.loads(RSAAlgorithm.to_jwk(private_key.public_key())), "kid": kid, "use": "sig"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+
+class StubSession:
+    """Stands in for requests.Session: serves `keys` as Clerk's JWKS, or fails while `down`."""
+
+    def __init__(self, keys, max_age=3600):
+        self.keys = keys
+        self.max_age = max_age
+        self.down = False
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        if self.down:
+            raise requests.ConnectionError("Clerk is unreachable")
+        return mock.Mock(
+            headers={"Cache-Control": f"public, max-age={self.max_age}"},
+            json=mock.Mock(return_value={"keys": self.keys}),
+            raise_for_status=mock.Mock(),
+        )
+
+
+class KeyStoreTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.clock = Clock()
+        patch = mock.patch.object(clerk, "time", self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.first, self.second = make_jwk("first"), make_jwk("second")
+        self.session = StubSession([self.first])
+        self.store = self.make_store()
+
+    def make_store(self):
+        store = clerk.KeyStore("https://clerk.example.com/.well-known/jwks.json", cache_key="test:jwks")
+        store._session = self.session
+        return store
+
+    def test_keys_are_fetched_once_for_their_max_age(self):
+        self.session.max_age = 600
+        self.store.get_key("first")
+        self.clock.now += 400
+        self.store.get_key("first")
+        self.assertEqual(self.session.calls, 1)
+
+        self.clock.now += 201
+        self.store.get_key("first")
+        self.assertEqual(self.session.calls, 2)
+
+    def test_other_workers_reuse_the_shared_document(self):
+        self.store.get_key("first")
+        self.assertIsNotNone(self.make_store().get_key("first"))
+        self.assertEqual(self.session.calls, 1)
+
+    def test_a_rotated_key_is_picked_up_on_first_sight(self):
+        self.store.get_key("first")
+        self.session.keys = [self.first, self.second]
+
+        self.assertIsNotNone(self.store.get_key("second"))
+        self.assertEqual(self.session.calls, 2)
+
+    def test_unknown_kids_refetch_at_most_once_per_interval(self):
+        self.store.get_key("first")
+        for _ in range(3):
+            with self.assertRaisesMessage(jwt.InvalidTokenError, "Public key not found."):
+                self.store.get_key("forged")
+        self.assertEqual(self.session.calls, 2)
+
+        self.clock.now += clerk.UNKNOWN_KID_REFETCH
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.store.get_key("forged")
+        self.assertEqual(self.session.calls, 3)
+
+    def test_cached_keys_outlive_an_outage(self):
+        key = self.store.get_key("first")
+        self.session.down = True
+        self.clock.now += clerk.DEFAULT_TTL + 1
+
+        self.assertEqual(self.store.get_key("first").public_numbers(), key.public_numbers())
+        self.assertEqual(self.store.get_key("first").public_numbers(), key.public_numbers())
+        # One failed attempt, then the cached keys until the retry interval has passed
+        self.assertEqual(self.session.calls, 2)
+
+        self.session.down = False
+        self.clock.now += clerk.UNKNOWN_KID_REFETCH
+        self.store.get_key("first")
+        self.assertEqual(self.session.calls, 3)
+
+    def test_an_outage_before_the_first_fetch_refuses_tokens(self):
+        self.session.down = True
+        with self.assertRaisesMessage(jwt.InvalidTokenError, "Could not fetch the signing keys"):
+            self.store.get_key("first")
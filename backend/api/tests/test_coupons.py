@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from api import coupons
+from api import fulfillment
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+
+class CouponTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.student = make_user("student")
+        self.course = make_course(self.teacher, "Python", "9.99")
+        self.today = timezone.localdate()
+
+    def make_coupon(self, code="SAVE15", discount=15, **fields):
+        return api_models.Coupon.objects.create(teacher=self.teacher, code=code, discount=discount, **fields)
+
+    def assertRefused(self, order, code, message, status=400):
+        with self.assertRaisesMessage(coupons.CouponError, message) as raised:
+            coupons.apply(order.oid, code)
+        self.assertEqual(raised.exception.status, status)
+
+    def test_each_reason_a_coupon_is_refused_has_its_own_error(self):
+        order = make_order(self.student, [self.course])
+        self.make_coupon("OFF", active=False)
+        self.make_coupon("SOON", date=self.today + timedelta(days=1))
+        self.make_coupon("OVER", date=self.today - timedelta(days=10), end_date=self.today - timedelta(days=1))
+        self.make_coupon("GONE", max_uses=2, used_count=2)
+
+        self.assertRefused(order, "MISSING", "Coupon Not Found", status=404)
+        self.assertRefused(order, "OFF", "Coupon Is Not Active")
+        self.assertRefused(order, "SOON", "Coupon Is Not Valid Yet")
+        self.assertRefused(order, "OVER", "Coupon Has Expired")
+        self.assertRefused(order, "GONE", "Coupon Usage Limit Reached")
+
+    def test_coupon_is_still_valid_on_its_end_date(self):
+        order = make_order(self.student, [self.course])
+        self.make_coupon(end_date=self.today)
+        self.assertEqual(coupons.apply(order.oid, "SAVE15")[1], 1)
+
+    def test_discount_is_rounded_per_item_and_totals_match(self):
+        other_teacher = make_teacher("other")
+        courses = [self.course, make_course(self.teacher, "Django", "9.99"), make_course(other_teacher, "Go", "20.00")]
+        order = make_order(self.student, courses)
+        self.make_coupon()
+
+        _, items, discount = coupons.apply(order.oid, "SAVE15")
+
+        # 15% of 9.99 is 1.4985, rounded half up to 1.50 on each item of the coupon's teacher only
+        self.assertEqual((items, discount), (2, Decimal("3.00")))
+        totals = dict(api_models.CartOrderItem.objects.filter(order=order).values_list("course__title", "total"))
+        self.assertEqual(totals, {"Python": Decimal("8.49"), "Django": Decimal("8.49"), "Go": Decimal("20.00")})
+        order.refresh_from_db()
+        self.assertEqual((order.total, order.saved), (Decimal("36.98"), Decimal("3.00")))
+        self.assertEqual(order.total, sum(totals.values()))
+
+    def test_applying_twice_is_refused(self):
+        order = make_order(self.student, [self.course])
+        self.make_coupon()
+        coupons.apply(order.oid, "SAVE15")
+        self.assertRefused(order, "SAVE15", "Coupon Already Applied", status=200)
+
+    def test_uses_are_counted_when_the_order_is_paid(self):
+        coupon = self.make_coupon(max_uses=1)
+        abandoned = make_order(make_user("walked_away"), [self.course])
+        order = make_order(self.student, [self.course])
+
+        # An order that is never paid does not use up the coupon
+        coupons.apply(abandoned.oid, "SAVE15")
+        coupons.apply(order.oid, "SAVE15")
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 0)
+
+        fulfillment.fulfill(order.oid)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 1)
+        self.assertEqual(list(coupon.used_by.all()), [self.student])
+        self.assertRefused(make_order(make_user("late"), [self.course]), "SAVE15", "Coupon Usage Limit Reached")
+
+        # A repeated payment callback does not count the use again
+        fulfillment.fulfill(order.oid)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 1)
+
+    def test_refund_gives_the_use_back(self):
+        coupon = self.make_coupon(max_uses=1)
+        order = make_order(self.student, [self.course])
+        coupons.apply(order.oid, "SAVE15")
+        fulfillment.fulfill(order.oid)
+
+        fulfillment.refund(order.oid)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.used_count, 0)
@@ -0,0 +1,57 @@
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_teacher, make_user
+
+
+class CourseRatingTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        teacher = make_teacher()
+        self.course, self.other = make_course(teacher, "Python"), make_course(teacher, "Go")
+        self.student = make_user("student")
+
+    def review(self, rating, course=None, active=True):
+        return api_models.Review.objects.create(
+            user=self.student, course=course or self.course, review="Nice", rating=rating, active=active
+        )
+
+    def stats(self, course=None):
+        rating = api_models.CourseRating.objects.filter(course=course or self.course).first()
+        return rating and (rating.count, rating.total, rating.histogram())
+
+    def test_new_active_reviews_are_counted(self):
+        self.review(5)
+        self.review("4")
+        self.review(1, active=False)
+
+        self.assertEqual(self.stats(), (2, 9, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}))
+        self.assertEqual(self.course.rating_stats.average(), 4.5)
+
+    def test_edits_move_the_review_between_buckets_and_courses(self):
+        review = self.review(5)
+        self.review(3)
+
+        review.rating = 2
+        review.save()
+        self.assertEqual(self.stats(), (2, 5, {"1": 0, "2": 1, "3": 1, "4": 0, "5": 0}))
+
+        review.active = False
+        review.save()
+        self.assertEqual(self.stats()[:2], (1, 3))
+        review.active = True
+        review.save()
+        self.assertEqual(self.stats()[:2], (2, 5))
+
+        review.course = self.other
+        review.save()
+        self.assertEqual(self.stats()[:2], (1, 3))
+        self.assertEqual(self.stats(self.other)[:2], (1, 2))
+
+    def test_deleted_reviews_are_uncounted(self):
+        kept, deleted = self.review(4), self.review(2)
+        self.review(5, active=False).delete()
+        deleted.delete()
+
+        self.assertEqual(self.stats(), (1, 4, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}))
+        kept.delete()
+        self.assertEqual(self.stats()[:2], (0, 0))
+        self.assertIsNone(self.course.rating_stats.average())
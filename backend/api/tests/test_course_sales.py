@@ -0,0 +1,11 @@
+from api import course_sales
+from api.tests.utils import ServiceTestCase, make_teacher
+
+
+class SalesCacheInvalidationTests(ServiceTestCase):
+    def test_every_invalidation_bumps_the_generation(self):
+        teacher = make_teacher()
+        before = course_sales._generation(teacher.pk)
+        course_sales.invalidate([teacher.pk, teacher.pk])
+        course_sales.invalidate([teacher.pk])
+        self.assertEqual(course_sales._generation(teacher.pk), before + 2)
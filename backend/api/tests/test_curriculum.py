@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import media_cache
+from api import models as api_models
+from api import serializer as api_serializer
+from api.tests.utils import ServiceTestCase, make_teacher
+
+VIDEO = "https://cdn.example.com/lesson.mp4"
+
+
+def fake_probe(url):
+    return {"container": "mp4", "duration": 125.0, "width": 1280, "height": 720}
+
+
+class CurriculumSaveTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.factory = APIRequestFactory()
+
+    def save(self, variants, instance=None):
+        method = self.factory.patch if instance else self.factory.post
+        data = {"variants": json.dumps(variants)}
+        if instance is None:
+            data.update({"title": "Course", "teacher": self.teacher.pk})
+        request = Request(method("/", data, format="multipart"), parsers=[MultiPartParser()])
+        serializer = api_serializer.CourseSerializer(
+            instance, data=request.data, partial=instance is not None, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_media_is_probed_outside_the_transaction(self):
+        depth = len(connection.atomic_blocks)
+        probe_depths = []
+        lookup = media_cache.lookup
+
+        def spy(urls, probe=True):
+            if probe:
+                probe_depths.append(len(connection.atomic_blocks))
+            return lookup(urls, probe=probe)
+
+        variants = [{"title": "Intro", "items": [{"title": "Welcome", "file": VIDEO}]}]
+        with mock.patch.object(media_cache, "lookup", spy), mock.patch.object(media_cache, "probe_url", fake_probe):
+            course = self.save(variants)
+
+        self.assertEqual(probe_depths, [depth])
+        item = api_models.VariantItem.objects.get(variant__course=course)
+        self.assertEqual(item.duration.total_seconds(), 125)
+
+    def test_unchanged_files_are_not_probed_again(self):
+        variants = [{"title": "Intro", "items": [{"title": "Welcome", "file": VIDEO}]}]
+        with mock.patch.object(media_cache, "probe_url", fake_probe):
+            course = self.save(variants)
+
+        item = api_models.VariantItem.objects.get(variant__course=course)
+        variant = item.variant
+        update = [{
+            "variant_id": variant.variant_id,
+            "title": "Intro",
+            "items": [{"variant_item_id": item.variant_item_id, "title": "Hello", "file": VIDEO}],
+        }]
+        with mock.patch.object(media_cache, "probe_url") as probe:
+            self.save(update, instance=course)
+        probe.assert_not_called()
+        item.refresh_from_db()
+        self.assertEqual((item.title, item.duration.total_seconds()), ("Hello", 125))
@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+from api import course_sales
+from api import fulfillment
+from api import models as api_models
+from api import teacher_stats
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+
+class FulfillmentTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.course = make_course(self.teacher, "Python", "10.00")
+        self.other_course = make_course(self.teacher, "Django", "25.00")
+        self.student = make_user("student")
+
+    def assertStatsMatchRebuild(self, teacher):
+        def values(stats):
+            daily = {day: Decimal(amount) for day, amount in stats.daily_revenue.items()}
+            return stats.total_students, Decimal(stats.total_revenue), daily
+
+        kept = values(api_models.TeacherStats.objects.get(teacher=teacher))
+        self.assertEqual(kept, values(teacher_stats.rebuild(teacher.pk)))
+
+    def test_paid_order_enrolls_and_notifies(self):
+        order = make_order(self.student, [self.course, self.other_course])
+        result, fulfilled_now = fulfillment.fulfill(order.oid)
+
+        self.assertTrue(fulfilled_now)
+        self.assertEqual(result, {"order_oid": order.oid, "payment_status": "Paid", "enrolled": 2})
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, "Paid")
+        self.assertEqual(api_models.EnrolledCourse.objects.filter(user=self.student).count(), 2)
+        # One for the student, one per item for the teacher
+        self.assertEqual(api_models.Notification.objects.filter(order=order).count(), 3)
+        self.assertEqual(api_models.EmailOutbox.objects.filter(to=[self.student.email]).count(), 2)
+
+    def test_revenue_is_counted_once_when_the_stats_row_is_missing(self):
+        api_models.TeacherStats.objects.filter(teacher=self.teacher).delete()
+        fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+
+        stats = api_models.TeacherStats.objects.get(teacher=self.teacher)
+        self.assertEqual(stats.total_revenue, Decimal("10.00"))
+        self.assertEqual(stats.total_students, 1)
+        self.assertStatsMatchRebuild(self.teacher)
+
+    def test_existing_stats_row_is_adjusted(self):
+        teacher_stats.rebuild(self.teacher.pk)
+        fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+        fulfillment.fulfill(make_order(self.student, [self.other_course]).oid)
+
+        stats = api_models.TeacherStats.objects.get(teacher=self.teacher)
+        self.assertEqual(stats.total_revenue, Decimal("35.00"))
+        # Two orders from the same student count one student
+        self.assertEqual(stats.total_students, 1)
+        self.assertStatsMatchRebuild(self.teacher)
+
+    def test_repeated_callback_fulfills_once(self):
+        order = make_order(self.student, [self.course])
+        fulfillment.fulfill(order.oid)
+        result, fulfilled_now = fulfillment.fulfill(order.oid)
+
+        self.assertFalse(fulfilled_now)
+        self.assertEqual(result["payment_status"], "Paid")
+        self.assertEqual(api_models.EnrolledCourse.objects.filter(user=self.student).count(), 1)
+        self.assertEqual(api_models.Notification.objects.filter(order=order).count(), 2)
+        self.assertEqual(api_models.TeacherStats.objects.get(teacher=self.teacher).total_revenue, Decimal("10.00"))
+        self.assertEqual(api_models.EmailOutbox.objects.filter(to=[self.student.email]).count(), 2)
+
+    def test_course_bought_twice_keeps_one_enrollment(self):
+        fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+        result, _ = fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+        self.assertEqual(result["enrolled"], 0)
+        self.assertEqual(api_models.EnrolledCourse.objects.filter(user=self.student, course=self.course).count(), 1)
+
+    def test_unknown_order(self):
+        with self.assertRaises(fulfillment.OrderNotFound):
+            fulfillment.fulfill("000000")
+
+
+class RefundTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.course = make_course(self.teacher, "Python", "10.00")
+        self.student = make_user("student")
+        self.order = make_order(self.student, [self.course])
+        fulfillment.fulfill(self.order.oid)
+        self.admin = make_user("admin", is_staff=True)
+
+    def refund(self, user=None):
+        self.client.force_login(user or self.admin)
+        return self.client.post(f"/api/v1/payment/refund/{self.order.oid}/")
+
+    def test_refund_updates_stats_rollup_and_sales_report(self):
+        self.assertEqual(course_sales.course_sales(self.teacher.pk)[0]["refunds"], 0)
+
+        response = self.refund()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["payment_status"], "Refunded")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Refunded")
+        self.assertEqual(api_models.TeacherStats.objects.get(teacher=self.teacher).total_revenue, Decimal("0.00"))
+        self.assertFalse(api_models.RevenueRollup.objects.filter(teacher=self.teacher).exists())
+        # The cached report was invalidated by the status change
+        self.assertEqual(course_sales.course_sales(self.teacher.pk)[0]["refunds"], 1)
+        self.assertIsNone(fulfillment.cached_result(self.order.oid))
+
+    def test_refund_twice(self):
+        self.refund()
+        response = self.refund()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(api_models.TeacherStats.objects.get(teacher=self.teacher).total_revenue, Decimal("0.00"))
+
+    def test_only_staff_can_refund(self):
+        response = self.refund(self.student)
+        self.assertEqual(response.status_code, 403)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Paid")
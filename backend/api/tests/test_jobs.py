@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from api import jobs
+from api import models as api_models
+from api.tests.utils import ServiceTestCase
+from userauths.models import User
+
+
+@jobs.register("test_echo")
+def echo(job):
+    return {"echo": job.payload}
+
+
+class EnqueueIdempotencyTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="x")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="x")
+
+    def test_same_key_returns_the_same_job(self):
+        job, created = jobs.enqueue("test_echo", {"n": 1}, user=self.alice, idempotency_key="k1")
+        again, created_again = jobs.enqueue("test_echo", {"n": 2}, user=self.alice, idempotency_key="k1")
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+
+    def test_key_is_scoped_to_the_user(self):
+        job, _ = jobs.enqueue("test_echo", {}, user=self.alice, idempotency_key="shared")
+        other, created = jobs.enqueue("test_echo", {}, user=self.bob, idempotency_key="shared")
+        self.assertTrue(created)
+        self.assertNotEqual(other.pk, job.pk)
+        self.assertEqual(other.user, self.bob)
+
+    def test_key_is_scoped_to_the_kind(self):
+        jobs.register("test_other")(echo)
+        job, _ = jobs.enqueue("test_echo", {}, user=self.alice, idempotency_key="shared")
+        other, created = jobs.enqueue("test_other", {}, user=self.alice, idempotency_key="shared")
+        self.assertTrue(created)
+        self.assertEqual(other.kind, "test_other")
+        self.assertEqual(api_models.AgentJob.objects.count(), 2)
+
+
+@jobs.register("test_flaky")
+def flaky(job):
+    raise jobs.JobError("try again", retry=job.payload.get("retry", True))
+
+
+@jobs.register("test_progress")
+def progress(job):
+    jobs.report_progress(job, "step", "running")
+    return {"done": True}
+
+
+class ClaimAndRetryTests(ServiceTestCase):
+    def enqueue(self, kind, payload=None, **kwargs):
+        job, _ = jobs.enqueue(kind, payload or {}, **kwargs)
+        return job
+
+    def test_a_job_is_claimed_once(self):
+        job = self.enqueue("test_echo")
+        self.assertIsNotNone(jobs.claim(job.pk, "w1"))
+        self.assertIsNone(jobs.claim(job.pk, "w2"))
+        self.assertIsNone(jobs.claim_next("w2"))
+
+    def test_success_stores_the_result(self):
+        job = self.enqueue("test_echo", {"a": 1})
+        jobs.run_job(jobs.claim_next("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "Succeeded")
+        self.assertEqual(job.result, {"echo": {"a": 1}})
+        self.assertIsNone(job.locked_by)
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        job = self.enqueue("test_flaky", max_attempts=2)
+        with self.assertLogs("api.jobs", "ERROR"):
+            jobs.run_job(jobs.claim_next("w1"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("Queued", 1))
+        self.assertGreater(job.run_after, timezone.now())
+        # Not due yet
+        self.assertIsNone(jobs.claim_next("w1"))
+
+        api_models.AgentJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs("api.jobs", "ERROR"):
+            jobs.run_job(jobs.claim_next("w1"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("Failed", 2))
+
+    def test_permanent_failure_is_not_retried(self):
+        job = self.enqueue("test_flaky", {"retry": False})
+        with self.assertLogs("api.jobs", "ERROR"):
+            jobs.run_job(jobs.claim_next("w1"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("Failed", 1))
+
+    def test_stale_job_is_reclaimed(self):
+        job = self.enqueue("test_echo")
+        jobs.claim(job.pk, "w1")
+        stale = timezone.now() - timedelta(seconds=jobs.LOCK_TIMEOUT + 1)
+        api_models.AgentJob.objects.filter(pk=job.pk).update(locked_at=stale)
+        reclaimed = jobs.claim_next("w2")
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ("w2", 2))
+
+    def test_progress_refreshes_the_lock(self):
+        job = self.enqueue("test_progress")
+        claimed = jobs.claim(job.pk, "w1")
+        old = timezone.now() - timedelta(seconds=jobs.LOCK_TIMEOUT - 1)
+        api_models.AgentJob.objects.filter(pk=job.pk).update(locked_at=old)
+        claimed.locked_at = old
+        jobs.report_progress(claimed, "step", "running")
+        job.refresh_from_db()
+        self.assertGreater(job.locked_at, old)
+        self.assertEqual(job.progress["step"]["status"], "running")
+        # Fresh lock: nobody else can take the job
+        self.assertIsNone(jobs.claim_next("w2"))
+
+    def test_worker_that_lost_the_job_does_not_overwrite_it(self):
+        job = self.enqueue("test_progress")
+        first = jobs.claim(job.pk, "w1")
+        stale = timezone.now() - timedelta(seconds=jobs.LOCK_TIMEOUT + 1)
+        api_models.AgentJob.objects.filter(pk=job.pk).update(locked_at=stale)
+        jobs.claim_next("w2")
+
+        with self.assertLogs("api.jobs", "WARNING"):
+            jobs.run_job(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ("Running", "w2"))
+        self.assertEqual(job.progress, {})
+
+    def test_result_of_a_lost_job_is_discarded(self):
+        job = self.enqueue("test_echo")
+        first = jobs.claim(job.pk, "w1")
+        api_models.AgentJob.objects.filter(pk=job.pk).update(locked_by="w2")
+        with self.assertLogs("api.jobs", "WARNING"):
+            jobs.run_job(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ("Running", "w2"))
+        self.assertIsNone(job.result)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from requests.exceptions import ConnectionError, Timeout
+
+from api.AITeachingTeam import link_validator
+from api.tests.utils import ServiceTestCase
+
+
+class LinkValidatorTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = mock.Mock()
+        patcher = mock.patch.object(link_validator, "get_session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_returns(self, status_code):
+        response = mock.MagicMock(status_code=status_code)
+        response.__enter__.return_value = response
+        self.session.get.return_value = response
+
+    def test_get_is_tried_when_head_fails_to_connect_or_times_out(self):
+        self.get_returns(200)
+        for error in (ConnectionError, Timeout):
+            with self.subTest(error=error.__name__):
+                self.session.head.side_effect = error
+                url = f"https://example.com/{error.__name__}"
+                self.assertTrue(link_validator.check_link(url))
+                self.assertIs(link_validator.cached_verdict(url), True)
+
+    def test_a_missing_page_does_not_condemn_its_host(self):
+        self.session.head.return_value = mock.Mock(status_code=404)
+        self.get_returns(404)
+        self.assertFalse(link_validator.check_link("https://example.com/missing"))
+
+        self.assertIs(link_validator.cached_verdict("https://example.com/missing"), False)
+        self.assertIsNone(link_validator.cached_verdict("https://example.com/alive"))
+
+    def test_an_unreachable_host_is_skipped_for_a_while(self):
+        self.session.head.side_effect = ConnectionError
+        self.session.get.side_effect = Timeout
+        self.assertFalse(link_validator.check_link("https://down.example.com/page"))
+
+        self.assertIs(link_validator.cached_verdict("https://down.example.com/other"), False)
+        self.assertIsNone(link_validator.cached_verdict("https://example.com/page"))
+        self.assertEqual(link_validator.validate_links(["https://down.example.com/other"]), [])
+        self.assertEqual(self.session.get.call_count, 1)
@@ -0,0 +1,96 @@
+import io
+import os
+import struct
+
+from django.test import SimpleTestCase
+
+from api import media
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "media")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class RecordingFile(io.BytesIO):
+    """BytesIO that remembers the largest single read() asked of it."""
+
+    largest_read = 0
+
+    def read(self, size=-1):
+        self.largest_read = max(self.largest_read, size)
+        return super().read(size)
+
+
+class ProbeTests(SimpleTestCase):
+    """The fixtures keep only the container headers of a 7.5 s, 320x240 clip; the media data is cut."""
+
+    def probe(self, data):
+        return media.probe(io.BytesIO(data))
+
+    def test_mp4_with_moov_after_mdat(self):
+        self.assertEqual(
+            self.probe(fixture("sample.mp4")), {"container": "mp4", "duration": 7.5, "width": 320, "height": 240}
+        )
+
+    def test_matroska(self):
+        self.assertEqual(
+            self.probe(fixture("sample.mkv")), {"container": "matroska", "duration": 7.503, "width": 320, "height": 240}
+        )
+
+    def test_webm(self):
+        info = self.probe(fixture("sample.webm"))
+        self.assertEqual((info["container"], info["duration"]), ("matroska", 7.508))
+
+    def test_avi(self):
+        self.assertEqual(
+            self.probe(fixture("sample.avi")), {"container": "avi", "duration": 7.6, "width": 320, "height": 240}
+        )
+
+    def test_truncated_files(self):
+        # Cut inside the headers probe() needs: moov, the Segment Info, the avih main header
+        cuts = {"sample.mp4": (2000, 300, 20), "sample.mkv": (290, 250, 20), "sample.avi": (60, 30, 20)}
+        for name, sizes in cuts.items():
+            data = fixture(name)
+            for size in sizes:
+                with self.subTest(name=name, size=size), self.assertRaises(media.MediaProbeError):
+                    self.probe(data[:size])
+
+    def test_too_small_and_unknown_files(self):
+        for data in (b"", b"RIFF", b"\x00" * 64, b"GIF89a" + b"\x00" * 64):
+            with self.subTest(data=data[:8]), self.assertRaises(media.MediaProbeError):
+                self.probe(data)
+
+    def test_mp4_box_smaller_than_its_header(self):
+        data = bytearray(fixture("sample.mp4"))
+        moov = data.index(b"moov") - 4
+        data[moov:moov + 4] = struct.pack(">I", 4)
+        with self.assertRaisesMessage(media.MediaProbeError, "Corrupt MP4 box"):
+            self.probe(bytes(data))
+
+    def test_matroska_duration_of_odd_length(self):
+        # Duration is a 4 or 8 byte float; a 3 byte one used to escape as struct.error
+        data = fixture("sample.mkv").replace(bytes.fromhex("448988"), bytes.fromhex("448983"), 1)
+        with self.assertRaisesMessage(media.MediaProbeError, "Corrupt EBML float element"):
+            self.probe(data)
+
+    def test_matroska_oversized_number_is_not_read(self):
+        # TimecodeScale claiming 64 GiB: rejected from its size, never read
+        huge = b"\x01" + (64 << 30).to_bytes(7, "big")
+        data = fixture("sample.mkv").replace(bytes.fromhex("2ad7b183"), bytes.fromhex("2ad7b1") + huge, 1)
+        f = RecordingFile(data)
+        with self.assertRaisesMessage(media.MediaProbeError, "Corrupt EBML number element"):
+            media.probe(f)
+        self.assertLess(f.largest_read, 1024)
+
+    def test_corrupt_variable_size_integer(self):
+        data = fixture("sample.mkv")
+        with self.assertRaisesMessage(media.MediaProbeError, "Corrupt EBML variable-size integer"):
+            self.probe(data[:4] + b"\x00" * 16)
+
+    def test_avi_without_main_header(self):
+        data = fixture("sample.avi").replace(b"avih", b"junk", 1)
+        with self.assertRaises(media.MediaProbeError):
+            self.probe(data)
@@ -0,0 +1,68 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from api.AITeachingTeam.orchestrator import AgentPipeline, Stage
+
+
+def run(stages, **options):
+    pipeline = AgentPipeline(stages, **options)
+    return pipeline, [result.name for result in pipeline.run()]
+
+
+class AgentPipelineTests(SimpleTestCase):
+    """Stub agents standing in for the Gemini-backed stages of the all-agents pipeline."""
+
+    def test_stages_wait_for_their_dependencies_and_receive_their_values(self):
+        stages = [
+            Stage("report", lambda inputs: f"{inputs['advisor']} + {inputs['librarian']}", ("advisor", "librarian")),
+            Stage("advisor", lambda inputs: f"plan from {inputs['professor']}", ("professor",)),
+            Stage("librarian", lambda inputs: f"sources for {inputs['professor']}", ("professor",)),
+            Stage("professor", lambda inputs: "lecture"),
+        ]
+        pipeline, order = run(stages)
+
+        self.assertEqual(order[0], "professor")
+        self.assertEqual(set(order[1:3]), {"advisor", "librarian"})
+        self.assertEqual(order[3], "report")
+        self.assertEqual(pipeline.results["report"].value, "plan from lecture + sources for lecture")
+        self.assertTrue(all(result.ok for result in pipeline.results.values()))
+
+    def test_independent_stages_run_at_the_same_time(self):
+        # Each stage waits for the other at the barrier, so running them one after the other would time out
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(inputs):
+            return barrier.wait()
+
+        pipeline, order = run([Stage("advisor", meet), Stage("librarian", meet)], max_workers=2)
+
+        self.assertEqual(set(order), {"advisor", "librarian"})
+        self.assertEqual({result.error for result in pipeline.results.values()}, {None})
+
+    def test_a_failed_stage_skips_its_dependents_only(self):
+        def fail(inputs):
+            raise RuntimeError("Gemini is down")
+
+        stages = [
+            Stage("professor", lambda inputs: "lecture"),
+            Stage("advisor", fail, ("professor",)),
+            Stage("librarian", lambda inputs: "sources", ("professor",)),
+            Stage("report", lambda inputs: "report", ("advisor", "librarian")),
+        ]
+        pipeline, order = run(stages)
+
+        self.assertEqual(set(order), {"professor", "advisor", "librarian", "report"})
+        self.assertEqual(pipeline.results["advisor"].as_dict()["status"], "failed")
+        self.assertEqual(pipeline.results["advisor"].error, "Gemini is down")
+        self.assertTrue(pipeline.results["librarian"].ok)
+        self.assertTrue(pipeline.results["report"].skipped)
+        self.assertEqual(pipeline.results["report"].error, "Skipped because 'advisor' did not complete")
+
+    def test_unknown_dependencies_and_cycles_are_refused(self):
+        with self.assertRaisesMessage(ValueError, "depends on unknown stage(s): missing"):
+            AgentPipeline([Stage("advisor", lambda inputs: None, ("missing",))])
+
+        cycle = AgentPipeline([Stage("a", lambda inputs: None, ("b",)), Stage("b", lambda inputs: None, ("a",))])
+        with self.assertRaisesMessage(ValueError, "Dependency cycle between stages: a, b"):
+            list(cycle.run())
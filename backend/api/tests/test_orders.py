@@ -0,0 +1,65 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError
+
+from api import models as api_models
+from api.tests.utils import ServiceTestCase, make_course, make_teacher, make_user
+
+CREATE_URL = "/api/v1/order/create-order/"
+
+
+class CreateOrderTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana, self.ben = make_teacher("ana"), make_teacher("ben")
+        self.courses = [
+            make_course(self.ana, "Python", "10.00"), make_course(self.ana, "Django", "20.00"), make_course(self.ben, "Go", "30.00")
+        ]
+        for course in self.courses:
+            api_models.Cart.objects.create(
+                cart_id="123456", course=course, price=course.price, tax_fee=Decimal("1.00"), total=course.price + 1
+            )
+        self.student = make_user("student")
+        self.client.force_login(self.student)
+
+    def create_order(self):
+        return self.client.post(
+            CREATE_URL, {"full_name": "Student", "email": "student@example.com", "country": "VN", "cart_id": "123456"}
+        )
+
+    def test_every_cart_item_becomes_an_order_item(self):
+        response = self.create_order()
+        self.assertEqual(response.status_code, 201)
+
+        order = api_models.CartOrder.objects.get(oid=response.json()["order_oid"])
+        self.assertEqual(order.student, self.student)
+        items = order.orderitem.select_related("course")
+        self.assertEqual({item.course_id for item in items}, {course.pk for course in self.courses})
+        self.assertEqual(len({item.oid for item in items}), 3)
+        for item in items:
+            self.assertRegex(item.oid, r"^[0-9]{6}$")
+            self.assertEqual(item.teacher, item.course.teacher)
+        self.assertEqual(
+            (order.sub_total, order.tax_fee, order.total), (Decimal("60.00"), Decimal("3.00"), Decimal("63.00"))
+        )
+        self.assertEqual(set(order.teachers.all()), {self.ana, self.ben})
+
+    def test_a_coupon_discounts_only_its_teachers_items(self):
+        order_oid = self.create_order().json()["order_oid"]
+        api_models.Coupon.objects.create(teacher=self.ana, code="ANA10", discount=10)
+
+        response = self.client.post("/api/v1/order/coupon/", {"order_oid": order_oid, "coupon_code": "ANA10"})
+        self.assertEqual(response.status_code, 201)
+
+        items = api_models.CartOrderItem.objects.filter(order__oid=order_oid)
+        self.assertEqual(dict(items.values_list("course__title", "applied_coupon")), {"Python": True, "Django": True, "Go": False})
+
+    def test_a_failure_leaves_no_partial_order(self):
+        OrderTeacher = api_models.CartOrder.teachers.through
+        with mock.patch.object(OrderTeacher.objects, "bulk_create", side_effect=DatabaseError("boom")):
+            with self.assertRaises(DatabaseError):
+                self.create_order()
+
+        self.assertFalse(api_models.CartOrder.objects.exists())
+        self.assertFalse(api_models.CartOrderItem.objects.exists())
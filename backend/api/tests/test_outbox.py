@@ -0,0 +1,80 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.utils import timezone
+
+from api import models as api_models
+from api import outbox
+from api.tests.utils import ServiceTestCase
+
+
+class OutboxDispatchTests(ServiceTestCase):
+    def queue(self, **fields):
+        fields = {"kind": "test", "to": ["student@example.com"], "subject": "Hello", "body_text": "Hi", **fields}
+        return api_models.EmailOutbox.objects.create(**fields)
+
+    def fail_sending(self):
+        return mock.patch("django.core.mail.EmailMultiAlternatives.send", side_effect=OSError("SMTP down"))
+
+    def test_due_messages_are_sent_once(self):
+        message = self.queue()
+        later = self.queue(run_after=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(outbox.dispatch(), (1, 0))
+        self.assertEqual(outbox.dispatch(), (0, 0))
+
+        self.assertEqual([sent.subject for sent in mail.outbox], ["Hello"])
+        message.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.locked_by), ("Sent", 1, None))
+        self.assertEqual(later.status, "Queued")
+
+    def test_failed_message_is_retried_after_a_backoff(self):
+        message = self.queue()
+        with self.fail_sending():
+            self.assertEqual(outbox.dispatch(), (0, 1))
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.error), ("Queued", 1, "SMTP down"))
+        self.assertGreater(message.run_after, timezone.now())
+        # Not due yet
+        self.assertEqual(outbox.dispatch(), (0, 0))
+
+        api_models.EmailOutbox.objects.filter(pk=message.pk).update(run_after=timezone.now())
+        self.assertEqual(outbox.dispatch(), (1, 0))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.error), ("Sent", 2, None))
+
+    def test_message_is_dead_after_its_last_attempt(self):
+        message = self.queue(max_attempts=2)
+        with self.fail_sending():
+            outbox.dispatch()
+            api_models.EmailOutbox.objects.filter(pk=message.pk).update(run_after=timezone.now())
+            outbox.dispatch()
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("Dead", 2))
+        api_models.EmailOutbox.objects.filter(pk=message.pk).update(run_after=timezone.now())
+        self.assertEqual(outbox.dispatch(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_unreachable_backend_fails_the_whole_batch(self):
+        messages = [self.queue(), self.queue()]
+        refused = mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("refused"))
+        with refused, self.assertLogs("api.outbox", "ERROR"):
+            self.assertEqual(outbox.dispatch(), (0, 2))
+        for message in messages:
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.error), ("Queued", "refused"))
+
+    def test_message_orphaned_while_sending_is_reclaimed(self):
+        stale = timezone.now() - timedelta(seconds=outbox.LOCK_TIMEOUT + 1)
+        orphan = self.queue(status="Sending", locked_by="dead-worker", locked_at=stale, attempts=1)
+        busy = self.queue(status="Sending", locked_by="live-worker", locked_at=timezone.now(), attempts=1)
+
+        self.assertEqual(outbox.dispatch(), (1, 0))
+        orphan.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual((orphan.status, orphan.attempts), ("Sent", 2))
+        self.assertEqual(busy.status, "Sending")
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import override_settings
+
+from api import payments
+from api.tests.utils import ServiceTestCase
+
+
+class FakePayPal(BaseHTTPRequestHandler):
+    """Answers the two PayPal endpoints the client uses; the server object carries the counters."""
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.token_requests += 1
+            token = f"token-{self.server.token_requests}"
+        # Slow enough that concurrent callers all arrive while the first fetch is still running
+        time.sleep(0.2)
+        self.reply(200, {"access_token": token, "expires_in": 32400})
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.order_requests += 1
+        if self.headers["Authorization"] in self.server.revoked:
+            self.reply(401, {"error": "invalid_token"})
+        elif self.path.endswith("/broken"):
+            self.reply(500, {"error": "internal"})
+        else:
+            self.reply(200, {"id": self.path.rsplit("/", 1)[-1], "status": "COMPLETED"})
+
+
+class PayPalClientTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakePayPal)
+        self.server.lock = threading.Lock()
+        self.server.token_requests = self.server.order_requests = 0
+        self.server.revoked = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        url = f"http://127.0.0.1:{self.server.server_port}"
+        settings = override_settings(PAYPAL_API_URL=url, PAYPAL_CLIENT_ID="client", PAYPAL_SECRET_ID="secret")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # A fresh client (so no token from another test) and metrics of this test only
+        for patch in (mock.patch.dict(payments._clients, clear=True), mock.patch.object(payments, "metrics", payments.ProviderMetrics())):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def stats(self):
+        return {(row["provider"], row["operation"]): row for row in payments.metrics.stats()}
+
+    def test_concurrent_callers_share_one_token_fetch(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            orders = list(executor.map(lambda i: payments.paypal().get_order(f"ORDER-{i}"), range(8)))
+
+        self.assertEqual([order["id"] for order in orders], [f"ORDER-{i}" for i in range(8)])
+        self.assertEqual((self.server.token_requests, self.server.order_requests), (1, 8))
+
+        payments.paypal().get_order("ORDER-8")
+        self.assertEqual(self.server.token_requests, 1)
+
+    def test_a_rejected_token_is_replaced_once(self):
+        payments.paypal().get_order("ORDER-1")
+        self.server.revoked.add("Bearer token-1")
+
+        self.assertEqual(payments.paypal().get_order("ORDER-2")["status"], "COMPLETED")
+        self.assertEqual((self.server.token_requests, self.server.order_requests), (2, 3))
+
+    def test_calls_and_errors_are_recorded(self):
+        payments.paypal().get_order("ORDER-1")
+        with self.assertRaisesMessage(payments.PaymentProviderError, "PayPal returned 500"):
+            payments.paypal().get_order("broken")
+
+        stats = self.stats()
+        self.assertEqual((stats["paypal", "oauth_token"]["calls"], stats["paypal", "oauth_token"]["errors"]), (1, 0))
+        self.assertEqual((stats["paypal", "get_order"]["calls"], stats["paypal", "get_order"]["errors"]), (2, 1))
+        self.assertGreaterEqual(stats["paypal", "oauth_token"]["p50_ms"], 200)
+
+    def test_an_unreachable_provider_raises_and_is_counted(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaisesMessage(payments.PaymentProviderError, "PayPal oauth_token failed"):
+            payments.paypal().get_order("ORDER-1")
+        self.assertEqual(self.stats()["paypal", "oauth_token"]["errors"], 1)
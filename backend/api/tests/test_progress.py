@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api import fulfillment
+from api import models as api_models
+from api import progress
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+SYNC_URL = "/api/v1/student/progress-sync/"
+
+
+class ProgressSyncTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        course = make_course(make_teacher(), "Python")
+        variant = api_models.Variant.objects.create(course=course, title="Basics")
+        self.lessons = [api_models.VariantItem.objects.create(variant=variant, title=f"Lesson {i}") for i in range(3)]
+        self.student = make_user("student")
+        fulfillment.fulfill(make_order(self.student, [course]).oid)
+        self.enrollment = api_models.EnrolledCourse.objects.get(user=self.student, course=course)
+        self.client.force_login(self.student)
+
+    def sync(self, *entries, enrollment_id=None):
+        return self.client.post(SYNC_URL, {
+            "enrollment_id": enrollment_id or self.enrollment.enrollment_id,
+            "entries": [
+                {"variant_item_id": lesson.variant_item_id, "completed": completed, "client_timestamp": at.isoformat()}
+                for lesson, completed, at in entries
+            ],
+        }, content_type="application/json")
+
+    def test_completions_are_applied_and_replays_change_nothing(self):
+        now = timezone.now()
+        batch = [(self.lessons[0], True, now), (self.lessons[1], True, now)]
+
+        response = self.sync(*batch)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["applied"], response.json()["completed_lessons"]), (2, 2))
+        self.assertEqual(response.json()["total_lessons"], 3)
+
+        replay = self.sync(*batch).json()
+        self.assertEqual((replay["applied"], replay["completed_lessons"]), (0, 2))
+
+    def test_newest_entry_wins_and_stale_uncompletions_are_ignored(self):
+        now = timezone.now()
+        self.sync((self.lessons[0], True, now))
+
+        stale = self.sync((self.lessons[0], False, now - timedelta(minutes=5))).json()
+        self.assertEqual((stale["applied"], stale["completed_lessons"]), (0, 1))
+
+        newer = self.sync((self.lessons[0], True, now), (self.lessons[0], False, now + timedelta(seconds=1))).json()
+        self.assertEqual((newer["applied"], newer["completed_lessons"], newer["completed_items"]), (1, 0, []))
+
+    def test_uncompleting_counts_once(self):
+        now = timezone.now()
+        self.sync(*[(lesson, True, now) for lesson in self.lessons])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.sync((self.lessons[0], False, now), (self.lessons[1], False, now)).json()
+
+        # One recount and one last_activity update, nothing per deleted row
+        updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "api_enrolledcourse"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(response["completed_lessons"], 1)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+
+    def test_lessons_of_other_courses_are_ignored(self):
+        other = api_models.Variant.objects.create(course=make_course(make_teacher("other"), "Go"), title="Go")
+        foreign = api_models.VariantItem.objects.create(variant=other, title="Goroutines")
+        response = self.sync((foreign, True, timezone.now())).json()
+        self.assertEqual((response["applied"], response["ignored"]), (0, [foreign.variant_item_id]))
+
+    def test_only_the_signed_in_students_enrollments_can_be_synced(self):
+        self.client.force_login(make_user("intruder"))
+        self.assertEqual(self.sync((self.lessons[0], True, timezone.now())).status_code, 404)
+        self.assertFalse(api_models.CompletedLesson.objects.exists())
+
+        self.client.logout()
+        self.assertIn(self.sync((self.lessons[0], True, timezone.now())).status_code, (401, 403))
+
+
+class ProgressCounterTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = make_course(make_teacher(), "Python")
+        self.variant = api_models.Variant.objects.create(course=self.course, title="Basics")
+        self.lessons = [api_models.VariantItem.objects.create(variant=self.variant, title=f"Lesson {i}") for i in range(3)]
+        self.student, self.other = make_user("student"), make_user("other")
+
+    def enroll(self, user):
+        fulfillment.fulfill(make_order(user, [self.course]).oid)
+        return api_models.EnrolledCourse.objects.get(user=user, course=self.course)
+
+    def complete(self, user, lesson):
+        return api_models.CompletedLesson.objects.create(user=user, course=self.course, variant_item=lesson)
+
+    def counters(self, enrollment):
+        enrollment.refresh_from_db()
+        return enrollment.completed_lessons, enrollment.total_lessons
+
+    def test_a_new_enrollment_starts_from_the_existing_lessons_and_completions(self):
+        self.complete(self.student, self.lessons[0])
+        self.assertEqual(self.counters(self.enroll(self.student)), (1, 3))
+        self.assertEqual(self.counters(self.enroll(self.other)), (0, 3))
+
+    def test_completing_and_uncompleting_moves_only_that_students_counter(self):
+        enrollment, other = self.enroll(self.student), self.enroll(self.other)
+        completions = [self.complete(self.student, lesson) for lesson in self.lessons[:2]]
+        self.assertEqual(self.counters(enrollment), (2, 3))
+
+        completions[0].delete()
+        self.assertEqual(self.counters(enrollment), (1, 3))
+        self.assertEqual(self.counters(other), (0, 3))
+
+    def test_the_counter_never_goes_below_zero(self):
+        enrollment = self.enroll(self.student)
+        completion = self.complete(self.student, self.lessons[0])
+        api_models.EnrolledCourse.objects.filter(pk=enrollment.pk).update(completed_lessons=0)
+
+        completion.delete()
+        self.assertEqual(self.counters(enrollment), (0, 3))
+
+    def test_curriculum_changes_update_every_enrollments_total(self):
+        enrollments = [self.enroll(self.student), self.enroll(self.other)]
+        api_models.VariantItem.objects.create(variant=self.variant, title="Lesson 3")
+        self.assertEqual([self.counters(enrollment)[1] for enrollment in enrollments], [4, 4])
+
+        self.lessons[0].delete()
+        self.assertEqual([self.counters(enrollment)[1] for enrollment in enrollments], [3, 3])
+
+
+class ProgressRebuildTests(ServiceTestCase):
+    def test_rebuild_recounts_lessons_and_completions(self):
+        course = make_course(make_teacher(), "Python")
+        variant = api_models.Variant.objects.create(course=course, title="Basics")
+        lessons = [api_models.VariantItem.objects.create(variant=variant, title=f"Lesson {i}") for i in range(2)]
+        student, other = make_user("student"), make_user("other")
+        for user in (student, other):
+            fulfillment.fulfill(make_order(user, [course]).oid)
+        api_models.CompletedLesson.objects.create(user=student, course=course, variant_item=lessons[0])
+        api_models.EnrolledCourse.objects.update(total_lessons=0, completed_lessons=9)
+
+        progress.rebuild()
+
+        counters = dict(api_models.EnrolledCourse.objects.values_list("user__username", "completed_lessons"))
+        self.assertEqual(counters, {"student": 1, "other": 0})
+        self.assertEqual(set(api_models.EnrolledCourse.objects.values_list("total_lessons", flat=True)), {2})
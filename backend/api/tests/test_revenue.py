@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from api import fulfillment
+from api import models as api_models
+from api import revenue
+from api import teacher_stats
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+
+class RevenueRollupTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.course = make_course(self.teacher, "Python", "10.00")
+        self.student = make_user("student")
+
+    def rollup(self):
+        return list(
+            api_models.RevenueRollup.objects.filter(teacher=self.teacher)
+            .order_by("course_id", "day")
+            .values_list("course_id", "day", "revenue", "sales")
+        )
+
+    def chart_total(self):
+        return sum((point["revenue"] for point in revenue.series(self.teacher.pk, "day")), Decimal("0.00"))
+
+    def test_paid_orders_are_counted(self):
+        fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+        fulfillment.fulfill(make_order(make_user("other"), [self.course]).oid)
+        self.assertEqual(self.chart_total(), Decimal("20.00"))
+        kept = self.rollup()
+        revenue.rebuild(self.teacher.pk)
+        self.assertEqual(self.rollup(), kept)
+
+    def test_refunded_orders_are_not_revenue(self):
+        fulfillment.fulfill(make_order(self.student, [self.course]).oid)
+        order = make_order(make_user("other"), [self.course])
+        fulfillment.fulfill(order.oid)
+
+        api_models.CartOrder.objects.filter(pk=order.pk).update(payment_status="Refunded")
+        revenue.order_refunded(order.order_items())
+
+        self.assertEqual(self.chart_total(), Decimal("10.00"))
+        # The chart and the dashboard total agree
+        self.assertEqual(teacher_stats.rebuild(self.teacher.pk).total_revenue, Decimal("10.00"))
+        kept = self.rollup()
+        revenue.rebuild(self.teacher.pk)
+        self.assertEqual(self.rollup(), kept)
+
+    def test_fully_refunded_day_has_no_bucket(self):
+        order = make_order(self.student, [self.course])
+        fulfillment.fulfill(order.oid)
+        api_models.CartOrder.objects.filter(pk=order.pk).update(payment_status="Refunded")
+        revenue.order_refunded(order.order_items())
+        self.assertEqual(self.rollup(), [])
@@ -0,0 +1,35 @@
+from api import models as api_models
+from api import search
+from api.tests.utils import ServiceTestCase, make_course, make_teacher
+
+
+class CourseSearchTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+
+    def test_drafts_do_not_crowd_out_published_courses(self):
+        for i in range(105):
+            make_course(self.teacher, f"Python draft {i}", teacher_course_status="Draft")
+        published = make_course(self.teacher, "Python for beginners")
+
+        response = self.client.get("/api/v1/course/search/", {"query": "python"})
+        self.assertEqual([course["id"] for course in response.json()], [published.pk])
+
+    def test_unpublishing_removes_the_course_from_the_index(self):
+        course = make_course(self.teacher, "Django basics")
+        self.assertEqual(search.search_courses("django"), [course.pk])
+
+        course.platform_status = "Disabled"
+        course.save()
+        self.assertEqual(search.search_courses("django"), [])
+        self.assertFalse(api_models.CourseSearchDocument.objects.filter(course=course).exists())
+
+    def test_an_empty_query_lists_every_published_course(self):
+        courses = [make_course(self.teacher, title) for title in ("Python", "Django", "Go")]
+        make_course(self.teacher, "Rust", teacher_course_status="Draft")
+
+        for params in ({}, {"query": ""}, {"query": "  "}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/v1/course/search/", params)
+                self.assertEqual({course["id"] for course in response.json()}, {course.pk for course in courses})
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from api import fulfillment
+from api import models as api_models
+from api import teacher_stats
+from api.tests.utils import ServiceTestCase, make_course, make_order, make_teacher, make_user
+
+
+class TeacherStatsTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.course = make_course(self.teacher, "Python", "10.00")
+        self.other_course = make_course(self.teacher, "Django", "25.00")
+
+    def stats(self):
+        return api_models.TeacherStats.objects.get(teacher=self.teacher)
+
+    def test_unknown_teacher_has_no_stats(self):
+        self.assertIsNone(teacher_stats.get_stats(999999))
+        self.assertFalse(api_models.TeacherStats.objects.filter(teacher_id=999999).exists())
+        response = self.client.get("/api/v1/teacher/summary/999999/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_summary_of_a_teacher(self):
+        fulfillment.fulfill(make_order(make_user("student"), [self.course]).oid)
+        response = self.client.get(f"/api/v1/teacher/summary/{self.teacher.pk}/")
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()[0]
+        self.assertEqual((summary["total_courses"], summary["total_students"]), (2, 1))
+        self.assertEqual(Decimal(str(summary["total_revenue"])), Decimal("10.00"))
+
+    def test_a_student_counts_once_per_teacher(self):
+        student = make_user("student")
+        items = make_order(student, [self.course, self.other_course]).order_items()
+        first, second = [
+            api_models.EnrolledCourse.objects.create(course=item.course, user=student, teacher=self.teacher, order_item=item)
+            for item in items
+        ]
+        self.assertEqual(self.stats().total_students, 1)
+
+        first.delete()
+        self.assertEqual(self.stats().total_students, 1)
+        second.delete()
+        self.assertEqual(self.stats().total_students, 0)
+
+    def test_refund_takes_the_order_out_of_the_revenue(self):
+        student = make_user("student")
+        fulfillment.fulfill(make_order(student, [self.course]).oid)
+        order = make_order(student, [self.other_course])
+        fulfillment.fulfill(order.oid)
+        self.assertEqual(self.stats().total_revenue, Decimal("35.00"))
+
+        api_models.CartOrder.objects.filter(pk=order.pk).update(payment_status="Refunded")
+        teacher_stats.order_refunded(order.order_items())
+
+        stats = self.stats()
+        self.assertEqual(stats.total_revenue, Decimal("10.00"))
+        self.assertEqual(teacher_stats.monthly_revenue(stats), Decimal("10.00"))
+        rebuilt = teacher_stats.rebuild(self.teacher.pk)
+        self.assertEqual(rebuilt.total_revenue, Decimal("10.00"))
@@ -0,0 +1,102 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from api import models as api_models
+from api import uploads
+from api.tests.utils import ServiceTestCase, make_user
+
+
+class UploadExpiryTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        settings = override_settings(UPLOAD_TEMP_DIR=self.temp_dir, UPLOAD_EXPIRE_HOURS=24)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def age(self, session, hours):
+        api_models.UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(hours=hours))
+
+    def part_path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+    def test_chunks_are_refused_once_the_upload_expired(self):
+        session = uploads.start("lesson.mp4", 10)
+        self.age(session, 25)
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.append_chunk(session.upload_id, 0, io.BytesIO(b"x" * 10), 10, str)
+        self.assertEqual(raised.exception.status, 410)
+
+    def test_purge_deletes_abandoned_uploads_and_their_part_files(self):
+        abandoned = uploads.start("old.mp4", 10)
+        active = uploads.start("new.mp4", 10)
+        uploads.append_chunk(active.upload_id, 0, io.BytesIO(b"x" * 4), 4, str)
+        self.age(abandoned, 25)
+
+        self.assertEqual(uploads.purge_expired(), {"sessions": 1, "files": 0})
+        self.assertFalse(api_models.UploadSession.objects.filter(pk=abandoned.pk).exists())
+        self.assertFalse(os.path.exists(self.part_path(f"{abandoned.upload_id}.part")))
+        self.assertTrue(os.path.exists(self.part_path(f"{active.upload_id}.part")))
+
+    def test_finished_uploads_are_kept(self):
+        session = api_models.UploadSession.objects.create(filename="done.pdf", size=1, received=1, status="Ready")
+        self.age(session, 100)
+        self.assertEqual(uploads.purge_expired(), {"sessions": 0, "files": 0})
+        self.assertTrue(api_models.UploadSession.objects.filter(pk=session.pk).exists())
+
+    def test_purge_removes_old_orphaned_part_files_only(self):
+        old = self.part_path("gone.part")
+        fresh = self.part_path("starting.part")
+        other = self.part_path("notes.txt")
+        for path in (old, fresh, other):
+            open(path, "wb").close()
+        day_ago = time.time() - 25 * 60 * 60
+        os.utime(old, (day_ago, day_ago))
+        os.utime(other, (day_ago, day_ago))
+
+        self.assertEqual(uploads.purge_expired(), {"sessions": 0, "files": 1})
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(other))
+
+
+class UploadSessionAPITests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        settings = override_settings(UPLOAD_TEMP_DIR=self.temp_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.owner = make_user("owner")
+        self.client.force_login(self.owner)
+        response = self.client.post("/api/v1/file-upload/sessions/", {"filename": "lesson.mp4", "size": 10})
+        self.url = f"/api/v1/file-upload/sessions/{response.json()['upload_id']}/"
+
+    def put_chunk(self, data, offset=0):
+        return self.client.put(
+            self.url, data, content_type="application/octet-stream", headers={"Upload-Offset": str(offset)}
+        )
+
+    def test_sessions_belong_to_the_user_who_started_them(self):
+        self.assertEqual(api_models.UploadSession.objects.get().user, self.owner)
+        self.assertEqual(self.put_chunk(b"x" * 4).json()["received"], 4)
+
+        self.client.force_login(make_user("intruder"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.put_chunk(b"y" * 6, offset=4).status_code, 404)
+        self.assertEqual(api_models.UploadSession.objects.get().received, 4)
+
+    def test_anonymous_clients_cannot_upload(self):
+        self.client.logout()
+        self.assertIn(self.client.post("/api/v1/file-upload/sessions/", {"filename": "a.mp4", "size": 1}).status_code, (401, 403))
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+        self.assertIn(self.put_chunk(b"x").status_code, (401, 403))
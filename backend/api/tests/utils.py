@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from api import cache
+from api import models as api_models
+from userauths.models import User
+
+
+@override_settings(
+    JOBS_MODE="worker",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class ServiceTestCase(TestCase):
+    """Runs with a private, empty cache and leaves background work to an (absent) worker."""
+
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        for tiered in cache._registry.values():
+            tiered._l1.clear()
+
+
+def make_user(username, **fields):
+    return User.objects.create_user(username=username, email=f"{username}@example.com", password="x", **fields)
+
+
+def make_teacher(username="teacher"):
+    return api_models.Teacher.objects.create(user=make_user(username), full_name=username.title())
+
+
+def make_course(teacher, title="Course", price="10.00", **fields):
+    return api_models.Course.objects.create(teacher=teacher, title=title, price=Decimal(price), **fields)
+
+
+def make_order(student, courses, **fields):
+    order = api_models.CartOrder.objects.create(student=student, **fields)
+    total = Decimal("0.00")
+    for course in courses:
+        api_models.CartOrderItem.objects.create(
+            order=order, course=course, teacher=course.teacher, price=course.price, total=course.price
+        )
+        total += course.price
+    api_models.CartOrder.objects.filter(pk=order.pk).update(sub_total=total, total=total, initial_total=total)
+    order.refresh_from_db()
+    return order
@@ -0,0 +1,210 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from api import jobs
+from api import media
+from api import media_cache
+from api import models as api_models
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _part_path(session):
+    return os.path.join(settings.UPLOAD_TEMP_DIR, f"{session.upload_id}.part")
+
+
+def expired_before(hours=None):
+    hours = settings.UPLOAD_EXPIRE_HOURS if hours is None else hours
+    return timezone.now() - timedelta(hours=hours)
+
+
+def start(filename, size, content_type="", user=None):
+    """Open a resumable upload; chunks are then sent with append_chunk()."""
+    if size <= 0:
+        raise UploadError("size must be a positive number of bytes")
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Files are limited to {settings.UPLOAD_MAX_SIZE} bytes", status=413)
+
+    session = api_models.UploadSession.objects.create(
+        filename=os.path.basename(filename), size=size, content_type=content_type, user=user
+    )
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    open(_part_path(session), "wb").close()
+    return session
+
+
+def append_chunk(upload_id, offset, stream, length, build_url):
+    """
+    Write the next chunk at `offset`, which must equal the bytes received so far; a client that lost
+    track resumes from `received` (GET the session). The last chunk moves the file into storage.
+    """
+    with transaction.atomic():
+        session = api_models.UploadSession.objects.select_for_update().filter(upload_id=upload_id).first()
+        if session is None:
+            raise UploadError("Upload not found", status=404)
+        if session.status != "Uploading":
+            raise UploadError("Upload is already complete", status=409)
+        if session.updated_at < expired_before():
+            raise UploadError("Upload expired; start a new one", status=410)
+        if offset != session.received:
+            raise UploadError(f"Expected offset {session.received}", status=409)
+        if length is not None and (length > settings.UPLOAD_CHUNK_SIZE or offset + length > session.size):
+            raise UploadError(f"A chunk is limited to {settings.UPLOAD_CHUNK_SIZE} bytes and must not pass the file size")
+
+        limit = min(settings.UPLOAD_CHUNK_SIZE, session.size - offset) if length is None else length
+        with open(_part_path(session), "r+b") as part:
+            # Drop whatever a previous, interrupted attempt at this chunk left behind
+            part.seek(offset)
+            part.truncate()
+            written = 0
+            while written < limit:
+                data = stream.read(min(READ_SIZE, limit - written))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+
+        if length is not None and written != length:
+            raise UploadError(f"Chunk ended after {written} of {length} bytes; resend it from offset {offset}")
+
+        session.received += written
+        session.save(update_fields=["received", "updated_at"])
+
+    if session.received == session.size:
+        _finish(session, build_url)
+    return session
+
+
+def _finish(session, build_url):
+    path = _part_path(session)
+    with open(path, "rb") as part:
+        # Storage.save() copies File.chunks(), never the whole file at once
+        session.path = default_storage.save(session.filename, File(part, name=session.filename))
+    os.remove(path)
+    session.url = build_url(default_storage.url(session.path))
+    session.status = "Uploaded"
+    session.save(update_fields=["path", "url", "status", "updated_at"])
+    ingest_later(session)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired(hours=None):
+    """
+    Delete `Uploading` sessions that received no chunk for `hours` together with their .part
+    files, then .part files that no session owns. Returns {"sessions": n, "files": n}.
+    """
+    cutoff = expired_before(hours)
+    stale = api_models.UploadSession.objects.filter(status="Uploading", updated_at__lt=cutoff)
+    sessions = files = 0
+    for upload_id in list(stale.values_list("upload_id", flat=True)):
+        with transaction.atomic():
+            # Re-checked under the lock: a chunk that arrived since the select keeps the upload alive
+            session = stale.select_for_update().filter(upload_id=upload_id).first()
+            if session is None:
+                continue
+            session.delete()
+            _remove(_part_path(session))
+        sessions += 1
+
+    if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+        live = set(api_models.UploadSession.objects.filter(status="Uploading").values_list("upload_id", flat=True))
+        for name in os.listdir(settings.UPLOAD_TEMP_DIR):
+            upload_id, extension = os.path.splitext(name)
+            path = os.path.join(settings.UPLOAD_TEMP_DIR, name)
+            # Recent files are skipped: start() creates the session just before its .part file
+            if extension != ".part" or upload_id in live or os.path.getmtime(path) >= cutoff.timestamp():
+                continue
+            _remove(path)
+            files += 1
+    return {"sessions": sessions, "files": files}
+
+
+def save_file(uploaded_file, build_url, user=None):
+    """Single-request upload: stream an UploadedFile into storage and queue its ingestion."""
+    if uploaded_file.size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Files are limited to {settings.UPLOAD_MAX_SIZE} bytes", status=413)
+    path = default_storage.save(uploaded_file.name, uploaded_file)
+    session = api_models.UploadSession.objects.create(
+        filename=os.path.basename(uploaded_file.name),
+        content_type=getattr(uploaded_file, "content_type", "") or "",
+        size=uploaded_file.size,
+        received=uploaded_file.size,
+        status="Uploaded",
+        path=path,
+        url=build_url(default_storage.url(path)),
+        user=user,
+    )
+    ingest_later(session)
+    return session
+
+
+def ingest_later(session):
+    if not media.is_video(session.filename):
+        session.status = "Ready"
+        session.save(update_fields=["status", "updated_at"])
+        return
+    jobs.enqueue(
+        "media_ingest",
+        {"upload_id": session.upload_id},
+        user=session.user,
+        idempotency_key=f"media_ingest:{session.upload_id}",
+    )
+
+
+def apply_to_lessons(url, metadata):
+    """Set duration on every lesson that points at this file; returns the number of lessons updated."""
+    if not url or not metadata.get("duration"):
+        return 0
+    duration, content_duration = media.duration_fields(metadata["duration"])
+    return api_models.VariantItem.objects.filter(file=url).update(duration=duration, content_duration=content_duration)
+
+
+def fill_lesson_duration(lesson):
+    """For lessons saved after their upload was ingested (course create / edit forms)."""
+    if not lesson.file or lesson.duration:
+        return
+    seconds = media_cache.durations([lesson.file], probe=False).get(lesson.file)
+    if seconds:
+        lesson.duration, lesson.content_duration = media.duration_fields(seconds)
+
+
+@jobs.register("media_ingest")
+def ingest(job):
+    session = api_models.UploadSession.objects.filter(upload_id=job.payload["upload_id"]).first()
+    if session is None:
+        raise jobs.JobError("Upload not found", retry=False)
+
+    try:
+        with default_storage.open(session.path, "rb") as f:
+            metadata = media.probe(f)
+    except media.MediaProbeError as e:
+        session.status = "Failed"
+        session.error = str(e)
+        session.save(update_fields=["status", "error", "updated_at"])
+        media_cache.store(session.url, error=str(e))
+        raise jobs.JobError(f"Could not read media metadata: {e}", retry=False)
+
+    session.metadata = metadata
+    session.status = "Ready"
+    session.error = None
+    session.save(update_fields=["metadata", "status", "error", "updated_at"])
+    media_cache.store(session.url, metadata)
+    return {"upload_id": session.upload_id, "metadata": metadata, "lessons_updated": apply_to_lessons(session.url, metadata)}
@@ -24,11 +24,13 @@ urlpatterns = [
     # Core Endpoints
     path("course/category/", api_views.CategoryListAPIView.as_view()),
     path("course/course-list/", api_views.CourseListAPIView.as_view()),
+    path("course/catalog/", api_views.CourseCatalogAPIView.as_view()),
     path("course/search/", api_views.SearchCourseAPIView.as_view()),
     path("course/course-detail/<slug>/", api_views.CourseDetailAPIView.as_view()),
     path("course/cart/", api_views.CartAPIView.as_view()),
     path("course/cart-list/<cart_id>/", api_views.CartListAPIView.as_view()),
     path("cart/stats/<cart_id>/", api_views.CartStatsAPIView.as_view()),
+    path("cart/<cart_id>/", api_views.CartSummaryAPIView.as_view()),
     path("course/cart-item-delete/<cart_id>/", api_views.CartItemDeleteAPIView.as_view()),
     path("course/cart-item-delete/<cart_id>/<item_id>/", api_views.CartItemDeleteAPIView.as_view()),
     path("order/create-order/", api_views.CreateOrderAPIView.as_view()),
@@ -36,6 +38,9 @@ urlpatterns = [
     path("order/coupon/", api_views.CouponApplyAPIView.as_view()),
     path("payment/vnpay-checkout/<order_oid>/", api_views.VNPayCheckoutAPIView.as_view()),
     path("payment/payment-success/", api_views.PaymentSuccessAPIView.as_view()),
+    path("payment/provider-metrics/", api_views.PaymentProviderMetricsAPIView.as_view()),
+    path("payment/refund/<order_oid>/", api_views.PaymentRefundAPIView.as_view()),
+    path("cache/stats/", api_views.CacheStatsAPIView.as_view()),
 
 
     # Student API Endpoints
@@ -43,6 +48,7 @@ urlpatterns = [
     path("student/course-list/<user_id>/", api_views.StudentCourseListAPIView.as_view()),
     path("student/course-detail/<user_id>/<enrollment_id>/", api_views.StudentCourseDetailAPIView.as_view()),
     path("student/course-completed/", api_views.StudentCourseCompletedCreateAPIView.as_view()),
+    path("student/progress-sync/", api_views.StudentProgressSyncAPIView.as_view()),
     path("student/course-note/<user_id>/<enrollment_id>/", api_views.StudentNoteCreateAPIView.as_view()),
     path("student/course-note-detail/<user_id>/<enrollment_id>/<note_id>/", api_views.StudentNoteDetailAPIView.as_view()),
     path("student/rate-course/", api_views.StudentRateCourseCreateAPIView.as_view()),
@@ -60,6 +66,7 @@ urlpatterns = [
     path("teacher/student-lists/<teacher_id>/", api_views.TeacherStudentsListAPIVIew.as_view({'get': 'list'})),
     path("teacher/all-months-earning/<teacher_id>/", api_views.TeacherAllMonthEarningAPIView),
     path("teacher/best-course-earning/<teacher_id>/", api_views.TeacherBestSellingCourseAPIView.as_view({'get': 'list'})),
+    path("teacher/earning-series/<teacher_id>/", api_views.TeacherEarningSeriesAPIView.as_view()),
     path("teacher/course-order-list/<teacher_id>/", api_views.TeacherCourseOrdersListAPIView.as_view()),
     path("teacher/question-answer-list/<teacher_id>/", api_views.TeacherQuestionAnswerListAPIView.as_view()),
     path("teacher/coupon-list/<teacher_id>/", api_views.TeacherCouponListCreateAPIView.as_view()),
@@ -79,6 +86,8 @@ urlpatterns = [
 
 
     path("file-upload/", api_views.FileUploadAPIView.as_view()),
+    path("file-upload/sessions/", api_views.UploadSessionCreateAPIView.as_view()),
+    path("file-upload/sessions/<upload_id>/", api_views.UploadSessionAPIView.as_view()),
     path('top-reviews/', api_views.TopReviewsView.as_view()),
 
     path('chat/', api_views.ChatBotAPIView.as_view()),
@@ -91,6 +100,7 @@ urlpatterns = [
     path("research-librarian-agent/", ResearchLibrarianAgentAPIView.as_view()),
     path("teaching-assistant-agent/", TeachingAssistantAgentAPIView.as_view()),
     path("all-agent/", RunAllAgentsAPIView.as_view()),
+    path("jobs/<job_id>/", api_views.AgentJobStatusAPIView.as_view()),
     path("check-global-topic/", CheckGlobalTopicAPIView.as_view()),
 ]
 
@@ -1,44 +1,51 @@
 from django.shortcuts import render, redirect
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.hashers import check_password
-from django.db import models
-from django.db.models import Count
-from django.db.models.functions import ExtractMonth
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce, NullIf
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 
-import hashlib
-import urllib.parse
-import hmac
-import os
-import math
-from .ai_agent import CustomerSupportAIAgent
+from .ai_agent import get_support_agent
 import traceback
+import csv
+import itertools
 
 from api import serializer as api_serializer
 from api import models as api_models
+from api import pagination as api_pagination
+from api import search as api_search
+from api import teacher_stats
+from api import course_sales
+from api import revenue
+from api import progress
+from api import uploads
+from api import outbox
+from api import fulfillment
+from api import payments
+from api import coupons
+from api import cart_pricing
+from api import cache
 from userauths.models import User, Profile
 
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import generics, status, viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, APIView, permission_classes, authentication_classes
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.exceptions import NotFound
 
-from moviepy.editor import VideoFileClip
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 import random
+import shortuuid
 from decimal import Decimal
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 
 def strtobool(val):
     val = val.lower()
@@ -50,9 +57,6 @@ def strtobool(val):
         raise ValueError(f"invalid truth value {val!r}")
 
 
-PAYPAL_CLIENT_ID = settings.PAYPAL_CLIENT_ID
-PAYPAL_SECRET_ID = settings.PAYPAL_SECRET_ID
-
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = api_serializer.MyTokenObtainPairSerializer
 
@@ -94,30 +98,21 @@ class PasswordResetEmailVerifyAPIView(generics.RetrieveAPIView):
             refresh = RefreshToken.for_user(user)
             refresh_token = str(refresh.access_token)
 
-            user.refresh_token = refresh_token
-            user.otp = generate_random_otp()
-            user.save()
-
-            link = f"http://localhost:5173/create-new-password/?otp={user.otp}&uuidb64={uuidb64}&refresh_token={refresh_token}"
-
-            context = {
-                "link": link,
-                "username": user.username
-            }
+            with transaction.atomic():
+                user.refresh_token = refresh_token
+                user.otp = generate_random_otp()
+                user.save()
 
-            subject = "Password Rest Email"
-            text_body = render_to_string("email/password_reset.txt", context)
-            html_body = render_to_string("email/password_reset.html", context)
+                link = f"http://localhost:5173/create-new-password/?otp={user.otp}&uuidb64={uuidb64}&refresh_token={refresh_token}"
 
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                from_email=settings.FROM_EMAIL,
-                to=[user.email],
-                body=text_body
-            )
+                context = {
+                    "link": link,
+                    "username": user.username,
+                    "full_name": user.full_name,
+                }
 
-            msg.attach_alternative(html_body, "text/html")
-            msg.send()
+                # Sent by the outbox dispatcher after commit, never during the request
+                outbox.enqueue("password_reset", user.email, "Password Reset Email", "password_reset", context)
 
             print("link ======", link)
         return user
@@ -178,67 +173,70 @@ class CategoryListAPIView(generics.ListAPIView):
     permission_classes = [AllowAny]
 
 class CourseListAPIView(generics.ListAPIView):
-    queryset = api_models.Course.objects.filter(platform_status="Published", teacher_course_status="Published")
+    queryset = api_models.Course.objects.filter(platform_status="Published", teacher_course_status="Published").select_related("rating_stats")
     serializer_class = api_serializer.CourseSerializer
     permission_classes = [AllowAny]
+
+def count_subquery(queryset, *group_by):
+    # Counts a correlated queryset in a subquery so several counts can be annotated without join fan-out;
+    # group_by is the field(s) the queryset is correlated on
+    counted = queryset.order_by().values(*group_by).annotate(value=Count("pk")).values("value")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+def unique_short_ids(model, field_name, count):
+    # Generate `count` ShortUUID values up front and check them against the table in one query
+    field = model._meta.get_field(field_name)
+    generator = shortuuid.ShortUUID(alphabet=field.alphabet)
+    ids = set()
+    while len(ids) < count:
+        candidates = {field.prefix + generator.random(length=field.length) for _ in range(count - len(ids))} - ids
+        taken = set(model.objects.filter(**{f"{field_name}__in": candidates}).values_list(field_name, flat=True))
+        ids |= candidates - taken
+    return list(ids)
+
+class CourseCatalogAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.CourseCatalogSerializer
+    permission_classes = [AllowAny]
+    pagination_class = api_pagination.CatalogCursorPagination
+
+    def get_queryset(self):
+        queryset = api_models.Course.objects.filter(platform_status="Published", teacher_course_status="Published")
+        return queryset.select_related("category", "teacher").annotate(
+            catalog_average_rating=models.ExpressionWrapper(
+                models.F("rating_stats__total") * 1.0 / NullIf("rating_stats__count", 0), output_field=models.FloatField()
+            ),
+            catalog_rating_count=Coalesce("rating_stats__count", 0),
+            catalog_student_count=count_subquery(api_models.EnrolledCourse.objects.filter(course=OuterRef("pk")), "course"),
+            catalog_lecture_count=count_subquery(
+                api_models.VariantItem.objects.filter(variant__course=OuterRef("pk")), "variant__course"
+            ),
+        )
+
 class CartAPIView(generics.CreateAPIView):
     queryset = api_models.Cart.objects.all()
     serializer_class = api_serializer.CartSerializer
     permission_classes = [AllowAny]
 
     def create(self, request, *args, **kwargs):
-        course_id = request.data['course_id']  
-        user_id = request.data['user_id']
-        price = request.data['price']
-        country_name = request.data['country_name']
+        course_id = request.data['course_id']
+        user_id = request.data.get('user_id')
+        country_name = request.data.get('country_name')
         cart_id = request.data['cart_id']
 
-        course = api_models.Course.objects.filter(id=course_id).first()
-        
-        if user_id != "undefined":
-            user = User.objects.filter(id=user_id).first()
+        if user_id in (None, "", "undefined"):
+            user_id = None
         else:
-            user = None
+            user_id = User.objects.filter(id=user_id).values_list("id", flat=True).first()
 
+        # The price comes from the course, whatever the client sent
         try:
-            country_object = api_models.Country.objects.filter(name=country_name).first()
-            country = country_object.name
-        except:
-            country_object = None
-            country = "United States"
-
-        if country_object:
-            tax_rate = country_object.tax_rate / 100
-        else:
-            tax_rate = 0
-
-        cart = api_models.Cart.objects.filter(cart_id=cart_id, course=course).first()
-
-        if cart:
-            cart.course = course
-            cart.user = user
-            cart.price = price
-            cart.tax_fee = Decimal(price) * Decimal(tax_rate)
-            cart.country = country
-            cart.cart_id = cart_id
-            cart.total = Decimal(cart.price) + Decimal(cart.tax_fee)
-            cart.save()
-
-            return Response({"message": "Cart Updated Successfully"}, status=status.HTTP_200_OK)
-
-        else:
-            cart = api_models.Cart()
-
-            cart.course = course
-            cart.user = user
-            cart.price = price
-            cart.tax_fee = Decimal(price) * Decimal(tax_rate)
-            cart.country = country
-            cart.cart_id = cart_id
-            cart.total = Decimal(cart.price) + Decimal(cart.tax_fee)
-            cart.save()
+            _, created = cart_pricing.add_item(cart_id, course_id, country_name, user_id=user_id)
+        except cart_pricing.CartError as e:
+            return Response({"message": str(e)}, status=e.status)
 
+        if created:
             return Response({"message": "Cart Created Successfully"}, status=status.HTTP_201_CREATED)
+        return Response({"message": "Cart Updated Successfully"}, status=status.HTTP_200_OK)
 
 class CartListAPIView(generics.ListAPIView):
     serializer_class = api_serializer.CartSerializer
@@ -280,35 +278,21 @@ class CartStatsAPIView(generics.RetrieveAPIView):
         return queryset
     
     def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-
-        total_price = 0.00
-        total_tax = 0.00
-        total_total = 0.00
-
-        for cart_item in queryset:
-            total_price += float(self.calculate_price(cart_item))
-            total_tax += float(self.calculate_tax(cart_item))
-            total_total += round(float(self.calculate_total(cart_item)), 2)
-
-        data = {
-            "price": total_price,
-            "tax": total_tax,
-            "total": total_total,
-        }
+        stats = cart_pricing.totals(self.kwargs['cart_id'])
+        return Response({"price": stats["price"], "tax": stats["tax"], "total": stats["total"]})
 
-        return Response(data)
 
-    def calculate_price(self, cart_item):
-        return cart_item.price
-    
-    def calculate_tax(self, cart_item):
-        return cart_item.tax_fee
-
-    def calculate_total(self, cart_item):
-        return cart_item.total
-    
+class CartSummaryAPIView(APIView):
+    """Cart rows and their totals in one response: one query for the rows, one aggregate."""
+    permission_classes = [AllowAny]
 
+    def get(self, request, cart_id):
+        items = api_serializer.CartItemSerializer(cart_pricing.items(cart_id), many=True, context={"request": request}).data
+        stats = cart_pricing.totals(cart_id)
+        return Response({
+            "items": items,
+            "stats": {"price": stats["price"], "tax": stats["tax"], "total": stats["total"]},
+        })
 
 
 class CreateOrderAPIView(generics.CreateAPIView):
@@ -323,48 +307,53 @@ class CreateOrderAPIView(generics.CreateAPIView):
         cart_id = request.data['cart_id']
         user_id = request.user.id
 
-        if user_id != 0:
-            user = User.objects.get(id=user_id)
-        else:
-            user = None
+        user = request.user if user_id else None
 
-        cart_items = api_models.Cart.objects.filter(cart_id=cart_id)
+        cart_items = list(api_models.Cart.objects.filter(cart_id=cart_id).select_related("course__teacher"))
 
         total_price = Decimal(0.00)
         total_tax = Decimal(0.00)
         total_initial_total = Decimal(0.00)
         total_total = Decimal(0.00)
-
-        order = api_models.CartOrder.objects.create(
-            full_name=full_name,
-            email=email,
-            country=country,
-            student=user
-        )
-
-        for c in cart_items:
-            api_models.CartOrderItem.objects.create(
-                order=order,
-                course=c.course,
-                price=c.price,
-                tax_fee=c.tax_fee,
-                total=c.total,
-                initial_total=c.total,
-                teacher=c.course.teacher
+        teacher_ids = set()
+
+        with transaction.atomic():
+            order = api_models.CartOrder.objects.create(
+                full_name=full_name,
+                email=email,
+                country=country,
+                student=user
             )
 
-            total_price += Decimal(c.price)
-            total_tax += Decimal(c.tax_fee)
-            total_initial_total += Decimal(c.total)
-            total_total += Decimal(c.total)
-
-            order.teachers.add(c.course.teacher)
-
-        order.sub_total = total_price
-        order.tax_fee = total_tax
-        order.initial_total = total_initial_total
-        order.total = total_total
-        order.save()
+            order_items = []
+            oids = unique_short_ids(api_models.CartOrderItem, "oid", len(cart_items))
+            for c, oid in zip(cart_items, oids):
+                order_items.append(api_models.CartOrderItem(
+                    oid=oid,
+                    order=order,
+                    course=c.course,
+                    price=c.price,
+                    tax_fee=c.tax_fee,
+                    total=c.total,
+                    initial_total=c.total,
+                    teacher=c.course.teacher
+                ))
+
+                total_price += Decimal(c.price)
+                total_tax += Decimal(c.tax_fee)
+                total_initial_total += Decimal(c.total)
+                total_total += Decimal(c.total)
+                teacher_ids.add(c.course.teacher_id)
+
+            api_models.CartOrderItem.objects.bulk_create(order_items)
+            OrderTeacher = api_models.CartOrder.teachers.through
+            OrderTeacher.objects.bulk_create([OrderTeacher(cartorder=order, teacher_id=teacher_id) for teacher_id in teacher_ids])
+
+            order.sub_total = total_price
+            order.tax_fee = total_tax
+            order.initial_total = total_initial_total
+            order.total = total_total
+            order.save(update_fields=["sub_total", "tax_fee", "initial_total", "total"])
 
         return Response({"message": "Order Created Successfully", "order_oid": order.oid}, status=status.HTTP_201_CREATED)
 
@@ -385,34 +374,15 @@ class CouponApplyAPIView(generics.CreateAPIView):
         order_oid = request.data['order_oid']
         coupon_code = request.data['coupon_code']
 
-        order = api_models.CartOrder.objects.get(oid=order_oid)
-        coupon = api_models.Coupon.objects.filter(code=coupon_code).first()
-
-        if coupon:
-            order_items = api_models.CartOrderItem.objects.filter(order=order, teacher=coupon.teacher)
-            for i in order_items:
-                if not coupon in i.coupons.all():
-                    discount = i.total * coupon.discount / 100
-
-                    i.total -= discount
-                    i.price -= discount
-                    i.saved += discount
-                    i.applied_coupon = True
-                    i.coupons.add(coupon)
-
-                    order.coupons.add(coupon)
-                    order.total -= discount
-                    order.sub_total -= discount
-                    order.saved += discount
-
-                    i.save()
-                    order.save()
-                    coupon.used_by.add(order.student)
-                    return Response({"message": "Coupon Found and Activated", "icon": "success"}, status=status.HTTP_201_CREATED)
-                else:
-                    return Response({"message": "Coupon Already Applied", "icon": "warning"}, status=status.HTTP_200_OK)
-        else:
-            return Response({"message": "Coupon Not Found", "icon": "error"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            _, items, discount = coupons.apply(order_oid, coupon_code)
+        except coupons.CouponError as e:
+            return Response({"message": str(e), "icon": e.icon}, status=e.status)
+
+        return Response(
+            {"message": "Coupon Found and Activated", "icon": "success", "items": items, "discount": discount},
+            status=status.HTTP_201_CREATED,
+        )
         
 class VNPayCheckoutAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.CartOrderSerializer
@@ -426,9 +396,6 @@ class VNPayCheckoutAPIView(generics.CreateAPIView):
             return Response({"message": "Order Not Found"}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            vnp_TmnCode = settings.VNPAY_TMN_CODE
-            vnp_HashSecret = settings.VNPAY_HASH_SECRET
-            vnp_Url = settings.VNPAY_PAYMENT_URL
             vnp_Returnurl = f"{settings.FRONTEND_SITE_URL.rstrip('/')}/payment-success/{order.oid}"
 
             vnd_total = order.total * 26000
@@ -436,7 +403,6 @@ class VNPayCheckoutAPIView(generics.CreateAPIView):
             vnp_params = {
                 'vnp_Version': '2.1.0',
                 'vnp_Command': 'pay',
-                'vnp_TmnCode': vnp_TmnCode,
                 'vnp_Amount': int(vnd_total * 100), 
                 'vnp_CurrCode': 'VND',
                 'vnp_TxnRef': order.oid,
@@ -448,21 +414,7 @@ class VNPayCheckoutAPIView(generics.CreateAPIView):
                 'vnp_CreateDate': datetime.now().strftime('%Y%m%d%H%M%S'),
             }
 
-            input_data = sorted(vnp_params.items())
-            query_string = ''
-            for idx, (key, val) in enumerate(input_data):
-                if idx == 0:
-                    query_string += f"{key}={urllib.parse.quote_plus(str(val))}"
-                else:
-                    query_string += f"&{key}={urllib.parse.quote_plus(str(val))}"
-
-            secure_hash = hmac.new(
-                bytes(vnp_HashSecret, 'utf-8'),
-                bytes(query_string, 'utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-
-            payment_url = f"{vnp_Url}?{query_string}&vnp_SecureHash={secure_hash}"
+            payment_url = payments.vnpay().build_payment_url(vnp_params)
 
             return Response({"payment_url": payment_url}, status=status.HTTP_200_OK)
 
@@ -470,19 +422,6 @@ class VNPayCheckoutAPIView(generics.CreateAPIView):
             return Response({"message": f"Đã xảy ra lỗi khi tạo URL thanh toán VNPay: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def get_access_token(client_id, secret_key):
-    token_url = "https://api.sandbox.paypal.com/v1/oauth2/token"
-    data = {'grant_type': 'client_credentials'}
-    auth = (client_id, secret_key)
-    response = requests.post(token_url, data=data, auth=auth)
-
-    if response.status_code == 200:
-        print("Access TOken ====", response.json()['access_token'])
-        return response.json()['access_token']
-    else:
-        raise Exception(f"Failed to get access token from paypal {response.status_code}")
-    
-
 class PaymentSuccessAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.CartOrderSerializer
     queryset = api_models.CartOrder.objects.all()
@@ -493,107 +432,94 @@ class PaymentSuccessAPIView(generics.CreateAPIView):
         paypal_order_id = request.data.get('paypal_order_id')
         vnp_response_code = request.data.get('vnp_ResponseCode')
         vnp_secure_hash = request.data.get('vnp_SecureHash')
-        vnp_params = dict(request.data)
     
         print("order_oid ====", order_oid)
         print("paypal_order_id ====", paypal_order_id)
 
-        order = api_models.CartOrder.objects.get(oid=order_oid)
-        order_items = api_models.CartOrderItem.objects.filter(order=order)
+        # Repeated callbacks for a fulfilled order are answered without calling the provider again
+        if fulfillment.cached_result(order_oid):
+            return Response({"message": "Already Paid"})
+        order = get_object_or_404(api_models.CartOrder, oid=order_oid)
 
         # Paypal payment success
         if paypal_order_id:
-            paypal_api_url = f"https://api-m.sandbox.paypal.com/v2/checkout/orders/{paypal_order_id}"
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f"Bearer {get_access_token(PAYPAL_CLIENT_ID, PAYPAL_SECRET_ID)}"
-            }
-            response = requests.get(paypal_api_url, headers=headers)
-            if response.status_code == 200:
-                paypal_order_data = response.json()
-                paypal_payment_status = paypal_order_data['status']
-                if paypal_payment_status == "COMPLETED":
-                    if order.payment_status == "Processing":
-                        order.payment_status = "Paid"
-                        order.save()
-                        api_models.Notification.objects.create(user=order.student, order=order, type="Course Enrollment Completed")
-                        for o in order_items:
-                            api_models.Notification.objects.get_or_create(teacher=o.teacher, order=order, order_item=o, type="New Order")
-                            api_models.EnrolledCourse.objects.get_or_create(course=o.course, user=order.student, defaults={"teacher": o.teacher,"order_item": o}
-                        )
-                        return Response({"message": "Payment Successful"})
-                    else:
-                        return Response({"message": "Already Paid"})
+            try:
+                paypal_order_data = payments.paypal().get_order(paypal_order_id)
+            except payments.PaymentProviderError:
+                return Response({"message": "PayPal Error Occured"})
+            paypal_payment_status = paypal_order_data['status']
+            if paypal_payment_status == "COMPLETED":
+                _, fulfilled = fulfillment.fulfill(order.oid)
+                if fulfilled:
+                    return Response({"message": "Payment Successful"})
                 else:
-                    return Response({"message": "Payment Failed"})
+                    return Response({"message": "Already Paid"})
             else:
-                print("PayPal error response:", response.status_code, response.text)
-                return Response({"message": "PayPal Error Occured"})
+                return Response({"message": "Payment Failed"})
 
         if vnp_response_code and vnp_secure_hash:
-            vnp_params = {}
-            for key in request.data:
-                if key.startswith('vnp_') and key not in ['vnp_SecureHash', 'vnp_SecureHashType']:
-                    vnp_params[key] = str(request.data[key])
-
-            sorted_params = sorted(vnp_params.items())
-
-            hash_data = '&'.join(f"{k}={urllib.parse.quote_plus(v)}" for k, v in sorted_params)
-
-            vnp_HashSecret = settings.VNPAY_HASH_SECRET
-            generated_hash = hmac.new(
-                vnp_HashSecret.encode('utf-8'),
-                hash_data.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-
-            if generated_hash.lower() != vnp_secure_hash.lower():
-                print(f"Hash mismatch: {generated_hash} != {vnp_secure_hash}")
-                print(f"Hash data: {hash_data}")
+            if not payments.vnpay().verify(request.data):
                 return Response({"message": "Invalid VNPay signature"}, status=400)
 
             if vnp_response_code == '00':
-                if order.payment_status == "Processing":
-                    order.payment_status = "Paid"
-                    order.vnp_TransactionNo = request.data.get('vnp_TransactionNo')
-                    order.save()
-                    
-                    api_models.Notification.objects.get_or_create(
-                        user=order.student, 
-                        order=order, 
-                        type="Course Enrollment Completed"
-                    )
-                    
-                    for o in order_items:
-                        api_models.Notification.objects.get_or_create(
-                            teacher=o.teacher,
-                            order=order,
-                            order_item=o,
-                            type="New Order",
-                        )
-                        api_models.EnrolledCourse.objects.get_or_create(
-                            course=o.course,
-                            user=order.student,
-                            defaults={
-                                "teacher": o.teacher,
-                                "order_item": o
-                            }
-                        )
-                    
+                _, fulfilled = fulfillment.fulfill(order.oid, vnp_TransactionNo=request.data.get('vnp_TransactionNo'))
+                if fulfilled:
                     return Response({"message": "Payment Successful"})
                 else:
                     return Response({"message": "Already Paid"})
             else:
                 return Response({"message": f"VNPay Payment Failed. Code: {vnp_response_code}"}, status=400)
             
+class PaymentRefundAPIView(APIView):
+    # Refunds are issued at the provider by staff; this records one on the order
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, order_oid):
+        try:
+            result, refunded = fulfillment.refund(order_oid)
+        except fulfillment.OrderNotFound:
+            return Response({"message": "Order Not Found"}, status=status.HTTP_404_NOT_FOUND)
+        if not refunded:
+            return Response({"message": "Only Paid Orders Can Be Refunded", **result}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Order Refunded", **result})
+
+
+class PaymentProviderMetricsAPIView(APIView):
+    # Latency of the payment provider calls made by this worker process
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"providers": payments.metrics.stats()})
+
+
+class CacheStatsAPIView(APIView):
+    # Hit rates of the tiered caches of this worker process, one entry per namespace
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"caches": sorted(cache.cache_stats(), key=lambda stats: stats["namespace"])})
+
+
 class SearchCourseAPIView(generics.ListAPIView):
     serializer_class = api_serializer.CourseSerializer
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        query = self.request.GET.get('query')
-        # learn lms
-        return api_models.Course.objects.filter(title__icontains=query, platform_status="Published", teacher_course_status="Published")
+        query = self.request.GET.get('query', '')
+        published = api_models.Course.objects.filter(
+            platform_status="Published", teacher_course_status="Published"
+        ).select_related("rating_stats")
+        # An empty search lists the whole catalog, as the title filter did
+        if not query.strip():
+            return published
+
+        course_ids = api_search.search_courses(query, limit=100)
+        if not course_ids:
+            return api_models.Course.objects.none()
+
+        # Keep the relevance order returned by the search backend
+        ranking = models.Case(*[models.When(pk=pk, then=position) for position, pk in enumerate(course_ids)])
+        return published.filter(pk__in=course_ids).order_by(ranking)
     
 
 
@@ -623,13 +549,14 @@ class StudentSummaryAPIView(generics.ListAPIView):
         return Response(serializer.data)
     
 class StudentCourseListAPIView(generics.ListAPIView):
-    serializer_class = api_serializer.EnrolledCourseSerializer
+    # Progress bars only; the full curriculum is served by StudentCourseDetailAPIView
+    serializer_class = api_serializer.StudentCourseProgressSerializer
     permission_classes = [AllowAny]
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         user =  User.objects.get(id=user_id)
-        return api_models.EnrolledCourse.objects.filter(user=user)
+        return api_models.EnrolledCourse.objects.filter(user=user).select_related("course").order_by("-date")
     
 
 class StudentCourseDetailAPIView(generics.RetrieveAPIView):
@@ -658,15 +585,50 @@ class StudentCourseCompletedCreateAPIView(generics.CreateAPIView):
         course = api_models.Course.objects.get(id=course_id)
         variant_item = api_models.VariantItem.objects.get(variant_item_id=variant_item_id)
 
-        completed_lessons = api_models.CompletedLesson.objects.filter(user=user, course=course, variant_item=variant_item).first()
+        # The enrollment progress counters are updated by signals inside this transaction
+        with transaction.atomic():
+            completed_lessons = api_models.CompletedLesson.objects.filter(user=user, course=course, variant_item=variant_item).first()
 
-        if completed_lessons:
-            completed_lessons.delete()
-            return Response({"message": "Course marked as not completed"})
+            if completed_lessons:
+                completed_lessons.delete()
+                message = "Course marked as not completed"
+            else:
+                api_models.CompletedLesson.objects.create(user=user, course=course, variant_item=variant_item)
+                message = "Course marked as completed"
 
-        else:
-            api_models.CompletedLesson.objects.create(user=user, course=course, variant_item=variant_item)
-            return Response({"message": "Course marked as completed"})
+        enrollment = api_models.EnrolledCourse.objects.filter(user=user, course=course).first()
+        return Response({
+            "message": message,
+            "completed_lessons": enrollment.completed_lessons if enrollment else 0,
+            "total_lessons": enrollment.total_lessons if enrollment else 0,
+            "progress": enrollment.progress() if enrollment else 0,
+        })
+        
+
+class StudentProgressSyncAPIView(generics.GenericAPIView):
+    """
+    Batched, idempotent lesson completion for one enrollment of the signed-in student:
+    {"enrollment_id", "entries": [{"variant_item_id", "completed", "client_timestamp"}]}
+    """
+    serializer_class = api_serializer.ProgressSyncSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        enrollment = get_object_or_404(
+            api_models.EnrolledCourse, user=request.user, enrollment_id=data["enrollment_id"]
+        )
+        applied, ignored, completed = progress.sync(enrollment, data["entries"])
+
+        return Response({
+            **progress.summary(enrollment),
+            "applied": applied,
+            "ignored": ignored,
+            "completed_items": completed,
+        })
         
 
 class StudentNoteCreateAPIView(generics.ListCreateAPIView):
@@ -724,13 +686,15 @@ class StudentRateCourseCreateAPIView(generics.CreateAPIView):
         user = User.objects.get(id=user_id)
         course = api_models.Course.objects.get(id=course_id)
 
-        api_models.Review.objects.create(
-            user=user,
-            course=course,
-            review=review,
-            rating=rating,
-            active=True,
-        )
+        # The course rating aggregates are updated by a signal inside this transaction
+        with transaction.atomic():
+            api_models.Review.objects.create(
+                user=user,
+                course=course,
+                review=review,
+                rating=rating,
+                active=True,
+            )
 
         return Response({"message": "Review created successfullly"}, status=status.HTTP_201_CREATED)
 
@@ -745,6 +709,10 @@ class StudentRateCourseUpdateAPIView(generics.RetrieveUpdateAPIView):
 
         user = User.objects.get(id=user_id)
         return api_models.Review.objects.get(id=review_id, user=user)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
     
 
 class StudentWishListListCreateAPIView(generics.ListCreateAPIView):
@@ -841,36 +809,15 @@ class TeacherSummaryAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-
-        one_month_ago = datetime.today() - timedelta(days=28)
-
-        total_courses = api_models.Course.objects.filter(teacher=teacher).count()
-        total_revenue = api_models.CartOrderItem.objects.filter(teacher=teacher, order__payment_status="Paid").aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
-        monthly_revenue = api_models.CartOrderItem.objects.filter(teacher=teacher, order__payment_status="Paid", date__gte=one_month_ago).aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
-
-        enrolled_courses = api_models.EnrolledCourse.objects.filter(teacher=teacher)
-        unique_student_ids = set()
-        students = []
-
-        for course in enrolled_courses:
-            if course.user_id not in unique_student_ids:
-                user = User.objects.get(id=course.user_id)
-                student = {
-                    "full_name": user.profile.full_name,
-                    "image": user.profile.image.url,
-                    "country": user.profile.country,
-                    "date": course.date
-                }
-
-                students.append(student)
-                unique_student_ids.add(course.user_id)
+        stats = teacher_stats.get_stats(teacher_id)
+        if stats is None:
+            raise NotFound("Teacher not found")
 
         return [{
-            "total_courses": total_courses,
-            "total_revenue": total_revenue,
-            "monthly_revenue": monthly_revenue,
-            "total_students": len(students),
+            "total_courses": stats.total_courses,
+            "total_revenue": stats.total_revenue,
+            "monthly_revenue": teacher_stats.monthly_revenue(stats),
+            "total_students": stats.total_students,
         }]
     
     def list(self, request, *args, **kwargs):
@@ -886,7 +833,7 @@ class TeacherCourseListAPIView(generics.ListAPIView):
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
         teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Course.objects.filter(teacher=teacher)
+        return api_models.Course.objects.filter(teacher=teacher).select_related("rating_stats")
     
 
 class TeacherReviewListAPIView(generics.ListAPIView):
@@ -908,70 +855,136 @@ class TeacherReviewDetailAPIView(generics.RetrieveUpdateAPIView):
         review_id = self.kwargs['review_id']
         teacher = api_models.Teacher.objects.get(id=teacher_id)
         return api_models.Review.objects.get(course__teacher=teacher, id=review_id)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
     
 
+class CSVEcho:
+    # File-like object for csv.writer that hands each row back instead of buffering it
+    def write(self, value):
+        return value
+
+
+ROSTER_ORDERINGS = {
+    "date": ("date", "user_id"),
+    "-date": ("-date", "-user_id"),
+    "country": ("country", "user_id"),
+    "-country": ("-country", "-user_id"),
+}
+
+
+def teacher_student_roster(teacher_id, country=None, course_id=None):
+    # One row per student, grouped in the database, with the first enrollment date for this teacher
+    enrollments = api_models.EnrolledCourse.objects.filter(teacher_id=teacher_id, user__isnull=False)
+    if course_id:
+        enrollments = enrollments.filter(course__course_id=course_id)
+    if country:
+        enrollments = enrollments.filter(user__profile__country__iexact=country)
+
+    return enrollments.values("user_id").annotate(
+        full_name=models.F("user__profile__full_name"),
+        image=models.F("user__profile__image"),
+        country=Coalesce("user__profile__country", models.Value("")),
+        date=models.Min("date"),
+    )
+
+
 class TeacherStudentsListAPIVIew(viewsets.ViewSet):
+    """
+    Students of a teacher. Optional query params:
+    country, course_id (filters), ordering (date, -date, country, -country),
+    page_size / cursor (keyset pagination), export=csv (streamed download).
+    """
     
     def list(self, request, teacher_id=None):
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
+        ordering = ROSTER_ORDERINGS.get(request.query_params.get("ordering"), ROSTER_ORDERINGS["-date"])
+        roster = teacher_student_roster(
+            teacher_id,
+            country=request.query_params.get("country"),
+            course_id=request.query_params.get("course_id"),
+        )
 
-        enrolled_courses = api_models.EnrolledCourse.objects.filter(teacher=teacher)
-        unique_student_ids = set()
-        students = []
-
-        for course in enrolled_courses:
-            if course.user_id not in unique_student_ids:
-                user = User.objects.get(id=course.user_id)
-                student = {
-                    "full_name": user.profile.full_name,
-                    "image": user.profile.image.url,
-                    "country": user.profile.country,
-                    "date": course.date
-                }
+        if request.query_params.get("export") == "csv":
+            writer = csv.writer(CSVEcho())
+            rows = roster.order_by(*ordering).iterator(chunk_size=2000)
+            content = itertools.chain(
+                [writer.writerow(["full_name", "country", "first_enrolled"])],
+                (writer.writerow([row["full_name"], row["country"], row["date"].isoformat()]) for row in rows),
+            )
+            response = StreamingHttpResponse(content, content_type="text/csv")
+            response["Content-Disposition"] = f'attachment; filename="students-{teacher_id}.csv"'
+            return response
 
-                students.append(student)
-                unique_student_ids.add(course.user_id)
+        if "page_size" in request.query_params or "cursor" in request.query_params:
+            paginator = api_pagination.RosterCursorPagination()
+            paginator.ordering = ordering
+            page = paginator.paginate_queryset(roster, request, view=self)
+            return paginator.get_paginated_response(api_serializer.TeacherStudentSerializer(page, many=True).data)
 
-        return Response(students)
+        return Response(api_serializer.TeacherStudentSerializer(roster.order_by(*ordering), many=True).data)
     
 
 @api_view(("GET", ))
 def TeacherAllMonthEarningAPIView(request, teacher_id):
-    teacher = api_models.Teacher.objects.get(id=teacher_id)
-    monthly_earning_tracker = (
-        api_models.CartOrderItem.objects
-        .filter(teacher=teacher, order__payment_status="Paid")
-        .annotate(
-            month=ExtractMonth("date")
-        )
-        .values("month")
-        .annotate(
-            total_earning=models.Sum("price")
-        )
-        .order_by("month")
-    )
+    # The last 12 calendar months, oldest first, read from the revenue rollup
+    teacher = get_object_or_404(api_models.Teacher, id=teacher_id)
+    monthly_earning_tracker = [
+        {"year": point["period"].year, "month": point["period"].month, "total_earning": point["revenue"]}
+        for point in revenue.series(teacher.id, interval="month")
+    ]
 
     return Response(monthly_earning_tracker)
 
+
+class TeacherEarningSeriesAPIView(APIView):
+    """
+    Revenue time series of a teacher. Optional query params:
+    interval (day, week, month), window / start / end (as for best-course-earning), by_course=true.
+    """
+
+    def get(self, request, teacher_id):
+        teacher = get_object_or_404(api_models.Teacher, id=teacher_id)
+        try:
+            start_day, end_day = course_sales.resolve_window(
+                request.query_params.get("window"),
+                request.query_params.get("start"),
+                request.query_params.get("end"),
+            )
+            points = revenue.series(
+                teacher.id,
+                interval=request.query_params.get("interval", "month"),
+                start_day=start_day,
+                end_day=end_day,
+                by_course=request.query_params.get("by_course") == "true",
+            )
+        except (course_sales.InvalidWindow, revenue.InvalidSeries) as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(points)
+
 class TeacherBestSellingCourseAPIView(viewsets.ViewSet):
+    """
+    Sales of every course of a teacher, best sellers first. Optional query params:
+    window (7d, 30d, 90d, ytd, all), start / end (YYYY-MM-DD, override window), top (limit).
+    """
 
     def list(self, request, teacher_id=None):
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        courses_with_total_price = []
-        courses = api_models.Course.objects.filter(teacher=teacher)
-
-        for course in courses:
-            revenue = course.enrolledcourse_set.aggregate(total_price=models.Sum('order_item__price'))['total_price'] or 0
-            sales = course.enrolledcourse_set.count()
-
-            courses_with_total_price.append({
-                'course_image': course.image.url,
-                'course_title': course.title,
-                'revenue': revenue,
-                'sales': sales,
-            })
+        teacher = get_object_or_404(api_models.Teacher, id=teacher_id)
+        try:
+            start_day, end_day = course_sales.resolve_window(
+                request.query_params.get("window"),
+                request.query_params.get("start"),
+                request.query_params.get("end"),
+            )
+            top = int(request.query_params.get("top") or 0) or None
+        except (course_sales.InvalidWindow, ValueError) as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if top is not None and top < 0:
+            return Response({"message": "top must be a positive number"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(courses_with_total_price)
+        return Response(course_sales.course_sales(teacher.id, start_day, end_day, top))
     
 class TeacherCourseOrdersListAPIView(generics.ListAPIView):
     serializer_class = api_serializer.CartOrderItemSerializer
@@ -1079,7 +1092,7 @@ class TeacherCourseDetailAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         course_id = self.kwargs['course_id']
-        course = api_models.Course.objects.get(course_id=course_id, platform_status="Published", teacher_course_status="Published")
+        course = api_models.Course.objects.select_related("rating_stats").get(course_id=course_id, platform_status="Published", teacher_course_status="Published")
         return course
 class TeacherCourseUpdateAPIView(generics.UpdateAPIView):
     queryset = api_models.Course.objects.all()
@@ -1105,7 +1118,7 @@ class CourseDetailAPIView(generics.RetrieveDestroyAPIView):
 
     def get_object(self):
         slug = self.kwargs['slug']
-        return api_models.Course.objects.get(slug=slug)
+        return api_models.Course.objects.select_related("rating_stats").get(slug=slug)
 
 class CourseVariantDeleteAPIView(generics.DestroyAPIView):
     serializer_class = api_serializer.VariantSerializer
@@ -1160,33 +1173,71 @@ class FileUploadAPIView(APIView):
         if serializer.is_valid():
             file = serializer.validated_data.get("file")
 
-            file_path = default_storage.save(file.name, ContentFile(file.read()))
-            file_url = request.build_absolute_uri(default_storage.url(file_path))
+            # Streamed to storage chunk by chunk; video metadata is read afterwards by the media_ingest job
+            try:
+                session = uploads.save_file(file, request.build_absolute_uri, user=upload_user(request))
+            except uploads.UploadError as e:
+                return Response({"error": str(e)}, status=e.status)
 
-            if file.name.endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                file_full_path = os.path.join(default_storage.location, file_path)
-                clip = VideoFileClip(file_full_path)
-                duration_seconds = clip.duration
+            return Response({
+                "url": session.url,
+                "upload_id": session.upload_id,
+                "status": session.status,
+            })
 
-                minutes, remainder = divmod(duration_seconds, 60)
-                minutes = math.floor(minutes)
-                seconds = math.floor(remainder)
+        return Response({"error": "No file provided"}, status=400)
 
-                duration_text = f"{minutes}m {seconds}s"
 
-                print("url ==========", file_url)
-                print("duration_seconds ==========", duration_seconds)
+def upload_user(request):
+    return request.user if request.user.is_authenticated else None
 
-                return Response({
-                    "url": file_url,
-                    "video_duration": duration_text
-                })
 
-            return Response({
-                    "url": file_url,
-            })
+class UploadSessionCreateAPIView(APIView):
+    """
+    Start a resumable upload: {"filename", "size", "content_type"}.
+    Then PUT each chunk to file-upload/sessions/<upload_id>/ with an Upload-Offset header.
+    """
+    permission_classes = [IsAuthenticated]
 
-        return Response({"error": "No file provided"}, status=400)
+    def post(self, request):
+        serializer = api_serializer.UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = uploads.start(user=request.user, **serializer.validated_data)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        return Response(
+            {**api_serializer.UploadSessionSerializer(session).data, "chunk_size": settings.UPLOAD_CHUNK_SIZE},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class UploadSessionAPIView(APIView):
+    """GET: progress (resume from `received`) and, once ingested, the metadata. PUT: the raw bytes of the next chunk."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        # Only the user who started an upload can see or extend it
+        session = get_object_or_404(api_models.UploadSession, upload_id=upload_id, user=request.user)
+        return Response(api_serializer.UploadSessionSerializer(session).data)
+
+    def put(self, request, upload_id):
+        get_object_or_404(api_models.UploadSession, upload_id=upload_id, user=request.user)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return Response({"error": "Upload-Offset header is required"}, status=status.HTTP_400_BAD_REQUEST)
+        length = int(request.headers["Content-Length"]) if request.headers.get("Content-Length") else None
+        if length == 0 or request.stream is None:
+            return Response({"error": "Empty chunk"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = uploads.append_chunk(upload_id, offset, request.stream, length, request.build_absolute_uri)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        return Response(api_serializer.UploadSessionSerializer(session).data)
 
 
 class ChatBotAPIView(APIView):
@@ -1203,7 +1254,7 @@ class ChatBotAPIView(APIView):
                     "icon": "warning"
                 }, status=400)
 
-            agent = CustomerSupportAIAgent()
+            agent = get_support_agent()
 
             if user_id is None:
                 response = agent.generate_response_only(query)
@@ -1240,7 +1291,7 @@ class GetChatHistoryAPIView(APIView):
                     "icon": "warning"
                 }, status=400)
 
-            agent = CustomerSupportAIAgent()
+            agent = get_support_agent()
             memories = agent.get_user_conversation_history(user_id)
 
             if not memories:
@@ -1277,7 +1328,7 @@ class DeleteChatHistoryAPIView(APIView):
                     "icon": "warning"
                 }, status=400)
 
-            agent = CustomerSupportAIAgent()
+            agent = get_support_agent()
             success = agent.clear_user_memory(user_id)
 
             if success:
@@ -1311,6 +1362,13 @@ class UserDocumentListView(generics.ListAPIView):
         return api_models.UserDocument.objects.filter(user__id=user_id).order_by("-created_at")
 
 
+class AgentJobStatusAPIView(generics.RetrieveAPIView):
+    permission_classes = [AllowAny]
+    serializer_class = api_serializer.AgentJobSerializer
+    queryset = api_models.AgentJob.objects.all()
+    lookup_field = "job_id"
+
+
 
 class TopReviewsView(APIView):
     permission_classes = [AllowAny]
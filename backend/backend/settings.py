@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from datetime import timedelta
 from environs import Env
+from corsheaders.defaults import default_headers
 env = Env()
 env.read_env()
 
@@ -160,7 +161,11 @@ ANYMAIL = {
 }
 
 FROM_EMAIL = env("FROM_EMAIL")
-EMAIL_BACKEND = 'anymail.backends.mailgun.EmailBackend'
+# Emails are queued in EmailOutbox and delivered by `manage.py send_emails` (or the in-process
+# dispatcher when JOBS_MODE=thread). Use django.core.mail.backends.console.EmailBackend or
+# .filebased.EmailBackend (writes to EMAIL_FILE_PATH) for local development and tests.
+EMAIL_BACKEND = env("EMAIL_BACKEND", default='anymail.backends.mailgun.EmailBackend')
+EMAIL_FILE_PATH = env("EMAIL_FILE_PATH", default=str(BASE_DIR / "sent-emails"))
 
 VNPAY_TMN_CODE = env("VNPAY_TMN_CODE")
 VNPAY_HASH_SECRET = env("VNPAY_HASH_SECRET")
@@ -168,6 +173,10 @@ VNPAY_PAYMENT_URL = env("VNPAY_PAYMENT_URL")
 FRONTEND_SITE_URL = env("FRONTEND_SITE_URL")
 PAYPAL_CLIENT_ID = env("PAYPAL_CLIENT_ID")
 PAYPAL_SECRET_ID = env("PAYPAL_SECRET_ID")
+# Point at a local fake provider for tests and benchmarks
+PAYPAL_API_URL = env("PAYPAL_API_URL", default="https://api-m.sandbox.paypal.com")
+# (connect, read) seconds for payment provider calls
+PAYMENT_HTTP_TIMEOUT = (env.float("PAYMENT_HTTP_CONNECT_TIMEOUT", default=3.0), env.float("PAYMENT_HTTP_READ_TIMEOUT", default=10.0))
 
 GEMINI_API_KEY = env("GEMINI_API_KEY")
 SERPAPI_KEY = env("SERPAPI_KEY")
@@ -178,6 +187,65 @@ QDRANT_URL = env("QDRANT_URL")
 CLERK_FRONTEND_API = env("CLERK_FRONTEND_API")
 CLERK_SECRET_KEY = env("CLERK_SECRET_KEY")  
 
+# Course search backend: "sqlite" (FTS5), "postgres" (tsvector) or "python". Defaults to the database vendor.
+SEARCH_BACKEND = env("SEARCH_BACKEND", default=None)
+
+# Shared cache for SerpAPI results, approved topics and generated agent content.
+# Set REDIS_URL in production so every worker shares one cache; locally a file cache survives restarts.
+REDIS_URL = env("REDIS_URL", default=None)
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "lms",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": env("CACHE_DIR", default=str(BASE_DIR / "cache")),
+            "KEY_PREFIX": "lms",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+AGENT_OUTPUT_CACHE_TTL = env.int("AGENT_OUTPUT_CACHE_TTL", default=24 * 60 * 60)
+
+# Gemini generations keyed by model + prompt + config, kept on disk (see `manage.py generation_cache_stats`)
+GENERATION_CACHE_ENABLED = env.bool("GENERATION_CACHE_ENABLED", default=True)
+GENERATION_CACHE_PATH = env("GENERATION_CACHE_PATH", default=str(BASE_DIR / "cache" / "generations.sqlite3"))
+GENERATION_CACHE_MAX_BYTES = env.int("GENERATION_CACHE_MAX_BYTES", default=256 * 1024 * 1024)
+GENERATION_CACHE_TTL = env.int("GENERATION_CACHE_TTL", default=7 * 24 * 60 * 60)
+# Agents that always call Gemini: professor, advisor, librarian, assistant. Topic checks and suggestions are never
+# cached, since a repeated check must be able to suggest new topics.
+GENERATION_CACHE_DISABLED_AGENTS = env.list("GENERATION_CACHE_DISABLED_AGENTS", default=[])
+
+# "worker" leaves jobs to `manage.py run_jobs` and emails to `manage.py send_emails`, run as separate processes.
+# "thread" runs both in a thread of the web process and "inline" during the request: for local development only,
+# since Gemini generation then competes with the request workers.
+JOBS_MODE = env("JOBS_MODE", default="worker")
+JOBS_CONCURRENCY = env.int("JOBS_CONCURRENCY", default=2)
+
+# Resumable uploads (file-upload/sessions/): chunks are staged here until the file is complete. The chunks of one
+# upload may reach any web process, so with more than one host this must be a volume they all mount.
+UPLOAD_TEMP_DIR = env("UPLOAD_TEMP_DIR", default=str(BASE_DIR / "uploads-tmp"))
+UPLOAD_CHUNK_SIZE = env.int("UPLOAD_CHUNK_SIZE", default=8 * 1024 * 1024)
+UPLOAD_MAX_SIZE = env.int("UPLOAD_MAX_SIZE", default=10 * 1024 * 1024 * 1024)
+# An upload with no chunk for this long is expired; manage.py purge_uploads deletes it and its .part file
+UPLOAD_EXPIRE_HOURS = env.int("UPLOAD_EXPIRE_HOURS", default=24)
+
+# Lesson media probed on course save: parallel probes, seconds a save waits for them, and how long a failure is cached
+MEDIA_PROBE_WORKERS = env.int("MEDIA_PROBE_WORKERS", default=8)
+MEDIA_PROBE_TIMEOUT = env.int("MEDIA_PROBE_TIMEOUT", default=30)
+MEDIA_PROBE_RETRY_AFTER = env.int("MEDIA_PROBE_RETRY_AFTER", default=60 * 60)
+
+# Abandoned carts (manage.py purge_carts)
+CART_RETENTION_DAYS = env.int("CART_RETENTION_DAYS", default=30)
+CART_PURGE_BATCH_SIZE = env.int("CART_PURGE_BATCH_SIZE", default=500)
+CART_ARCHIVE_DIR = env("CART_ARCHIVE_DIR", default=str(BASE_DIR / "cart-archive"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -238,3 +306,4 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "upload-offset")
@@ -0,0 +1,34 @@
+import apiInstance from "./axios";
+
+const MAX_RETRIES = 3;
+
+// Sends a file to file-upload/sessions/ chunk by chunk. A failed chunk is resent from the
+// offset the server reports, so a dropped connection only costs that chunk.
+export const uploadFileInChunks = async (file, onProgress) => {
+  const { data: session } = await apiInstance.post("file-upload/sessions/", {
+    filename: file.name,
+    size: file.size,
+    content_type: file.type,
+  });
+
+  let current = session;
+  let failures = 0;
+  while (current.received < file.size) {
+    const chunk = file.slice(current.received, current.received + session.chunk_size);
+    try {
+      const res = await apiInstance.put(`file-upload/sessions/${session.upload_id}/`, chunk, {
+        headers: { "Content-Type": "application/octet-stream", "Upload-Offset": current.received },
+        timeout: 0,
+      });
+      current = res.data;
+      failures = 0;
+      if (onProgress) onProgress(Math.round((current.received / file.size) * 100));
+    } catch (error) {
+      failures += 1;
+      if (failures > MAX_RETRIES) throw error;
+      const res = await apiInstance.get(`file-upload/sessions/${session.upload_id}/`);
+      current = res.data;
+    }
+  }
+  return current;
+};
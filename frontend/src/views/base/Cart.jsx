@@ -45,14 +45,11 @@ function Cart() {
         }
       } : {};
       
-      const [cartRes, statsRes] = await Promise.all([
-        apiInstance.get(`course/cart-list/${cartId}/`, config),
-        apiInstance.get(`cart/stats/${cartId}/`, config),
-      ]);
-      
-      setCart(cartRes.data);
-      setCartStats(statsRes.data);
-      setCartCount(cartRes.data?.length || 0);
+      const res = await apiInstance.get(`cart/${cartId}/`, config);
+
+      setCart(res.data.items);
+      setCartStats(res.data.stats);
+      setCartCount(res.data.items?.length || 0);
     } catch (error) {
       if (error.response?.status === 403 && !userId()) {
         setCart([]);
@@ -40,7 +40,9 @@ function Checkout() {
       Toast[res.data.icon === "success" ? "success" : "error"](res.data.message);
     } catch (error) {
       const message = error?.response?.data?.detail;
-      if (typeof message === "string" && message.includes("Coupon matching query")) {
+      if (error?.response?.data?.message) {
+        Toast.error(error.response.data.message);
+      } else if (typeof message === "string" && message.includes("Coupon matching query")) {
         Toast.error("Coupon does not exist");
       } else {
         Toast.error("Coupon is not suitable");
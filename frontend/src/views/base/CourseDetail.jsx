@@ -904,6 +904,26 @@ function CourseDetail() {
                                 {/* Reviews Tab */}
                                 <div className="tab-pane fade" id="reviews" role="tabpanel">
                                 <h4 className="mb-4 text-primary">Student Reviews</h4>
+
+                                {course?.rating_count > 0 && course?.rating_histogram && (
+                                    <div className="mb-4">
+                                    {[5, 4, 3, 2, 1].map((star) => {
+                                        const starCount = course.rating_histogram[star] || 0;
+                                        const percent = Math.round((starCount / course.rating_count) * 100);
+                                        return (
+                                        <div className="d-flex align-items-center mb-2" key={star}>
+                                            <span className="me-2 text-nowrap" style={{width: '3.5rem'}}>
+                                            {star} <i className="fas fa-star rating-stars"></i>
+                                            </span>
+                                            <div className="progress flex-grow-1" style={{height: '8px'}}>
+                                            <div className="progress-bar bg-warning" role="progressbar" style={{width: `${percent}%`}} aria-valuenow={percent} aria-valuemin="0" aria-valuemax="100"></div>
+                                            </div>
+                                            <small className="ms-2 text-muted" style={{width: '2.5rem'}}>{starCount}</small>
+                                        </div>
+                                        );
+                                    })}
+                                    </div>
+                                )}
                                 
                                 {course?.reviews?.length > 0 ? (
                                     <div className="reviews-container">
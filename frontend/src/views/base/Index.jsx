@@ -52,8 +52,21 @@ function Index() {
         // }
 
         try {
-            const res = await apiInstance.get(`/course/course-list/`);
-            setCourses(res.data);
+            // The catalog is cursor-paginated; follow `next` so every published course is listed
+            const allCourses = [];
+            let url = `/course/catalog/`;
+            let params = {
+                page_size: 100,
+                fields: "id,slug,title,image,price,language,level,teacher,average_rating,rating_count,student_count",
+            };
+            while (url) {
+                const res = await apiInstance.get(url, { params });
+                allCourses.push(...res.data.results);
+                url = res.data.next;
+                // The next link already carries page_size, fields and the cursor
+                params = undefined;
+            }
+            setCourses(allCourses);
 
             // localStorage.setItem("courses", JSON.stringify(res.data));
             // localStorage.setItem("courses_timestamp", Date.now().toString());
@@ -379,13 +392,13 @@ function Index() {
                                 <div>
                                     <i className="fas fa-users text-muted me-1"></i>
                                     <span className="small text-muted">
-                                        {t("course.student_count", { count: c.students?.length || 0 })}
+                                        {t("course.student_count", { count: c.student_count || 0 })}
                                     </span>
                                 </div>
                                 <div className="text-warning small">
                                     <Rater total={5} rating={c.average_rating || 0} interactive={false} />
                                     <span className="ms-1">
-                                        {t("course.review_count", { count: c.reviews?.length || 0 })}
+                                        {t("course.review_count", { count: c.rating_count || 0 })}
                                     </span>
                                 </div>
                                 </div>
@@ -323,7 +323,7 @@ function Coupon() {
                                                             <div>
                                                                 <h6 className="mb-0">Total Usage</h6>
                                                                 <h3 className="mb-0">
-                                                                    {coupons.reduce((sum, coupon) => sum + coupon.used_by, 0)}
+                                                                    {coupons.reduce((sum, coupon) => sum + coupon.used_count, 0)}
                                                                 </h3>
                                                             </div>
                                                         </div>
@@ -369,7 +369,7 @@ function Coupon() {
                                                                 ) : 'N/A'}
                                                             </td>
                                                             <td>
-                                                                {coupon.used_by.length} / {coupon.max_uses || '∞'}
+                                                                {coupon.used_count} / {coupon.max_uses || '∞'}
                                                             </td>
                                                             <td>
                                                                 <Badge bg={coupon.active ? "success" : "secondary"}>
@@ -7,6 +7,7 @@ import BaseHeader from "../partials/BaseHeader";
 import BaseFooter from "../partials/BaseFooter";
 import { Link, useNavigate } from "react-router-dom";
 import apiInstance from "../../utils/axios";
+import { uploadFileInChunks } from "../../utils/upload";
 import { teacherId } from "../../utils/constants";
 import Toast from "../plugin/Toast";
 
@@ -59,13 +60,9 @@ function CourseCreate() {
 
         setLoading((prev) => ({ ...prev, file: true }));
         try {
-        const formData = new FormData();
-        formData.append("file", file);
-        const response = await apiInstance.post("/file-upload/", formData, {
-            headers: { "Content-Type": "multipart/form-data" },
-        });
+        const upload = await uploadFileInChunks(file);
 
-        const url = response?.data?.url;
+        const url = upload?.url;
         if (url) {
             setCourseData((prev) => {
             const updated = { ...prev };
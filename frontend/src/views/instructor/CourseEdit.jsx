@@ -7,6 +7,7 @@ import BaseHeader from "../partials/BaseHeader";
 import BaseFooter from "../partials/BaseFooter";
 import { Link, useNavigate, useParams } from "react-router-dom";
 import apiInstance from "../../utils/axios";
+import { uploadFileInChunks } from "../../utils/upload";
 import { teacherId } from "../../utils/constants";
 import Toast from "../plugin/Toast";
 
@@ -106,15 +107,8 @@ function CourseEdit() {
     setLoading((prev) => ({ ...prev, file: true }));
 
     try {
-      const formData = new FormData();
-      formData.append("file", file);
-      const res = await apiInstance.post("/file-upload/", formData, {
-        headers: {
-          "Content-Type": "multipart/form-data",
-          "X-CSRFToken": getCookie("csrftoken"),
-        },
-      });
-      const url = res.data?.url;
+      const upload = await uploadFileInChunks(file);
+      const url = upload?.url;
       if (!url) throw new Error("Invalid upload response");
 
       setCourseData((prev) => {
@@ -84,6 +84,7 @@ import Toast from "../plugin/Toast";
         if (earning.length < 2) return 0;
         const currentMonth = earning[earning.length - 1].total_earning;
         const previousMonth = earning[earning.length - 2].total_earning;
+        if (!previousMonth) return 0;
         return ((currentMonth - previousMonth) / previousMonth * 100).toFixed(1);
     };
 
@@ -94,7 +95,7 @@ import Toast from "../plugin/Toast";
     };
 
     const earningChartData = {
-        labels: filterDataByTimeRange().map((e) => moment().month(e.month - 1).format("MMM")),
+        labels: filterDataByTimeRange().map((e) => moment({ year: e.year, month: e.month - 1 }).format("MMM YY")),
         datasets: [
         {
             label: "Monthly Earnings",
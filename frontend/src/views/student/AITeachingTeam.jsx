@@ -166,6 +166,15 @@ const AITeachingAgents = () => {
     });
   };
 
+  const waitForJob = async (jobId, intervalMs = 3000) => {
+    while (true) {
+      const res = await apiInstance.get(`/jobs/${jobId}/`);
+      if (res.data.status === "Succeeded") return res.data.result;
+      if (res.data.status === "Failed") throw new Error(res.data.error || "Agent failed");
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  };
+
   const handleCallAgent = async (agentType, endpoint) => {
     const agentState = agentStates[agentType];
     let finalTopic = globalTopic;
@@ -200,16 +209,17 @@ const AITeachingAgents = () => {
     updateAgentState(agentType, { loading: true });
 
     try {
-      const res = await apiInstance.post(endpoint, payload, { timeout: 300000 });
+      const res = await apiInstance.post(endpoint, payload);
+      const result = await waitForJob(res.data.job_id);
       Toast.success(`${agentType} completed!`);
       updateAgentState(agentType, { 
-        docUrl: res.data.doc_url,
+        docUrl: result.doc_url,
         completed: true
       });
-      return res.data;
+      return result;
     } catch (error) {
       console.error(error);
-      Toast.error(error.response?.data?.error || "Agent failed");
+      Toast.error(error.response?.data?.error || error.message || "Agent failed");
       return null;
     } finally {
       updateAgentState(agentType, { loading: false });
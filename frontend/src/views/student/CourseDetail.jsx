@@ -74,24 +74,57 @@ function CourseDetail() {
     fetchCourseDetail();
   }, []);
 
-  const handleMarkLessonAsCompleted = async (variantItemId) => {
-    const key = `lecture_${variantItemId}`;
-    setMarkAsCompletedStatus({ ...markAsCompletedStatus, [key]: "Updating" });
+  // Completion changes are applied locally at once and sent to the server in batches
+  const pendingProgress = useRef({});
+  const progressTimer = useRef(null);
 
-    const formdata = new FormData();
-    formdata.append("user_id", UserData()?.user_id || 0);
-    formdata.append("course_id", course.course?.id);
-    formdata.append("variant_item_id", variantItemId);
+  const flushProgress = async () => {
+    clearTimeout(progressTimer.current);
+    const entries = Object.values(pendingProgress.current);
+    pendingProgress.current = {};
+    if (entries.length === 0) return;
 
     try {
-      await apiInstance.post(`student/course-completed/`, formdata);
-      await fetchCourseDetail();
-      setMarkAsCompletedStatus({ ...markAsCompletedStatus, [key]: "Updated" });
+      const res = await apiInstance.post(`student/progress-sync/`, {
+        enrollment_id: param.enrollment_id,
+        entries,
+      });
+      setCourse((prev) => ({
+        ...prev,
+        completed_lesson: res.data.completed_items.map((id) => ({ variant_item: { id } })),
+      }));
+      setCompletionPercentage(res.data.progress);
+      setMarkAsCompletedStatus((prev) => ({
+        ...prev,
+        ...Object.fromEntries(entries.map((e) => [`lecture_${e.variant_item_id}`, "Updated"])),
+      }));
     } catch {
-      Toast.error("Could not mark lesson as completed");
+      Toast.error("Could not save your progress");
+      fetchCourseDetail();
     }
   };
 
+  useEffect(() => () => flushProgress(), []);
+
+  const handleMarkLessonAsCompleted = (lecture) => {
+    const completed = !course.completed_lesson?.some((cl) => cl.variant_item.id === lecture.id);
+    pendingProgress.current[lecture.variant_item_id] = {
+      variant_item_id: lecture.variant_item_id,
+      completed,
+      client_timestamp: new Date().toISOString(),
+    };
+    setMarkAsCompletedStatus((prev) => ({ ...prev, [`lecture_${lecture.variant_item_id}`]: "Updating" }));
+    setCourse((prev) => ({
+      ...prev,
+      completed_lesson: completed
+        ? [...(prev.completed_lesson || []), { variant_item: { id: lecture.id } }]
+        : (prev.completed_lesson || []).filter((cl) => cl.variant_item.id !== lecture.id),
+    }));
+
+    clearTimeout(progressTimer.current);
+    progressTimer.current = setTimeout(flushProgress, 1000);
+  };
+
   const handleSubmitCreateNote = async (e) => {
     e.preventDefault();
     const formdata = new FormData();
@@ -347,7 +380,7 @@ function CourseDetail() {
                                                                                                     <input
                                                                                                         type="checkbox"
                                                                                                         className="form-check-input ms-2"
-                                                                                                        onChange={() => handleMarkLessonAsCompleted(l.variant_item_id)}
+                                                                                                        onChange={() => handleMarkLessonAsCompleted(l)}
                                                                                                         checked={course.completed_lesson?.some((cl) => cl.variant_item.id === l.id)}
                                                                                                     />
                                                                                                 </div>
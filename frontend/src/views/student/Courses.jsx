@@ -142,24 +142,24 @@ function Courses() {
                                       className="progress-bar bg-success"
                                       role="progressbar"
                                       style={{
-                                        width: `${(c.completed_lesson?.length / c.lectures?.length) * 100 || 0}%`
+                                        width: `${c.progress || 0}%`
                                       }}
-                                      aria-valuenow={(c.completed_lesson?.length / c.lectures?.length) * 100 || 0}
+                                      aria-valuenow={c.progress || 0}
                                       aria-valuemin="0"
                                       aria-valuemax="100"
                                     ></div>
                                   </div>
                                   <small className="ms-2 text-muted">
-                                    {Math.round((c.completed_lesson?.length / c.lectures?.length) * 100) || 0}%
+                                    {c.progress || 0}%
                                   </small>
                                 </div>
                               </td>
                               <td className="text-end pe-4">
                                 <Link
                                   to={`/student/courses/${c.enrollment_id}/`}
-                                  className={`btn btn-sm ${c.completed_lesson?.length > 0 ? 'btn-primary' : 'btn-success'}`}
+                                  className={`btn btn-sm ${c.completed_lessons > 0 ? 'btn-primary' : 'btn-success'}`}
                                 >
-                                  {c.completed_lesson?.length > 0 ? (
+                                  {c.completed_lessons > 0 ? (
                                     <>Continue <i className="fas fa-arrow-right ms-1"></i></>
                                   ) : (
                                     <>Start <i className="fas fa-play ms-1"></i></>
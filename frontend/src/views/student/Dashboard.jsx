@@ -147,16 +147,16 @@ function Dashboard() {
                                   </div>
                                 </td>
                                 <td>{moment(c.date).format("D MMM, YYYY")}</td>
-                                <td>{c.lectures?.length}</td>
-                                <td>{c.completed_lesson?.length}</td>
+                                <td>{c.total_lessons}</td>
+                                <td>{c.completed_lessons}</td>
                                 <td>
                                   <Link
                                     to={`/student/courses/${c.enrollment_id}/`}
                                     className={`btn btn-sm mt-1 ${
-                                      c.completed_lesson?.length > 0 ? "btn-primary" : "btn-success"
+                                      c.completed_lessons > 0 ? "btn-primary" : "btn-success"
                                     }`}
                                   >
-                                    {c.completed_lesson?.length > 0 ? "Continue" : "Start"}
+                                    {c.completed_lessons > 0 ? "Continue" : "Start"}
                                     <i className="fas fa-arrow-right ms-1"></i>
                                   </Link>
                                 </td>